@@ -0,0 +1,49 @@
+"""Configuração do gunicorn para produção
+
+Uso: gunicorn -c gunicorn.conf.py "src.main:create_app()"
+
+Todos os valores podem ser ajustados por variáveis de ambiente, sem alterar
+este arquivo (WEB_CONCURRENCY, GUNICORN_THREADS, GUNICORN_MAX_WORKERS...).
+"""
+import os
+import multiprocessing
+
+
+def _cpus():
+    # Em contêineres, sched_getaffinity reflete as CPUs realmente disponíveis
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+# Endereço: as plataformas de cloud informam a porta em PORT
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Workers: 2 x CPUs + 1, limitado para caber na memória dos planos gratuitos
+workers = int(os.environ.get(
+    'WEB_CONCURRENCY',
+    min(2 * _cpus() + 1, int(os.environ.get('GUNICORN_MAX_WORKERS', 4)))
+))
+
+# Workers com threads: as requisições passam a maior parte do tempo esperando o banco
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Mantém a conexão aberta entre requisições do mesmo navegador
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recicla workers periodicamente para conter vazamentos de memória
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Carrega a aplicação uma vez no processo mestre (sobe mais rápido e compartilha memória)
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+
+# Logs no stdout/stderr, onde Render e Railway os coletam
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
@@ -0,0 +1,193 @@
+"""Benchmark das consultas mais frequentes antes e depois dos índices
+
+Cria um banco descartável, popula milhares de pessoas e alguns anos de
+escalas, mede cada consulta sem os índices da revisão 0001, aplica a revisão
+e mede de novo, mostrando o plano de execução (EXPLAIN) dos dois cenários.
+As estatísticas do planejador (ANALYZE) são atualizadas nos dois.
+
+    python scripts/benchmark_indices.py
+    python scripts/benchmark_indices.py --pessoas 10000 --anos 10
+    python scripts/benchmark_indices.py --url postgresql://usuario@localhost/benchmark
+
+Com --url, use um banco vazio: as tabelas são criadas e populadas nele.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def popular(db, modelos, total_pessoas, anos):
+    """Insere equipes, pessoas, vínculos, escalas e atribuições em massa"""
+    from src.models.pessoa import normalizar_nome
+
+    Pessoa, Equipe, PessoaEquipe, Escala, EscalaPessoa = modelos
+    aleatorio = random.Random(42)
+    agora = datetime.utcnow()
+
+    funcoes_equipes = ['pregacao', 'musicos', 'conducao_animacao', 'acolhida', 'abastecimento']
+    db.session.execute(db.insert(Equipe), [
+        {'id': indice + 1, 'nome': funcao, 'ativo': True, 'created_at': agora, 'updated_at': agora}
+        for indice, funcao in enumerate(funcoes_equipes)
+    ])
+    db.session.execute(db.insert(Pessoa), [
+        {'id': pessoa_id, 'nome': f'Pessoa {pessoa_id:06d}', 'nome_busca': normalizar_nome(f'Pessoa {pessoa_id:06d}'),
+         'ativo': aleatorio.random() > 0.1, 'created_at': agora, 'updated_at': agora}
+        for pessoa_id in range(1, total_pessoas + 1)
+    ])
+
+    membros = {funcao: [] for funcao in funcoes_equipes}
+    vinculos = []
+    for pessoa_id in range(1, total_pessoas + 1):
+        for indice in aleatorio.sample(range(len(funcoes_equipes)), aleatorio.randint(1, 2)):
+            membros[funcoes_equipes[indice]].append(pessoa_id)
+            vinculos.append({'pessoa_id': pessoa_id, 'equipe_id': indice + 1, 'created_at': agora})
+    db.session.execute(db.insert(PessoaEquipe), vinculos)
+
+    inicio = date.today() - timedelta(days=365 * anos)
+    escalas = []
+    dia = inicio + timedelta(days=(1 - inicio.weekday()) % 7)
+    while dia <= date.today():
+        escalas.append({'id': len(escalas) + 1, 'data': dia, 'dia_semana': 'Terça-feira',
+                        'created_at': agora, 'updated_at': agora})
+        escalas.append({'id': len(escalas) + 1, 'data': dia + timedelta(days=1), 'dia_semana': 'Quarta-feira',
+                        'created_at': agora, 'updated_at': agora})
+        dia += timedelta(days=7)
+    db.session.execute(db.insert(Escala), escalas)
+
+    quantidades = {'pregacao': 1, 'musicos': 3, 'conducao_animacao': 1, 'acolhida': 2}
+    atribuicoes = []
+    for escala in escalas:
+        if escala['dia_semana'] == 'Terça-feira':
+            vagas = quantidades
+        else:
+            vagas = {'abastecimento': 1}
+        for funcao, quantidade in vagas.items():
+            for pessoa_id in aleatorio.sample(membros[funcao], quantidade):
+                atribuicoes.append({'escala_id': escala['id'], 'pessoa_id': pessoa_id, 'funcao': funcao,
+                                    'confirmado': False, 'created_at': agora, 'updated_at': agora})
+    db.session.execute(db.insert(EscalaPessoa), atribuicoes)
+    db.session.commit()
+
+    return len(escalas), len(atribuicoes)
+
+
+def consultas(db, modelos, total_pessoas, total_escalas):
+    """Consultas das rotas, cada uma com um gerador de parâmetros aleatórios"""
+    Pessoa, Equipe, PessoaEquipe, Escala, EscalaPessoa = modelos
+    aleatorio = random.Random(7)
+    hoje = date.today()
+
+    def periodo():
+        inicio = hoje - timedelta(days=aleatorio.randint(30, 365))
+        return Escala.data >= inicio, Escala.data < inicio + timedelta(days=31)
+
+    return [
+        ('pessoas da função na escala', lambda: db.select(EscalaPessoa.pessoa_id).where(
+            EscalaPessoa.escala_id == aleatorio.randint(1, total_escalas),
+            EscalaPessoa.funcao == 'musicos'
+        )),
+        ('histórico da pessoa', lambda: db.select(Escala.data, EscalaPessoa.funcao).join(
+            Escala, Escala.id == EscalaPessoa.escala_id
+        ).where(EscalaPessoa.pessoa_id == aleatorio.randint(1, total_pessoas)).order_by(Escala.data.desc())),
+        ('membros da equipe', lambda: db.select(Pessoa.id, Pessoa.nome).join(
+            PessoaEquipe, PessoaEquipe.pessoa_id == Pessoa.id
+        ).where(PessoaEquipe.equipe_id == aleatorio.randint(1, 5), Pessoa.ativo.is_(True)).order_by(Pessoa.nome)),
+        ('nome duplicado', lambda: db.select(Pessoa.id).where(
+            Pessoa.com_nome(f'Pessoa {aleatorio.randint(1, total_pessoas):06d}')
+        ).limit(1)),
+        ('escalas do mês', lambda: db.select(Escala.id, Escala.data).where(*periodo()).order_by(Escala.data)),
+    ]
+
+
+def medir(db, gerar, repeticoes):
+    """Executa a consulta várias vezes e retorna a mediana em milissegundos"""
+    tempos = []
+    with db.engine.connect() as conexao:
+        for _ in range(repeticoes):
+            comando = gerar()
+            inicio = time.perf_counter()
+            conexao.execute(comando).all()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def plano(db, comando):
+    """Retorna o plano de execução da consulta no dialeto do banco"""
+    sql = str(comando.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+    prefixo = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    with db.engine.connect() as conexao:
+        linhas = conexao.exec_driver_sql(prefixo + sql).all()
+    return [str(linha[-1]) for linha in linhas]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos índices das consultas frequentes')
+    parser.add_argument('--url', help='Banco vazio a ser usado (padrão: SQLite temporário)')
+    parser.add_argument('--pessoas', type=int, default=5000, help='Pessoas cadastradas (padrão: 5000)')
+    parser.add_argument('--anos', type=int, default=5, help='Anos de escalas (padrão: 5)')
+    parser.add_argument('-r', '--repeticoes', type=int, default=200, help='Execuções por consulta (padrão: 200)')
+    parser.add_argument('--sem-plano', action='store_true', help='Não mostra o EXPLAIN das consultas')
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = args.url or f"sqlite:///{os.path.join(pasta, 'benchmark.db')}"
+
+    from src.main import create_app
+    from src.models.user import db
+    from src.models.pessoa import Pessoa, Equipe, PessoaEquipe
+    from src.models.escala import Escala
+    from src.models.escala_pessoa import EscalaPessoa
+    from src.esquema import revisoes_disponiveis
+
+    modelos = (Pessoa, Equipe, PessoaEquipe, Escala, EscalaPessoa)
+    revisao = next(modulo for modulo in revisoes_disponiveis() if modulo.REVISAO == '0001')
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        # Remove os índices para medir o cenário anterior à revisão
+        with db.engine.begin() as conexao:
+            for nome, tabela, _ in revisao.INDICES:
+                conexao.exec_driver_sql(f'DROP INDEX IF EXISTS {nome}')
+
+        inicio = time.perf_counter()
+        total_escalas, total_atribuicoes = popular(db, modelos, args.pessoas, args.anos)
+        print(f'Banco populado em {time.perf_counter() - inicio:.1f} s: {args.pessoas} pessoas, '
+              f'{total_escalas} escalas, {total_atribuicoes} atribuições\n')
+
+        lista = consultas(db, modelos, args.pessoas, total_escalas)
+        resultados = {}
+        planos = {}
+        for cenario in ('sem índices', 'com índices'):
+            with db.engine.begin() as conexao:
+                if cenario == 'com índices':
+                    revisao.aplicar(conexao)
+                conexao.exec_driver_sql('ANALYZE')
+            for nome, gerar in lista:
+                resultados[(nome, cenario)] = medir(db, gerar, args.repeticoes)
+                planos[(nome, cenario)] = plano(db, gerar())
+
+        print(f"{'Consulta':<30} {'Sem índices':>12} {'Com índices':>12} {'Ganho':>8}")
+        for nome, _ in lista:
+            antes = resultados[(nome, 'sem índices')]
+            depois = resultados[(nome, 'com índices')]
+            print(f'{nome:<30} {antes:>10.3f}ms {depois:>10.3f}ms {antes / depois:>7.1f}x')
+
+        if not args.sem_plano:
+            for nome, _ in lista:
+                print(f'\n== {nome}')
+                for cenario in ('sem índices', 'com índices'):
+                    print(f'  {cenario}:')
+                    for linha in planos[(nome, cenario)]:
+                        print(f'    {linha}')
+
+
+if __name__ == '__main__':
+    main()
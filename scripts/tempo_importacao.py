@@ -0,0 +1,64 @@
+"""Relatório do tempo de importação da aplicação (cold start)
+
+Executa `python -X importtime` criando a aplicação em um processo novo e
+mostra os módulos mais caros. Com --limite-ms, termina com erro quando o
+tempo total passa do limite, para detectar regressões de cold start:
+
+    python scripts/tempo_importacao.py
+    python scripts/tempo_importacao.py --top 30 --limite-ms 800
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODIGO = 'from src.main import create_app; create_app()'
+
+
+def medir():
+    """Retorna a lista de (módulo, próprio_us, acumulado_us) na ordem de importação"""
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CODIGO],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True
+    )
+    if resultado.returncode != 0:
+        sys.stderr.write(resultado.stderr)
+        raise SystemExit('Falha ao importar a aplicação')
+
+    modulos = []
+    for linha in resultado.stderr.splitlines():
+        # Formato: "import time: self [us] | cumulative | imported package"
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, acumulado, nome = linha[len('import time:'):].split('|', 2)
+        # Um espaço separa a coluna; os demais indicam o nível de aninhamento
+        modulos.append((nome.rstrip()[1:], int(proprio), int(acumulado)))
+    return modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Relatório do tempo de importação')
+    parser.add_argument('--top', type=int, default=20, help='Quantidade de módulos listados (padrão: 20)')
+    parser.add_argument('--limite-ms', type=float, default=None, help='Falha se o total passar deste valor')
+    args = parser.parse_args()
+
+    modulos = medir()
+
+    # Módulos de primeiro nível (sem indentação) somam o tempo total
+    total_us = sum(acumulado for nome, _, acumulado in modulos if not nome.startswith(' '))
+
+    print(f'{"acumulado (ms)":>15} {"próprio (ms)":>13}  módulo')
+    for nome, proprio, acumulado in sorted(modulos, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f'{acumulado / 1000:15.1f} {proprio / 1000:13.1f}  {nome.strip()}')
+    print(f'\nTotal de importação: {total_us / 1000:.1f} ms em {len(modulos)} módulos')
+
+    if args.limite_ms is not None and total_us / 1000 > args.limite_ms:
+        raise SystemExit(f'Tempo de importação acima do limite de {args.limite_ms:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
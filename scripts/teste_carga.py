@@ -0,0 +1,75 @@
+"""Teste de carga simples para comparar servidores
+
+Dispara requisições concorrentes contra uma URL por alguns segundos e mostra
+requisições por segundo e latências. Exemplo de comparação:
+
+    # Servidor de desenvolvimento (uma thread)
+    FLASK_ENV=production python src/main.py
+    python scripts/teste_carga.py http://localhost:5000/api/escalas
+
+    # Produção (gunicorn com gthread)
+    gunicorn -c gunicorn.conf.py "src.main:create_app()"
+    python scripts/teste_carga.py http://localhost:5000/api/escalas
+"""
+import argparse
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def executar(url, duracao, concorrencia):
+    """Executa o teste e retorna (latências em segundos, total de erros)"""
+    latencias = []
+    erros = 0
+    lock = threading.Lock()
+    fim = time.monotonic() + duracao
+
+    def cliente():
+        nonlocal erros
+        while time.monotonic() < fim:
+            inicio = time.monotonic()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as resposta:
+                    resposta.read()
+                ok = True
+            except Exception:
+                ok = False
+            decorrido = time.monotonic() - inicio
+            with lock:
+                if ok:
+                    latencias.append(decorrido)
+                else:
+                    erros += 1
+
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        for _ in range(concorrencia):
+            executor.submit(cliente)
+
+    return latencias, erros
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga simples')
+    parser.add_argument('url', help='URL a ser testada')
+    parser.add_argument('-d', '--duracao', type=float, default=10, help='Duração em segundos (padrão: 10)')
+    parser.add_argument('-c', '--concorrencia', type=int, default=16, help='Clientes simultâneos (padrão: 16)')
+    args = parser.parse_args()
+
+    latencias, erros = executar(args.url, args.duracao, args.concorrencia)
+
+    print(f'URL:            {args.url}')
+    print(f'Concorrência:   {args.concorrencia}')
+    print(f'Requisições:    {len(latencias)} ok, {erros} com erro')
+    print(f'Req/s:          {len(latencias) / args.duracao:.1f}')
+    if latencias:
+        latencias.sort()
+        p95 = latencias[int(len(latencias) * 0.95) - 1] if len(latencias) >= 20 else latencias[-1]
+        print(f'Latência média: {statistics.mean(latencias) * 1000:.1f} ms')
+        print(f'Latência p50:   {statistics.median(latencias) * 1000:.1f} ms')
+        print(f'Latência p95:   {p95 * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Busca de pessoas por nome, sem diferença de acentos e de caixa
+
+A coluna pessoas.nome_busca guarda o nome normalizado (normalizar_nome) e é
+mantida pelo modelo. Cada termo digitado precisa ser o início de uma palavra
+do nome ("jo sil" encontra "João da Silva"). Os resultados vêm por
+relevância: nome igual ao texto, nome começando pelo texto, demais; e então
+em ordem alfabética.
+
+- PostgreSQL: LIKE sobre nome_busca, atendido pelos índices da revisão 0003
+  (text_pattern_ops para o início do nome, trigramas para as demais palavras)
+- SQLite: consulta de prefixo na tabela FTS5 pessoas_busca (revisão 0002);
+  se o SQLite não tiver FTS5, LIKE sobre nome_busca
+"""
+import sqlalchemy as sa
+from sqlalchemy import or_
+from src.models.user import db
+from src.models.pessoa import Pessoa, PessoaEquipe, normalizar_nome
+
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 50
+
+_fts_por_banco = {}
+
+
+def termos_busca(texto):
+    """Termos normalizados do texto digitado"""
+    return normalizar_nome(texto or '').split()
+
+
+def _escapar_like(termo):
+    return termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _usa_fts():
+    """Se o banco atual é SQLite com a tabela pessoas_busca (verificado uma vez por banco)"""
+    bind = db.session.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return False
+    chave = str(bind.url)
+    if chave not in _fts_por_banco:
+        _fts_por_banco[chave] = sa.inspect(bind).has_table('pessoas_busca')
+    return _fts_por_banco[chave]
+
+
+def filtro_nome(texto):
+    """Critério das pessoas cujo nome contém palavras começando por cada termo; None sem termos"""
+    termos = termos_busca(texto)
+    if not termos:
+        return None
+    
+    if _usa_fts():
+        # "termo"* é uma consulta de prefixo; todos os termos precisam casar
+        consulta = ' '.join('"{}"*'.format(termo.replace('"', '""')) for termo in termos)
+        ids = sa.text('SELECT rowid FROM pessoas_busca WHERE pessoas_busca MATCH :consulta').bindparams(
+            consulta=consulta
+        ).columns(rowid=sa.Integer)
+        return Pessoa.id.in_(ids)
+    
+    return sa.and_(*[
+        or_(
+            Pessoa.nome_busca.like(f'{termo}%', escape='\\'),
+            Pessoa.nome_busca.like(f'% {termo}%', escape='\\')
+        )
+        for termo in map(_escapar_like, termos)
+    ])
+
+
+def buscar_pessoas(texto, limite=LIMITE_PADRAO, ativo=True, equipe_id=None):
+    """Pessoas que casam com o texto, mais relevantes primeiro (até `limite`)"""
+    criterio = filtro_nome(texto)
+    if criterio is None:
+        return []
+    
+    normalizado = ' '.join(termos_busca(texto))
+    relevancia = sa.case(
+        (Pessoa.nome_busca == normalizado, 0),
+        (Pessoa.nome_busca.like(f'{_escapar_like(normalizado)}%', escape='\\'), 1),
+        else_=2
+    )
+    
+    query = Pessoa.query.filter(criterio, Pessoa.ativo == ativo)
+    if equipe_id:
+        query = query.join(PessoaEquipe).filter(PessoaEquipe.equipe_id == equipe_id)
+    
+    limite = max(1, min(limite or LIMITE_PADRAO, LIMITE_MAXIMO))
+    return query.order_by(relevancia, Pessoa.nome).limit(limite).all()
+
+
+def resultados_dict(pessoas):
+    """Serialização enxuta dos resultados: id, nome e nomes das equipes (uma consulta para todas)"""
+    nomes_equipes = Pessoa.carregar_nomes_equipes([pessoa.id for pessoa in pessoas])
+    return [
+        {'id': pessoa.id, 'nome': pessoa.nome, 'equipes': nomes_equipes[pessoa.id]}
+        for pessoa in pessoas
+    ]
@@ -0,0 +1,339 @@
+"""Caches em processo para resultados derivados das escalas
+
+- Valores calculados (estatísticas): ficam em memória até que uma escala ou
+  uma atribuição de pessoa seja gravada; nesse momento são descartados. Como
+  cada worker tem a sua cópia, quem chama pode informar também uma versão
+  dos dados (uma consulta barata, como os resumos de src/condicional.py): o
+  valor só é reaproveitado enquanto a versão for a mesma, então gravações
+  feitas por outro worker também são percebidas.
+- Respostas serializadas (listagens por mês/ano): guardadas por rota e
+  período normalizado em um backend plugável (CACHE_BACKEND):
+    - 'lru' (padrão): LRU em memória de cada worker, até CACHE_MAX_ITENS
+    - 'redis': compartilhado entre workers (REDIS_URL; o pacote redis só é
+      importado quando este backend é escolhido)
+    - 'local': o backend compartilhado sobre um cliente em memória que imita
+      o Redis, para desenvolvimento e testes sem servidor
+  Cada resposta é gravada junto com o ETag da versão dos dados (ver
+  src/condicional.py) e só é reaproveitada se o ETag atual for o mesmo, então
+  uma gravação feita por outro worker nunca devolve dados antigos. As rotas
+  que gravam chamam invalidar_periodos com as datas afetadas para liberar
+  as entradas dos meses correspondentes.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.models.escala import Escala
+from src.models.escala_pessoa import EscalaPessoa
+
+# Modelos cujas gravações invalidam o cache de valores calculados
+MODELOS_MONITORADOS = (Escala, EscalaPessoa)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_valores = {}
+
+
+def obter_ou_calcular(chave, calcular, versao=None):
+    """Retorna o valor em cache para a chave, calculando-o na primeira vez
+    
+    versao: função que retorna a versão atual dos dados; com ela, um valor
+    guardado para outra versão é calculado de novo.
+    """
+    versao_atual = versao() if versao else None
+    with _lock:
+        if chave in _valores:
+            versao_guardada, valor = _valores[chave]
+            if versao_guardada == versao_atual:
+                return valor
+    
+    valor = calcular()
+    
+    with _lock:
+        _valores[chave] = (versao_atual, valor)
+    return valor
+
+
+def invalidar():
+    """Descarta todos os valores calculados e todas as respostas em cache"""
+    with _lock:
+        _valores.clear()
+    respostas.limpar()
+
+
+# ===== CACHE DE RESPOSTAS =====
+
+class CacheLRU:
+    """Backend em memória do processo que descarta as entradas menos usadas"""
+    
+    nome = 'lru'
+    
+    def __init__(self, max_itens=256):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def obter(self, chave):
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is not None:
+                self._itens.move_to_end(chave)
+            return valor
+    
+    def gravar(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+    
+    def remover_prefixos(self, prefixos):
+        with self._lock:
+            chaves = [chave for chave in self._itens if chave.startswith(tuple(prefixos))]
+            for chave in chaves:
+                del self._itens[chave]
+            return len(chaves)
+    
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+    
+    def tamanho(self):
+        return len(self._itens)
+
+
+class CacheCompartilhado:
+    """Backend sobre um cliente no formato do Redis, compartilhado entre workers"""
+    
+    nome = 'redis'
+    
+    def __init__(self, cliente, prefixo='louvamais:respostas:', ttl=300):
+        self.cliente = cliente
+        self.prefixo = prefixo
+        self.ttl = ttl
+    
+    def obter(self, chave):
+        return self.cliente.get(self.prefixo + chave)
+    
+    def gravar(self, chave, valor):
+        self.cliente.set(self.prefixo + chave, valor, ex=self.ttl)
+    
+    def remover_prefixos(self, prefixos):
+        chaves = [
+            chave
+            for prefixo in prefixos
+            for chave in self.cliente.scan_iter(match=self.prefixo + _escapar_padrao(prefixo) + '*')
+        ]
+        if chaves:
+            self.cliente.delete(*chaves)
+        return len(chaves)
+    
+    def limpar(self):
+        self.remover_prefixos([''])
+    
+    def tamanho(self):
+        return sum(1 for _ in self.cliente.scan_iter(match=self.prefixo + '*'))
+
+
+class ClienteRedisLocal:
+    """Imitação em memória dos comandos do Redis usados por CacheCompartilhado"""
+    
+    def __init__(self):
+        self._itens = {}
+        self._lock = threading.Lock()
+    
+    def get(self, chave):
+        with self._lock:
+            valor, expira_em = self._itens.get(chave, (None, None))
+            if expira_em is not None and expira_em <= time.monotonic():
+                del self._itens[chave]
+                return None
+            return valor
+    
+    def set(self, chave, valor, ex=None):
+        with self._lock:
+            self._itens[chave] = (valor, time.monotonic() + ex if ex else None)
+    
+    def delete(self, *chaves):
+        with self._lock:
+            return sum(1 for chave in chaves if self._itens.pop(chave, None) is not None)
+    
+    def scan_iter(self, match='*'):
+        with self._lock:
+            chaves = list(self._itens)
+        padrao = re.compile(_padrao_glob_para_regex(match))
+        return iter([chave for chave in chaves if padrao.fullmatch(chave)])
+
+
+def _padrao_glob_para_regex(padrao):
+    """Converte o padrão de SCAN ... MATCH (*, ? e escapes com \\) em expressão regular"""
+    partes = []
+    caracteres = iter(padrao)
+    for c in caracteres:
+        if c == '\\':
+            partes.append(re.escape(next(caracteres, '\\')))
+        elif c == '*':
+            partes.append('.*')
+        elif c == '?':
+            partes.append('.')
+        else:
+            partes.append(re.escape(c))
+    return ''.join(partes)
+
+
+def _escapar_padrao(texto):
+    """Escapa os curingas do padrão glob usado por SCAN ... MATCH"""
+    return ''.join(f'\\{c}' if c in '*?[]\\' else c for c in texto)
+
+
+class CacheRespostas:
+    """Respostas serializadas por rota e período, com contadores de acerto e falha"""
+    
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+    
+    @staticmethod
+    def chave(endpoint, mes=None, ano=None, **extras):
+        """Chave normalizada: período (ano:mês, com * para ausente) + rota + demais parâmetros"""
+        periodo = f'{ano or "*"}:{mes or "*"}'
+        parametros = '&'.join(f'{nome}={valor}' for nome, valor in sorted(extras.items()) if valor not in (None, ''))
+        return f'{periodo}|{endpoint}|{parametros}'
+    
+    def obter(self, chave, etag):
+        """Retorna o corpo guardado se ele corresponde à versão `etag` dos dados; senão None"""
+        try:
+            valor = self.backend.obter(chave)
+        except Exception as e:
+            logger.warning('Falha ao ler o cache de respostas: %s', e)
+            valor = None
+        
+        corpo = None
+        if valor is not None:
+            etag_guardado, _, corpo_guardado = valor.partition(b'\n')
+            if etag_guardado.decode() == etag:
+                corpo = corpo_guardado
+        
+        with self._lock:
+            if corpo is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+        return corpo
+    
+    def gravar(self, chave, etag, corpo):
+        try:
+            self.backend.gravar(chave, etag.encode() + b'\n' + corpo)
+        except Exception as e:
+            logger.warning('Falha ao gravar no cache de respostas: %s', e)
+    
+    def invalidar_periodos(self, datas):
+        """Remove as respostas dos meses das datas, dos seus anos, dos meses sem ano e as sem período"""
+        prefixos = {'*:*|'}
+        for data in datas:
+            prefixos.add(f'{data.year}:{data.month}|')
+            prefixos.add(f'{data.year}:*|')
+            prefixos.add(f'*:{data.month}|')
+        try:
+            removidas = self.backend.remover_prefixos(sorted(prefixos))
+        except Exception as e:
+            logger.warning('Falha ao invalidar o cache de respostas: %s', e)
+            return
+        with self._lock:
+            self.invalidacoes += removidas
+    
+    def limpar(self):
+        try:
+            self.backend.limpar()
+        except Exception as e:
+            logger.warning('Falha ao limpar o cache de respostas: %s', e)
+    
+    def estatisticas(self):
+        with self._lock:
+            total = self.acertos + self.falhas
+            estatisticas = {
+                'backend': self.backend.nome,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': round(self.acertos / total, 3) if total else None,
+                'invalidacoes': self.invalidacoes
+            }
+        try:
+            estatisticas['itens'] = self.backend.tamanho()
+        except Exception:
+            estatisticas['itens'] = None
+        return estatisticas
+
+
+def criar_backend():
+    """Cria o backend do cache de respostas conforme CACHE_BACKEND"""
+    tipo = os.environ.get('CACHE_BACKEND', 'lru').lower()
+    ttl = int(os.environ.get('CACHE_TTL', 300))
+    
+    if tipo == 'redis':
+        try:
+            import redis
+            cliente = redis.Redis.from_url(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+            return CacheCompartilhado(cliente, ttl=ttl)
+        except ImportError:
+            logger.warning('Biblioteca redis não está disponível; usando o cache LRU local')
+    elif tipo == 'local':
+        backend = CacheCompartilhado(ClienteRedisLocal(), ttl=ttl)
+        backend.nome = 'local'
+        return backend
+    
+    return CacheLRU(int(os.environ.get('CACHE_MAX_ITENS', 256)))
+
+
+respostas = CacheRespostas(criar_backend())
+
+
+def invalidar_periodos(datas):
+    """Descarta as respostas em cache dos meses das datas informadas"""
+    respostas.invalidar_periodos(datas)
+
+
+def _marcar_alteracao(session):
+    session.info['cache_invalidar'] = True
+    with _lock:
+        _valores.clear()
+
+
+@event.listens_for(Session, 'after_flush')
+def _apos_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, MODELOS_MONITORADOS):
+            _marcar_alteracao(session)
+            return
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _apos_execucao_em_massa(orm_execute_state):
+    # UPDATE/DELETE/INSERT em massa (query.delete(), insert(...)) não passam pelo flush
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, MODELOS_MONITORADOS):
+        _marcar_alteracao(orm_execute_state.session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apos_commit(session):
+    # Invalida de novo após o commit, pois outra requisição pode ter
+    # recalculado o valor entre o flush e o commit
+    if session.info.pop('cache_invalidar', False):
+        with _lock:
+            _valores.clear()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _apos_rollback(session):
+    session.info.pop('cache_invalidar', None)
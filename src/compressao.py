@@ -0,0 +1,39 @@
+"""Compressão gzip sob demanda das respostas JSON da API"""
+import gzip
+import os
+from flask import request
+
+# Respostas menores que isso não compensam o custo da compressão
+COMPRESSAO_MINIMA_BYTES = int(os.environ.get('COMPRESSAO_MINIMA_BYTES', 1024))
+
+
+def comprimir_json(resposta):
+    """after_request: comprime com gzip respostas JSON acima do limite
+    
+    Respostas em streaming (exportações) e já codificadas não são tocadas.
+    """
+    if (
+        resposta.mimetype != 'application/json'
+        or resposta.status_code < 200
+        or resposta.status_code in (204, 304)
+        or resposta.is_streamed
+        or resposta.direct_passthrough
+        or 'Content-Encoding' in resposta.headers
+    ):
+        return resposta
+    
+    resposta.vary.add('Accept-Encoding')
+    if not request.accept_encodings['gzip']:
+        return resposta
+    
+    corpo = resposta.get_data()
+    if len(corpo) < COMPRESSAO_MINIMA_BYTES:
+        return resposta
+    
+    resposta.set_data(gzip.compress(corpo, compresslevel=6))
+    resposta.headers['Content-Encoding'] = 'gzip'
+    # O ETag forte identifica os bytes; após a compressão vale só como fraco
+    etag, fraco = resposta.get_etag()
+    if etag and not fraco:
+        resposta.set_etag(etag, weak=True)
+    return resposta
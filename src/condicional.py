@@ -0,0 +1,99 @@
+"""Respostas condicionais (ETag / Last-Modified) para as rotas de leitura
+
+O validador de uma resposta é calculado com uma única consulta que traz,
+para cada tabela que compõe o recurso, a quantidade de linhas e o maior
+updated_at. Se o cliente já tem essa versão (If-None-Match), a rota responde
+304 sem consultar nem serializar os dados.
+
+If-Modified-Since não é usado para responder 304: remover uma escala ou uma
+atribuição não muda o maior updated_at, e Last-Modified só tem precisão de
+segundos. O Last-Modified continua sendo enviado, apenas como informação.
+"""
+import hashlib
+from datetime import timezone
+from flask import request, current_app
+from sqlalchemy import func, true
+from src.models.user import db
+
+
+def resumo(coluna_id, coluna_data, *criterios):
+    """Consulta de uma linha com (quantidade, maior data) das linhas que atendem aos critérios"""
+    return db.select(func.count(coluna_id), func.max(coluna_data)).where(*criterios)
+
+
+def ler_resumos(*resumos):
+    """Executa os resumos em uma única consulta e retorna os valores de todos, em sequência"""
+    # Cada resumo tem uma única linha; o produto entre eles também
+    subconsultas = [consulta.subquery() for consulta in resumos]
+    consulta = db.select(*[coluna for sub in subconsultas for coluna in sub.c]).select_from(subconsultas[0])
+    for sub in subconsultas[1:]:
+        consulta = consulta.join(sub, true())
+    return tuple(db.session.execute(consulta).one())
+
+
+def calcular_validadores(*resumos):
+    """Executa os resumos em uma consulta e retorna (etag, ultima_modificacao)
+    
+    O ETag também leva o caminho com a query string, pois filtros, página e
+    formato (compacto) mudam o conteúdo da resposta.
+    """
+    valores = ler_resumos(*resumos)
+    
+    conteudo = f'{request.full_path}|{valores!r}'
+    etag = hashlib.sha1(conteudo.encode('utf-8')).hexdigest()[:20]
+    
+    datas = [valor for valor in valores[1::2] if valor is not None]
+    ultima_modificacao = max(datas).replace(tzinfo=timezone.utc, microsecond=0) if datas else None
+    return etag, ultima_modificacao
+
+
+def responder_se_nao_modificado(etag, ultima_modificacao):
+    """Retorna a resposta 304 quando o cliente já tem a versão atual; senão None"""
+    # Só o ETag, que inclui as quantidades de linhas, identifica a versão
+    if not request.if_none_match or not request.if_none_match.contains_weak(etag):
+        return None
+    return aplicar_validadores(current_app.response_class(status=304), etag, ultima_modificacao)
+
+
+def aplicar_validadores(resposta, etag, ultima_modificacao):
+    """Adiciona ETag, Last-Modified e a exigência de revalidação à resposta"""
+    resposta.set_etag(etag, weak=True)
+    if ultima_modificacao:
+        resposta.last_modified = ultima_modificacao
+    # O navegador pode guardar a resposta, mas deve revalidá-la a cada uso
+    resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta
+
+
+def resumos_escalas(mes=None, ano=None):
+    """Resumos de uma listagem de escalas: as escalas do período, suas pessoas escaladas e os nomes"""
+    from src.models.escala import Escala
+    from src.models.escala_pessoa import EscalaPessoa
+    from src.models.pessoa import Pessoa
+    
+    criterios = []
+    criterio = Escala.criterio_periodo(mes, ano)
+    if criterio is not None:
+        criterios = [criterio]
+    
+    criterios_atribuicoes = []
+    if criterios:
+        criterios_atribuicoes = [EscalaPessoa.escala_id.in_(db.select(Escala.id).where(*criterios))]
+    
+    return (
+        resumo(Escala.id, Escala.updated_at, *criterios),
+        resumo(EscalaPessoa.id, EscalaPessoa.updated_at, *criterios_atribuicoes),
+        # Um nome de pessoa alterado muda a exibição das escalas
+        resumo(Pessoa.id, Pessoa.updated_at)
+    )
+
+
+def resumos_pessoas_equipes():
+    """Resumos de pessoas, equipes e vínculos, que aparecem juntos nas duas listagens"""
+    from src.models.pessoa import Pessoa, Equipe, PessoaEquipe
+    
+    return (
+        resumo(Pessoa.id, Pessoa.updated_at),
+        resumo(Equipe.id, Equipe.updated_at),
+        resumo(PessoaEquipe.id, PessoaEquipe.created_at)
+    )
@@ -0,0 +1,196 @@
+"""Revisões versionadas do esquema do banco
+
+Cada arquivo em src/migracoes/ (NNNN_descricao.py) define REVISAO, DESCRICAO
+e uma função aplicar(conexao). As revisões são aplicadas em ordem e
+registradas na tabela schema_revisoes. Por padrão cada revisão roda em sua
+própria transação; revisões com TRANSACIONAL = False recebem uma conexão em
+autocommit, necessária para CREATE INDEX CONCURRENTLY no PostgreSQL.
+
+Uso pela linha de comando:
+
+    flask --app src.main esquema atualizar     # aplica as revisões pendentes
+    flask --app src.main esquema status        # lista aplicadas e pendentes
+    flask --app src.main esquema nova "descrição da mudança"
+"""
+import importlib.util
+import os
+import re
+import unicodedata
+from datetime import datetime
+import click
+import sqlalchemy as sa
+from flask.cli import AppGroup
+
+PASTA_MIGRACOES = os.path.join(os.path.dirname(__file__), 'migracoes')
+
+_metadata = sa.MetaData()
+schema_revisoes = sa.Table(
+    'schema_revisoes', _metadata,
+    sa.Column('revisao', sa.String(32), primary_key=True),
+    sa.Column('descricao', sa.String(200), nullable=False),
+    sa.Column('aplicada_em', sa.DateTime, nullable=False)
+)
+
+MODELO_REVISAO = '''"""{descricao}"""
+import sqlalchemy as sa
+from src.esquema import criar_indice, processar_em_lotes
+
+REVISAO = '{revisao}'
+DESCRICAO = '{descricao}'
+
+# Use False para rodar em autocommit (CREATE INDEX CONCURRENTLY no PostgreSQL)
+TRANSACIONAL = True
+
+
+def aplicar(conexao):
+    pass
+'''
+
+
+def revisoes_disponiveis():
+    """Carrega os módulos de revisão em ordem de número"""
+    revisoes = []
+    for arquivo in sorted(os.listdir(PASTA_MIGRACOES)):
+        if not arquivo.endswith('.py') or not arquivo[:4].isdigit():
+            continue
+        caminho = os.path.join(PASTA_MIGRACOES, arquivo)
+        spec = importlib.util.spec_from_file_location(f'src.migracoes.r{arquivo[:-3]}', caminho)
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        revisoes.append(modulo)
+    return revisoes
+
+
+def revisoes_aplicadas(engine):
+    """Retorna {revisao: aplicada_em} das revisões registradas no banco"""
+    _metadata.create_all(engine)
+    with engine.connect() as conexao:
+        return {
+            linha.revisao: linha.aplicada_em
+            for linha in conexao.execute(sa.select(schema_revisoes.c.revisao, schema_revisoes.c.aplicada_em))
+        }
+
+
+def atualizar(engine, ate=None, informar=print):
+    """Aplica as revisões pendentes (até a revisão `ate`, se informada) e retorna quantas foram aplicadas"""
+    aplicadas = revisoes_aplicadas(engine)
+    total = 0
+    for revisao in revisoes_disponiveis():
+        if ate is not None and revisao.REVISAO > ate:
+            break
+        if revisao.REVISAO in aplicadas:
+            continue
+        
+        informar(f'Aplicando revisão {revisao.REVISAO}: {revisao.DESCRICAO}')
+        registro = schema_revisoes.insert().values(
+            revisao=revisao.REVISAO,
+            descricao=revisao.DESCRICAO,
+            aplicada_em=datetime.utcnow()
+        )
+        if getattr(revisao, 'TRANSACIONAL', True):
+            with engine.begin() as conexao:
+                revisao.aplicar(conexao)
+                conexao.execute(registro)
+        else:
+            # Sem transação: cada comando é confirmado ao ser executado, então a
+            # revisão precisa poder ser repetida caso falhe no meio
+            with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexao:
+                revisao.aplicar(conexao)
+            with engine.begin() as conexao:
+                conexao.execute(registro)
+        total += 1
+    return total
+
+
+def criar_indice(conexao, nome, tabela, colunas, unico=False, metodo=None):
+    """Cria um índice se ainda não existir
+    
+    `metodo` escolhe o tipo de índice do PostgreSQL (USING gin, por exemplo).
+    No PostgreSQL, com a conexão em autocommit (revisão não transacional), usa
+    CREATE INDEX CONCURRENTLY para não bloquear escritas na tabela. Um índice
+    deixado inválido por uma criação concorrente interrompida é recriado.
+    """
+    tipo = 'UNIQUE INDEX' if unico else 'INDEX'
+    alvo = f'{tabela} USING {metodo}' if metodo else tabela
+    online = (
+        conexao.dialect.name == 'postgresql'
+        and conexao.get_execution_options().get('isolation_level') == 'AUTOCOMMIT'
+    )
+    if not online:
+        conexao.execute(sa.text(f'CREATE {tipo} IF NOT EXISTS {nome} ON {alvo} ({colunas})'))
+        return
+    
+    invalido = conexao.execute(sa.text(
+        'SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :nome'
+    ), {'nome': nome}).scalar()
+    if invalido:
+        conexao.execute(sa.text(f'DROP INDEX CONCURRENTLY IF EXISTS {nome}'))
+    conexao.execute(sa.text(f'CREATE {tipo} CONCURRENTLY IF NOT EXISTS {nome} ON {alvo} ({colunas})'))
+
+
+def processar_em_lotes(engine, tabela, processar, filtro=None, tamanho_lote=1000, informar=None):
+    """Percorre as linhas de uma tabela em lotes de ids, uma transação por lote
+    
+    `processar(conexao, ids)` recebe a conexão da transação do lote e a lista
+    de ids em ordem crescente. A paginação é por chave (id > último id), então
+    cada lote custa o mesmo independentemente do tamanho da tabela e um
+    processamento interrompido mantém os lotes já confirmados. Retorna o total
+    de linhas percorridas.
+    """
+    tabela = getattr(tabela, '__table__', tabela)
+    ultimo_id = None
+    total = 0
+    while True:
+        with engine.begin() as conexao:
+            consulta = sa.select(tabela.c.id).order_by(tabela.c.id).limit(tamanho_lote)
+            if ultimo_id is not None:
+                consulta = consulta.where(tabela.c.id > ultimo_id)
+            if filtro is not None:
+                consulta = consulta.where(filtro)
+            ids = conexao.execute(consulta).scalars().all()
+            if not ids:
+                break
+            processar(conexao, ids)
+        
+        ultimo_id = ids[-1]
+        total += len(ids)
+        if informar:
+            informar(f'{tabela.name}: {total} linhas processadas (até id {ultimo_id})')
+    return total
+
+
+esquema_cli = AppGroup('esquema', help='Revisões do esquema do banco')
+
+
+@esquema_cli.command('atualizar')
+@click.option('--ate', default=None, help='Aplica somente até esta revisão (ex.: 0001)')
+def atualizar_command(ate):
+    """Aplica as revisões pendentes"""
+    from src.models.user import db
+    total = atualizar(db.engine, ate=ate)
+    print(f'{total} revisões aplicadas')
+
+
+@esquema_cli.command('status')
+def status_command():
+    """Lista as revisões aplicadas e pendentes"""
+    from src.models.user import db
+    aplicadas = revisoes_aplicadas(db.engine)
+    for revisao in revisoes_disponiveis():
+        aplicada_em = aplicadas.get(revisao.REVISAO)
+        situacao = f'aplicada em {aplicada_em:%Y-%m-%d %H:%M}' if aplicada_em else 'pendente'
+        print(f'{revisao.REVISAO}  {situacao:<28} {revisao.DESCRICAO}')
+
+
+@esquema_cli.command('nova')
+@click.argument('descricao')
+def nova_command(descricao):
+    """Cria o arquivo de uma nova revisão com o próximo número"""
+    numeros = [int(arquivo[:4]) for arquivo in os.listdir(PASTA_MIGRACOES) if arquivo[:4].isdigit()]
+    revisao = f'{max(numeros, default=-1) + 1:04d}'
+    sem_acentos = unicodedata.normalize('NFKD', descricao).encode('ascii', 'ignore').decode()
+    sufixo = re.sub(r'[^a-z0-9]+', '_', sem_acentos.lower()).strip('_')[:40]
+    caminho = os.path.join(PASTA_MIGRACOES, f'{revisao}_{sufixo}.py')
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(MODELO_REVISAO.format(revisao=revisao, descricao=descricao.replace("'", "")))
+    print(f'Revisão criada: {caminho}')
@@ -0,0 +1,179 @@
+"""Pipeline dos arquivos estáticos do frontend
+
+A partir de src/static, gera em PASTA_GERADA (src/static_build por padrão):
+
+- cópias com o hash do conteúdo no nome (styles.1a2b3c4d5e.css) dos arquivos
+  referenciados pelas páginas, servidas com Cache-Control immutable;
+- as páginas HTML com as referências reescritas para esses nomes;
+- variantes .gz (e .br, se o pacote brotli estiver instalado) dos arquivos
+  de texto, escolhidas conforme o Accept-Encoding da requisição.
+
+A geração roda no build (flask --app src.main estaticos) ou, se os arquivos
+de src/static mudaram desde a última geração, ao criar a aplicação.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+import threading
+from flask import request, send_from_directory
+
+PASTA_ORIGEM = os.path.join(os.path.dirname(__file__), 'static')
+PASTA_GERADA = os.environ.get('ESTATICOS_DIR', os.path.join(os.path.dirname(__file__), 'static_build'))
+
+# Arquivos servidos também com o hash no nome (as páginas passam a referenciá-los assim)
+VERSIONADOS = ('styles.css', 'script.js', 'logo.png')
+
+# Páginas cujas referências aos arquivos versionados são reescritas
+PAGINAS = ('index.html', 'entrada.html')
+
+# Extensões que valem a pena comprimir (imagens como PNG já são comprimidas)
+COMPRIMIVEIS = ('.html', '.css', '.js', '.json', '.svg', '.ico', '.txt')
+
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+
+REFERENCIA = re.compile(r'(?P<atributo>\b(?:src|href))="(?P<nome>[^"/:?#]+)"')
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_manifesto = None
+
+
+def _assinatura_origem(origem):
+    """Nome, tamanho e data de modificação de cada arquivo de origem"""
+    assinatura = []
+    for nome in sorted(os.listdir(origem)):
+        caminho = os.path.join(origem, nome)
+        if os.path.isfile(caminho):
+            info = os.stat(caminho)
+            assinatura.append([nome, info.st_size, info.st_mtime_ns])
+    return assinatura
+
+
+def _nome_versionado(nome, conteudo):
+    base, extensao = os.path.splitext(nome)
+    return f'{base}.{hashlib.sha256(conteudo).hexdigest()[:10]}{extensao}'
+
+
+def _gravar(destino, nome, conteudo, brotli):
+    """Grava o arquivo e, se for texto, suas variantes comprimidas"""
+    with open(os.path.join(destino, nome), 'wb') as arquivo:
+        arquivo.write(conteudo)
+    if not nome.endswith(COMPRIMIVEIS):
+        return
+    with open(os.path.join(destino, nome + '.gz'), 'wb') as arquivo:
+        arquivo.write(gzip.compress(conteudo, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(os.path.join(destino, nome + '.br'), 'wb') as arquivo:
+            arquivo.write(brotli.compress(conteudo, quality=11))
+
+
+def gerar_estaticos(origem=PASTA_ORIGEM, destino=PASTA_GERADA):
+    """Gera versões, páginas reescritas e variantes comprimidas; retorna o manifesto"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    
+    conteudos = {}
+    for nome, _, _ in _assinatura_origem(origem):
+        with open(os.path.join(origem, nome), 'rb') as arquivo:
+            conteudos[nome] = arquivo.read()
+    
+    versoes = {
+        nome: _nome_versionado(nome, conteudos[nome])
+        for nome in VERSIONADOS if nome in conteudos
+    }
+    
+    def reescrever(correspondencia):
+        nome = correspondencia.group('nome')
+        if nome not in versoes:
+            return correspondencia.group(0)
+        return f'{correspondencia.group("atributo")}="/{versoes[nome]}"'
+    
+    # Gera em uma pasta temporária ao lado do destino e troca no final
+    pasta_pai = os.path.dirname(os.path.abspath(destino))
+    os.makedirs(pasta_pai, exist_ok=True)
+    temporaria = tempfile.mkdtemp(prefix='.estaticos-', dir=pasta_pai)
+    try:
+        for nome, conteudo in conteudos.items():
+            if nome in PAGINAS:
+                conteudo = REFERENCIA.sub(reescrever, conteudo.decode('utf-8')).encode('utf-8')
+            _gravar(temporaria, nome, conteudo, brotli)
+            if nome in versoes:
+                _gravar(temporaria, versoes[nome], conteudo, brotli)
+        
+        manifesto = {
+            'origem': _assinatura_origem(origem),
+            'versoes': versoes,
+            'brotli': brotli is not None
+        }
+        with open(os.path.join(temporaria, 'manifesto.json'), 'w', encoding='utf-8') as arquivo:
+            json.dump(manifesto, arquivo, indent=2)
+        
+        shutil.rmtree(destino, ignore_errors=True)
+        os.rename(temporaria, destino)
+    except Exception:
+        shutil.rmtree(temporaria, ignore_errors=True)
+        raise
+    return manifesto
+
+
+def preparar(origem=PASTA_ORIGEM, destino=PASTA_GERADA):
+    """Carrega o manifesto gerado, gerando de novo se src/static mudou
+    
+    Se não for possível gerar (disco somente leitura, por exemplo), os arquivos
+    continuam sendo servidos direto de src/static, sem versão nem compressão.
+    """
+    global _manifesto
+    with _lock:
+        try:
+            with open(os.path.join(destino, 'manifesto.json'), encoding='utf-8') as arquivo:
+                manifesto = json.load(arquivo)
+        except (OSError, ValueError):
+            manifesto = None
+        
+        if manifesto is None or manifesto['origem'] != _assinatura_origem(origem):
+            try:
+                manifesto = gerar_estaticos(origem, destino)
+            except OSError as e:
+                logger.warning('Não foi possível gerar os arquivos estáticos: %s', e)
+                manifesto = None
+        
+        _manifesto = manifesto
+        return manifesto
+
+
+def versoes():
+    """Mapa nome original -> nome versionado dos arquivos estáticos"""
+    return dict(_manifesto['versoes']) if _manifesto else {}
+
+
+def servir(nome):
+    """Serve um arquivo estático, na variante comprimida aceita pelo cliente
+    
+    Nomes versionados recebem cache imutável de um ano; os demais (páginas,
+    favicon, nomes originais) são revalidados a cada uso.
+    """
+    if _manifesto is None or not os.path.isfile(os.path.join(PASTA_GERADA, nome)):
+        return send_from_directory(PASTA_ORIGEM, nome)
+    
+    variante, codificacao = nome, None
+    for extensao, candidata in (('.br', 'br'), ('.gz', 'gzip')):
+        if request.accept_encodings[candidata] and os.path.isfile(os.path.join(PASTA_GERADA, nome + extensao)):
+            variante, codificacao = nome + extensao, candidata
+            break
+    
+    resposta = send_from_directory(PASTA_GERADA, variante, mimetype=mimetypes.guess_type(nome)[0])
+    if codificacao:
+        resposta.headers['Content-Encoding'] = codificacao
+    resposta.vary.add('Accept-Encoding')
+    imutavel = nome in _manifesto['versoes'].values()
+    resposta.headers['Cache-Control'] = CACHE_IMUTAVEL if imutavel else 'no-cache'
+    return resposta
@@ -3,75 +3,119 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, render_template, send_from_directory
+from flask import Flask, render_template
 from flask_cors import CORS
 from src.models.user import db
-from src.models.pessoa import Pessoa, Equipe, PessoaEquipe
-from src.models.escala_pessoa import EscalaPessoa
-from src.routes.user import user_bp
-from src.routes.escala import escala_bp
-from src.routes.pessoa import pessoa_bp
-from src.routes.exportacao_simples import exportacao_bp
+from src.pool import opcoes_engine
+from src import estaticos
+from src.compressao import comprimir_json
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-
-# Configurações de ambiente
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
-
-# Configurar CORS para permitir requisições do frontend
-CORS(app, origins=['*'])
-
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(escala_bp, url_prefix='/api')
-app.register_blueprint(pessoa_bp, url_prefix='/api')
-app.register_blueprint(exportacao_bp, url_prefix='/api')
-
-# Configuração do banco de dados
-# Em produção, usa PostgreSQL via DATABASE_URL
-# Em desenvolvimento, usa SQLite local
-DATABASE_URL = os.environ.get('DATABASE_URL')
-if DATABASE_URL:
-    # Produção - PostgreSQL
-    # Fix para Heroku/Render que pode usar postgres:// em vez de postgresql://
-    if DATABASE_URL.startswith('postgres://'):
-        DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
-    app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
-else:
-    # Desenvolvimento - SQLite
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db.init_app(app)
-
-# Rota principal agora redireciona para a página de entrada
-@app.route('/')
-def index():
-    return send_from_directory(app.static_folder, 'entrada.html')
-
-# Rota para o sistema de escalas
-@app.route('/sistema')
-def sistema():
-    return send_from_directory(app.static_folder, 'index.html')
-
-# Rota para servir arquivos estáticos
-@app.route('/<path:filename>')
-def static_files(filename):
-    return send_from_directory(app.static_folder, filename)
-
-# Health check para plataformas de cloud
-@app.route('/health')
-def health_check():
-    return {'status': 'healthy', 'message': 'LouvaMais está funcionando!'}, 200
-
-with app.app_context():
-    db.create_all()
+def create_app():
+    """Cria e configura a aplicação Flask (usado pelo gunicorn e pelo servidor de desenvolvimento)"""
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    
+    # Configurações de ambiente
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
+    
+    # Configurar CORS para permitir requisições do frontend
+    CORS(app, origins=['*'])
+    
+    # Blueprints e modelos são importados só ao criar a aplicação
+    from src.models.pessoa import Pessoa, Equipe, PessoaEquipe
+    from src.models.escala_pessoa import EscalaPessoa
+    from src.models.recorrencia import RegraRecorrencia
+    from src.routes.user import user_bp
+    from src.routes.escala import escala_bp
+    from src.routes.pessoa import pessoa_bp, equipe_bp
+    from src.routes.exportacao_simples import exportacao_bp
+    from src.routes.rodizio import rodizio_bp
+    from src.routes.recorrencia import recorrencia_bp
+    from src.routes.bootstrap import bootstrap_bp
+    from src.routes.health import health_bp
+    
+    # Register blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(escala_bp, url_prefix='/api')
+    app.register_blueprint(pessoa_bp, url_prefix='/api')
+    app.register_blueprint(equipe_bp, url_prefix='/api')
+    app.register_blueprint(exportacao_bp, url_prefix='/api')
+    app.register_blueprint(rodizio_bp, url_prefix='/api')
+    app.register_blueprint(recorrencia_bp, url_prefix='/api')
+    app.register_blueprint(bootstrap_bp, url_prefix='/api')
+    # Health checks ficam na raiz (/health, /health/live, /health/ready, /health/pool)
+    app.register_blueprint(health_bp)
+    
+    # Configuração do banco de dados
+    # Em produção, usa PostgreSQL via DATABASE_URL
+    # Em desenvolvimento, usa SQLite local
+    DATABASE_URL = os.environ.get('DATABASE_URL')
+    if DATABASE_URL:
+        # Produção - PostgreSQL
+        # Fix para Heroku/Render que pode usar postgres:// em vez de postgresql://
+        if DATABASE_URL.startswith('postgres://'):
+            DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
+        app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
+    else:
+        # Desenvolvimento - SQLite
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+    
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Pool de conexões dimensionado pelas variáveis DB_POOL_* (ver src/pool.py)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opcoes_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+    
+    db.init_app(app)
+    
+    # Arquivos estáticos versionados e pré-comprimidos (ver src/estaticos.py);
+    # normalmente já gerados no build, aqui só se src/static mudou
+    estaticos.preparar()
+    
+    # Respostas JSON grandes saem comprimidas com gzip
+    app.after_request(comprimir_json)
+    
+    # Rota principal agora redireciona para a página de entrada
+    @app.route('/')
+    def index():
+        return estaticos.servir('entrada.html')
+    
+    # Rota para o sistema de escalas
+    @app.route('/sistema')
+    def sistema():
+        return estaticos.servir('index.html')
+    
+    # Rota para servir arquivos estáticos
+    @app.route('/<path:filename>')
+    def static_files(filename):
+        return estaticos.servir(filename)
+    
+    # Esquema: etapa explícita (flask --app src.main esquema atualizar), fora do boot
+    from src.esquema import esquema_cli
+    app.cli.add_command(esquema_cli)
+    
+    @app.cli.command('estaticos')
+    def estaticos_command():
+        """Gera os arquivos estáticos versionados e comprimidos (etapa de build)"""
+        manifesto = estaticos.gerar_estaticos()
+        for original, versionado in manifesto['versoes'].items():
+            print(f'{original} -> {versionado}')
+        print('Variantes: gzip' + (' e brotli' if manifesto['brotli'] else ' (instale brotli para gerar .br)'))
+    
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Aplica as revisões pendentes do esquema (atalho para esquema atualizar)"""
+        from src.esquema import atualizar
+        total = atualizar(db.engine)
+        print(f'Banco de dados inicializado ({total} revisões aplicadas)')
+    
+    return app
 
 if __name__ == '__main__':
+    app = create_app()
+    # Em desenvolvimento as revisões do esquema são aplicadas automaticamente
+    with app.app_context():
+        from src.esquema import atualizar
+        atualizar(db.engine)
     # Porta configurável para diferentes plataformas
     port = int(os.environ.get('PORT', 5000))
     # Em produção, não usar debug mode
     debug = os.environ.get('FLASK_ENV') != 'production'
     app.run(host='0.0.0.0', port=port, debug=debug)
-
@@ -0,0 +1,95 @@
+"""Esquema inicial: as tabelas como eram criadas pelo db.create_all()
+
+As definições ficam congeladas aqui (sem importar os modelos) para que a
+revisão produza sempre o mesmo esquema. Em bancos criados antes das revisões
+as tabelas já existem e são mantidas como estão.
+"""
+import sqlalchemy as sa
+
+REVISAO = '0000'
+DESCRICAO = 'Esquema inicial (escalas, pessoas, equipes e vínculos)'
+
+metadata = sa.MetaData()
+
+sa.Table(
+    'user', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('username', sa.String(80), unique=True, nullable=False),
+    sa.Column('email', sa.String(120), unique=True, nullable=False)
+)
+
+sa.Table(
+    'pessoas', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('nome', sa.String(100), nullable=False),
+    sa.Column('telefone', sa.String(20)),
+    sa.Column('email', sa.String(100)),
+    sa.Column('observacoes', sa.Text),
+    sa.Column('ativo', sa.Boolean),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('updated_at', sa.DateTime)
+)
+
+sa.Table(
+    'equipes', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('nome', sa.String(100), nullable=False, unique=True),
+    sa.Column('descricao', sa.Text),
+    sa.Column('cor', sa.String(7)),
+    sa.Column('ativo', sa.Boolean),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('updated_at', sa.DateTime)
+)
+
+sa.Table(
+    'pessoa_equipe', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('pessoa_id', sa.Integer, sa.ForeignKey('pessoas.id'), nullable=False),
+    sa.Column('equipe_id', sa.Integer, sa.ForeignKey('equipes.id'), nullable=False),
+    sa.Column('created_at', sa.DateTime),
+    sa.UniqueConstraint('pessoa_id', 'equipe_id', name='unique_pessoa_equipe')
+)
+
+sa.Table(
+    'escalas', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('data', sa.Date, nullable=False, unique=True),
+    sa.Column('dia_semana', sa.String(20), nullable=False),
+    sa.Column('pregacao', sa.String(100)),
+    sa.Column('equipe_musicos', sa.String(200)),
+    sa.Column('conducao_animacao', sa.String(100)),
+    sa.Column('acolhida', sa.String(100)),
+    sa.Column('responsavel_abastecimento', sa.String(100)),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('updated_at', sa.DateTime)
+)
+
+sa.Table(
+    'escala_pessoa', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('escala_id', sa.Integer, sa.ForeignKey('escalas.id'), nullable=False),
+    sa.Column('pessoa_id', sa.Integer, sa.ForeignKey('pessoas.id'), nullable=False),
+    sa.Column('funcao', sa.String(50), nullable=False),
+    sa.Column('confirmado', sa.Boolean),
+    sa.Column('observacoes', sa.Text),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('updated_at', sa.DateTime),
+    sa.UniqueConstraint('escala_id', 'pessoa_id', 'funcao', name='unique_escala_pessoa_funcao')
+)
+
+sa.Table(
+    'regras_recorrencia', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('dia_semana', sa.Integer, nullable=False),
+    sa.Column('horario', sa.Time, nullable=False),
+    sa.Column('data_inicio', sa.Date, nullable=False),
+    sa.Column('data_fim', sa.Date),
+    sa.Column('excecoes', sa.Text),
+    sa.Column('ativo', sa.Boolean),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('updated_at', sa.DateTime)
+)
+
+
+def aplicar(conexao):
+    metadata.create_all(conexao, checkfirst=True)
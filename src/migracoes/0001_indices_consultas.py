@@ -0,0 +1,22 @@
+"""Índices das consultas mais frequentes em escala_pessoa e pessoa_equipe"""
+from src.esquema import criar_indice
+
+REVISAO = '0001'
+DESCRICAO = 'Índices de escala_pessoa e pessoa_equipe'
+
+# Em autocommit os índices são criados com CONCURRENTLY no PostgreSQL
+TRANSACIONAL = False
+
+INDICES = (
+    # Pessoas de uma função em uma escala (adicionar/atualizar pessoas da função)
+    ('ix_escala_pessoa_escala_funcao', 'escala_pessoa', 'escala_id, funcao'),
+    # Histórico de escalas de uma pessoa
+    ('ix_escala_pessoa_pessoa_id', 'escala_pessoa', 'pessoa_id'),
+    # Membros de uma equipe (listar_pessoas?equipe_id=), já com os ids das pessoas
+    ('ix_pessoa_equipe_equipe_pessoa', 'pessoa_equipe', 'equipe_id, pessoa_id'),
+)
+
+
+def aplicar(conexao):
+    for nome, tabela, colunas in INDICES:
+        criar_indice(conexao, nome, tabela, colunas)
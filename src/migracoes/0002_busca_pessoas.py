@@ -0,0 +1,65 @@
+"""Coluna nome_busca (nome sem acentos e caixa) e, no SQLite, o índice FTS5 da busca de pessoas
+
+A normalização fica copiada aqui (sem importar os modelos) para que a revisão
+preencha a coluna sempre da mesma forma, mesmo que normalizar_nome mude.
+"""
+import unicodedata
+import sqlalchemy as sa
+from src.esquema import processar_em_lotes
+
+REVISAO = '0002'
+DESCRICAO = 'Coluna nome_busca e índice de texto da busca de pessoas'
+
+# O preenchimento confirma um lote por vez; os demais comandos podem ser repetidos
+TRANSACIONAL = False
+
+TAMANHO_LOTE = 500
+
+# Tabela FTS5 com conteúdo externo (lê pessoas.nome_busca), mantida por gatilhos
+COMANDOS_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS pessoas_busca USING fts5("
+    "nome_busca, content='pessoas', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS pessoas_busca_ai AFTER INSERT ON pessoas BEGIN "
+    "INSERT INTO pessoas_busca(rowid, nome_busca) VALUES (new.id, new.nome_busca); END",
+    "CREATE TRIGGER IF NOT EXISTS pessoas_busca_ad AFTER DELETE ON pessoas BEGIN "
+    "INSERT INTO pessoas_busca(pessoas_busca, rowid, nome_busca) VALUES ('delete', old.id, old.nome_busca); END",
+    "CREATE TRIGGER IF NOT EXISTS pessoas_busca_au AFTER UPDATE OF nome_busca ON pessoas BEGIN "
+    "INSERT INTO pessoas_busca(pessoas_busca, rowid, nome_busca) VALUES ('delete', old.id, old.nome_busca); "
+    "INSERT INTO pessoas_busca(rowid, nome_busca) VALUES (new.id, new.nome_busca); END",
+    "INSERT INTO pessoas_busca(pessoas_busca) VALUES ('rebuild')",
+)
+
+
+def _normalizar_nome(nome):
+    """Cópia de src.models.pessoa.normalizar_nome na data desta revisão"""
+    sem_acentos = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode()
+    return ' '.join(sem_acentos.casefold().split())
+
+
+def _preencher_nome_busca(engine):
+    pessoas = sa.table('pessoas', sa.column('id'), sa.column('nome'), sa.column('nome_busca'))
+    
+    def processar(conexao, ids):
+        linhas = conexao.execute(sa.select(pessoas.c.id, pessoas.c.nome).where(pessoas.c.id.in_(ids))).all()
+        conexao.execute(
+            pessoas.update().where(pessoas.c.id == sa.bindparam('b_id')),
+            [{'b_id': linha.id, 'nome_busca': _normalizar_nome(linha.nome or '')} for linha in linhas]
+        )
+    
+    # Só linhas ainda sem nome_busca: uma execução interrompida continua de onde parou
+    processar_em_lotes(engine, pessoas, processar, filtro=pessoas.c.nome_busca.is_(None), tamanho_lote=TAMANHO_LOTE)
+
+
+def aplicar(conexao):
+    colunas = {coluna['name'] for coluna in sa.inspect(conexao).get_columns('pessoas')}
+    if 'nome_busca' not in colunas:
+        conexao.execute(sa.text('ALTER TABLE pessoas ADD COLUMN nome_busca VARCHAR(100)'))
+    _preencher_nome_busca(conexao.engine)
+    
+    # No PostgreSQL a busca usa os índices da revisão 0003; no SQLite, FTS5 se
+    # estiver compilado (sem ele a busca faz LIKE sobre nome_busca)
+    if conexao.dialect.name == 'sqlite':
+        opcoes = {linha[0] for linha in conexao.execute(sa.text('PRAGMA compile_options'))}
+        if 'ENABLE_FTS5' in opcoes:
+            for comando in COMANDOS_FTS:
+                conexao.execute(sa.text(comando))
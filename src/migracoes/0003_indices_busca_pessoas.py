@@ -0,0 +1,28 @@
+"""Índices de pessoas.nome_busca: prefixo do nome e, com pg_trgm, trigramas no PostgreSQL"""
+import sqlalchemy as sa
+from src.esquema import criar_indice
+
+REVISAO = '0003'
+DESCRICAO = 'Índices da busca de pessoas (nome_busca)'
+
+# Em autocommit os índices são criados com CONCURRENTLY no PostgreSQL
+TRANSACIONAL = False
+
+
+def aplicar(conexao):
+    if conexao.dialect.name != 'postgresql':
+        criar_indice(conexao, 'ix_pessoas_nome_busca', 'pessoas', 'nome_busca')
+        return
+    
+    # text_pattern_ops: LIKE 'texto%' usa o índice em qualquer collation
+    criar_indice(conexao, 'ix_pessoas_nome_busca', 'pessoas', 'nome_busca text_pattern_ops')
+    
+    # Trigramas atendem LIKE '% texto%' (início das demais palavras do nome).
+    # Criar a extensão pode exigir permissão; sem ela a busca continua
+    # funcionando, só sem índice para esses casos
+    try:
+        conexao.execute(sa.text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+    except sa.exc.DBAPIError as e:
+        print(f'Extensão pg_trgm indisponível, índice de trigramas não criado: {e.orig}')
+        return
+    criar_indice(conexao, 'ix_pessoas_nome_busca_trgm', 'pessoas', 'nome_busca gin_trgm_ops', metodo='gin')
@@ -1,5 +1,48 @@
 from src.models.user import db
-from datetime import datetime
+from src.models.escala_pessoa import EscalaPessoa
+from src.models.pessoa import Pessoa, normalizar_nome
+from datetime import datetime, date, MINYEAR, MAXYEAR
+from sqlalchemy.orm import load_only
+import re
+
+# Funções possíveis em uma escala
+FUNCOES = ('pregacao', 'musicos', 'conducao_animacao', 'acolhida', 'abastecimento')
+
+# Coluna legada (texto livre) de cada função, anterior à tabela escala_pessoa
+COLUNAS_LEGADAS = {
+    'pregacao': 'pregacao',
+    'musicos': 'equipe_musicos',
+    'conducao_animacao': 'conducao_animacao',
+    'acolhida': 'acolhida',
+    'abastecimento': 'responsavel_abastecimento'
+}
+
+# Separadores usados nos textos legados: "Ana, Bruno e Carla", "Ana / Bruno"
+SEPARADORES_NOMES = re.compile(r'\s*(?:[,;/\n]|\s+e\s+)\s*')
+
+def validar_periodo(mes=None, ano=None):
+    """Retorna a mensagem de erro para mês/ano fora dos limites, ou None se forem válidos"""
+    if mes is not None and not 1 <= mes <= 12:
+        return 'Mês inválido, use um valor de 1 a 12'
+    if ano is not None and not MINYEAR <= ano < MAXYEAR:
+        return f'Ano inválido, use um valor de {MINYEAR} a {MAXYEAR - 1}'
+    return None
+
+def intervalo_periodo(mes=None, ano=None):
+    """Converte mês/ano no intervalo semiaberto [inicio, fim) de datas
+    
+    Retorna None quando não há ano; o mês sem ano é tratado por
+    Escala.criterio_periodo, com uma faixa por ano.
+    """
+    if not ano:
+        return None
+    if mes:
+        inicio = date(ano, mes, 1)
+        fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+    else:
+        inicio = date(ano, 1, 1)
+        fim = date(ano + 1, 1, 1)
+    return inicio, fim
 
 class Escala(db.Model):
     __tablename__ = 'escalas'
@@ -22,6 +65,36 @@ class Escala(db.Model):
     # Relacionamento com pessoas
     pessoas = db.relationship('EscalaPessoa', back_populates='escala', cascade='all, delete-orphan')
     
+    @classmethod
+    def criterio_periodo(cls, mes=None, ano=None):
+        """Condição do filtro de mês/ano sobre escalas.data, ou None sem filtro
+        
+        Com ano, é uma faixa de datas. Mês sem ano vira uma faixa por ano, da
+        primeira à última escala, para que cada uma ainda use o índice de data.
+        """
+        intervalo = intervalo_periodo(mes, ano)
+        if intervalo:
+            return db.and_(cls.data >= intervalo[0], cls.data < intervalo[1])
+        if not mes:
+            return None
+        
+        primeira, ultima = db.session.query(db.func.min(cls.data), db.func.max(cls.data)).one()
+        if primeira is None:
+            return db.false()
+        faixas = []
+        for ano_faixa in range(primeira.year, ultima.year + 1):
+            inicio, fim = intervalo_periodo(mes, ano_faixa)
+            faixas.append(db.and_(cls.data >= inicio, cls.data < fim))
+        return db.or_(*faixas)
+    
+    @classmethod
+    def filtrar_periodo(cls, query, mes=None, ano=None):
+        """Aplica o filtro de mês/ano como faixas de datas, aproveitando o índice de escalas.data"""
+        criterio = cls.criterio_periodo(mes, ano)
+        if criterio is not None:
+            query = query.filter(criterio)
+        return query
+    
     def get_pessoas_por_funcao(self, funcao):
         """Retorna lista de pessoas para uma função específica"""
         return [ep.pessoa for ep in self.pessoas if ep.funcao == funcao and ep.pessoa]
@@ -31,16 +104,82 @@ class Escala(db.Model):
         pessoas = self.get_pessoas_por_funcao(funcao)
         return [p.nome for p in pessoas]
     
-    def to_dict(self):
-        """Converte o objeto para dicionário"""
+    @staticmethod
+    def carregar_nomes_por_funcao(escala_ids):
+        """Carrega em uma única consulta os nomes das pessoas de cada escala, agrupados por função"""
+        nomes = {escala_id: {} for escala_id in escala_ids}
+        if not nomes:
+            return nomes
+        
+        linhas = db.session.query(
+            EscalaPessoa.escala_id,
+            EscalaPessoa.funcao,
+            Pessoa.nome
+        ).join(Pessoa, Pessoa.id == EscalaPessoa.pessoa_id).filter(
+            EscalaPessoa.escala_id.in_(list(nomes))
+        ).order_by(EscalaPessoa.id).all()
+        
+        for escala_id, funcao, nome in linhas:
+            nomes[escala_id].setdefault(funcao, []).append(nome)
+        
+        return nomes
+    
+    @classmethod
+    def opcoes_compacto(cls):
+        """Opção de consulta com só as colunas usadas por compacto=True (sem created_at)"""
+        return load_only(
+            cls.id, cls.data, cls.dia_semana, cls.updated_at,
+            *(getattr(cls, coluna) for coluna in COLUNAS_LEGADAS.values())
+        )
+    
+    @classmethod
+    def to_dict_lista(cls, escalas, compacto=False):
+        """Serializa várias escalas com um número fixo de consultas (sem N+1)"""
+        nomes = cls.carregar_nomes_por_funcao([escala.id for escala in escalas])
+        return [escala.to_dict(nomes[escala.id], compacto=compacto) for escala in escalas]
+    
+    def to_dict(self, nomes_por_funcao=None, compacto=False):
+        """Converte o objeto para dicionário
+        
+        nomes_por_funcao: nomes já carregados por função (ver to_dict_lista);
+        se omitido, usa o relacionamento pessoas.
+        compacto: omite os campos legados, as listas *_pessoas e created_at;
+        os *_display são os mesmos do formato completo (com o texto legado
+        quando a função não tem pessoas escaladas).
+        """
+        if nomes_por_funcao is None:
+            nomes_por_funcao = {}
+            for ep in self.pessoas:
+                if ep.pessoa:
+                    nomes_por_funcao.setdefault(ep.funcao, []).append(ep.pessoa.nome)
+        
         # Funções para terças-feiras
-        pregacao_pessoas = self.get_nomes_por_funcao('pregacao')
-        musicos_pessoas = self.get_nomes_por_funcao('musicos')
-        conducao_pessoas = self.get_nomes_por_funcao('conducao_animacao')
-        acolhida_pessoas = self.get_nomes_por_funcao('acolhida')
+        pregacao_pessoas = nomes_por_funcao.get('pregacao', [])
+        musicos_pessoas = nomes_por_funcao.get('musicos', [])
+        conducao_pessoas = nomes_por_funcao.get('conducao_animacao', [])
+        acolhida_pessoas = nomes_por_funcao.get('acolhida', [])
         
         # Função para quartas-feiras
-        abastecimento_pessoas = self.get_nomes_por_funcao('abastecimento')
+        abastecimento_pessoas = nomes_por_funcao.get('abastecimento', [])
+        
+        # Strings formatadas para exibição
+        displays = {
+            'pregacao_display': ', '.join(pregacao_pessoas) if pregacao_pessoas else (self.pregacao or ''),
+            'musicos_display': ', '.join(musicos_pessoas) if musicos_pessoas else (self.equipe_musicos or ''),
+            'conducao_animacao_display': ', '.join(conducao_pessoas) if conducao_pessoas else (self.conducao_animacao or ''),
+            'acolhida_display': ', '.join(acolhida_pessoas) if acolhida_pessoas else (self.acolhida or ''),
+            'abastecimento_display': ', '.join(abastecimento_pessoas) if abastecimento_pessoas else (self.responsavel_abastecimento or ''),
+        }
+        
+        if compacto:
+            return {
+                'id': self.id,
+                'data': self.data.strftime('%Y-%m-%d'),
+                'data_formatada': self.data.strftime('%d/%m/%Y'),
+                'dia_semana': self.dia_semana,
+                **displays,
+                'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            }
         
         return {
             'id': self.id,
@@ -62,12 +201,7 @@ class Escala(db.Model):
             'acolhida_pessoas': acolhida_pessoas,
             'abastecimento_pessoas': abastecimento_pessoas,
             
-            # Strings formatadas para exibição
-            'pregacao_display': ', '.join(pregacao_pessoas) if pregacao_pessoas else (self.pregacao or ''),
-            'musicos_display': ', '.join(musicos_pessoas) if musicos_pessoas else (self.equipe_musicos or ''),
-            'conducao_animacao_display': ', '.join(conducao_pessoas) if conducao_pessoas else (self.conducao_animacao or ''),
-            'acolhida_display': ', '.join(acolhida_pessoas) if acolhida_pessoas else (self.acolhida or ''),
-            'abastecimento_display': ', '.join(abastecimento_pessoas) if abastecimento_pessoas else (self.responsavel_abastecimento or ''),
+            **displays,
             
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
@@ -76,3 +210,100 @@ class Escala(db.Model):
     def __repr__(self):
         return f'<Escala {self.data} - {self.dia_semana}>'
 
+
+
+def separar_nomes_legados(texto):
+    """Divide o texto livre de uma coluna legada na lista de nomes"""
+    return [nome for nome in SEPARADORES_NOMES.split(texto.strip()) if nome]
+
+
+def migrar_campos_legados(tamanho_lote=200, limpar=True, simular=False, informar=None):
+    """Converte os nomes das colunas legadas em linhas de escala_pessoa
+    
+    Cada nome é comparado com Pessoa.nome (sem acentos e sem diferença de
+    caixa; havendo homônimos, vale a pessoa ativa de menor id). As escalas são
+    processadas em lotes de `tamanho_lote`, um lote por transação, então o
+    processo pode ser interrompido e repetido. Uma coluna só é convertida
+    quando todos os seus nomes foram encontrados (com `limpar`, é também
+    esvaziada); colunas com algum nome não encontrado ficam intactas, sem
+    pessoas escaladas, para correção manual. Com `simular`, nada é gravado. Retorna um relatório com os totais e os nomes não encontrados.
+    """
+    from src.esquema import processar_em_lotes
+    
+    tabela = Escala.__table__
+    tabela_pessoas = EscalaPessoa.__table__
+    colunas = {funcao: tabela.c[nome] for funcao, nome in COLUNAS_LEGADAS.items()}
+    
+    pessoas_por_nome = {}
+    for pessoa_id, nome in db.session.query(Pessoa.id, Pessoa.nome).order_by(Pessoa.ativo.desc(), Pessoa.id):
+        pessoas_por_nome.setdefault(normalizar_nome(nome), pessoa_id)
+    # Os lotes usam conexões próprias; libera a da sessão
+    db.session.rollback()
+    
+    relatorio = {
+        'escalas_processadas': 0,
+        'escalas_alteradas': 0,
+        'atribuicoes_criadas': 0,
+        'colunas_limpas': 0,
+        'nao_encontrados': {}
+    }
+    
+    def processar(conexao, ids):
+        existentes = {
+            tuple(linha) for linha in conexao.execute(
+                db.select(tabela_pessoas.c.escala_id, tabela_pessoas.c.pessoa_id, tabela_pessoas.c.funcao)
+                .where(tabela_pessoas.c.escala_id.in_(ids))
+            )
+        }
+        
+        novas = []
+        limpezas = {}
+        for linha in conexao.execute(db.select(tabela.c.id, *colunas.values()).where(tabela.c.id.in_(ids))):
+            for funcao, coluna in colunas.items():
+                texto = linha._mapping[coluna]
+                if not texto or not texto.strip():
+                    continue
+                
+                pessoa_ids = []
+                faltando = []
+                for nome in separar_nomes_legados(texto):
+                    pessoa_id = pessoas_por_nome.get(normalizar_nome(nome))
+                    if pessoa_id is None:
+                        faltando.append(nome)
+                    else:
+                        pessoa_ids.append(pessoa_id)
+                
+                # Coluna só em parte encontrada fica inteira no texto legado: com
+                # pessoas escaladas a exibição ignoraria os nomes que faltam
+                if faltando:
+                    for nome in faltando:
+                        relatorio['nao_encontrados'][nome] = relatorio['nao_encontrados'].get(nome, 0) + 1
+                    continue
+                
+                for pessoa_id in pessoa_ids:
+                    if (linha.id, pessoa_id, funcao) not in existentes:
+                        existentes.add((linha.id, pessoa_id, funcao))
+                        novas.append({'escala_id': linha.id, 'pessoa_id': pessoa_id, 'funcao': funcao})
+                if limpar:
+                    limpezas.setdefault(linha.id, {})[coluna.name] = None
+        
+        alteradas = {nova['escala_id'] for nova in novas} | set(limpezas)
+        relatorio['escalas_processadas'] += len(ids)
+        relatorio['escalas_alteradas'] += len(alteradas)
+        relatorio['atribuicoes_criadas'] += len(novas)
+        relatorio['colunas_limpas'] += sum(len(valores) for valores in limpezas.values())
+        if simular:
+            return
+        
+        if novas:
+            conexao.execute(db.insert(tabela_pessoas), novas)
+        momento = datetime.utcnow()
+        for escala_id in alteradas:
+            conexao.execute(
+                db.update(tabela).where(tabela.c.id == escala_id).values(updated_at=momento, **limpezas.get(escala_id, {}))
+            )
+    
+    # Só percorre escalas com alguma coluna legada preenchida
+    filtro = db.or_(*(coluna != '' for coluna in colunas.values()))
+    processar_em_lotes(db.engine, tabela, processar, filtro=filtro, tamanho_lote=tamanho_lote, informar=informar)
+    return relatorio
@@ -19,8 +19,14 @@ class EscalaPessoa(db.Model):
     escala = db.relationship('Escala', back_populates='pessoas')
     pessoa = db.relationship('Pessoa')
     
-    # Constraint para evitar duplicatas da mesma pessoa na mesma função da mesma escala
-    __table_args__ = (db.UniqueConstraint('escala_id', 'pessoa_id', 'funcao', name='unique_escala_pessoa_funcao'),)
+    # Constraint para evitar duplicatas da mesma pessoa na mesma função da mesma escala.
+    # Índices das consultas por função de uma escala e pelo histórico de uma pessoa
+    # (criados em bancos existentes pela revisão 0001 de src/migracoes)
+    __table_args__ = (
+        db.UniqueConstraint('escala_id', 'pessoa_id', 'funcao', name='unique_escala_pessoa_funcao'),
+        db.Index('ix_escala_pessoa_escala_funcao', 'escala_id', 'funcao'),
+        db.Index('ix_escala_pessoa_pessoa_id', 'pessoa_id'),
+    )
     
     def to_dict(self):
         """Converte o objeto para dicionário"""
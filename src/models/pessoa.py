@@ -1,11 +1,22 @@
 from src.models.user import db
 from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import validates
+import unicodedata
+
+
+def normalizar_nome(nome):
+    """Forma de comparação de nomes: sem acentos, sem diferença de caixa e de espaços"""
+    sem_acentos = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode()
+    return ' '.join(sem_acentos.casefold().split())
+
 
 class Pessoa(db.Model):
     __tablename__ = 'pessoas'
     
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(100), nullable=False)
+    nome_busca = db.Column(db.String(100), nullable=True)  # Nome sem acentos e caixa, usado pela busca (src/busca.py)
     telefone = db.Column(db.String(20), nullable=True)
     email = db.Column(db.String(100), nullable=True)
     observacoes = db.Column(db.Text, nullable=True)
@@ -18,8 +29,56 @@ class Pessoa(db.Model):
     # Relacionamento com equipes
     equipes = db.relationship('PessoaEquipe', back_populates='pessoa', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Converte o objeto para dicionário"""
+    __table_args__ = (
+        # Prefixo do nome normalizado (LIKE 'texto%'); no PostgreSQL com
+        # text_pattern_ops para valer em qualquer collation
+        db.Index('ix_pessoas_nome_busca', 'nome_busca', postgresql_ops={'nome_busca': 'text_pattern_ops'}),
+    )
+    
+    @classmethod
+    def com_nome(cls, nome):
+        """Critério de nome exatamente igual, atendido pelo índice de nome_busca"""
+        return db.and_(cls.nome_busca == normalizar_nome(nome), cls.nome == nome)
+    
+    @validates('nome')
+    def _atualizar_nome_busca(self, chave, nome):
+        self.nome_busca = normalizar_nome(nome) if nome else None
+        return nome
+    
+    @staticmethod
+    def carregar_nomes_equipes(pessoa_ids):
+        """Carrega em uma única consulta os nomes das equipes de cada pessoa"""
+        nomes = {pessoa_id: [] for pessoa_id in pessoa_ids}
+        if not nomes:
+            return nomes
+        
+        linhas = db.session.query(
+            PessoaEquipe.pessoa_id,
+            Equipe.nome
+        ).join(Equipe, Equipe.id == PessoaEquipe.equipe_id).filter(
+            PessoaEquipe.pessoa_id.in_(list(nomes))
+        ).order_by(PessoaEquipe.id).all()
+        
+        for pessoa_id, nome in linhas:
+            nomes[pessoa_id].append(nome)
+        
+        return nomes
+    
+    @classmethod
+    def to_dict_lista(cls, pessoas):
+        """Serializa várias pessoas com um número fixo de consultas (sem N+1)"""
+        nomes = cls.carregar_nomes_equipes([pessoa.id for pessoa in pessoas])
+        return [pessoa.to_dict(nomes[pessoa.id]) for pessoa in pessoas]
+    
+    def to_dict(self, nomes_equipes=None):
+        """Converte o objeto para dicionário
+        
+        nomes_equipes: nomes já carregados (ver to_dict_lista); se omitido,
+        usa o relacionamento equipes.
+        """
+        if nomes_equipes is None:
+            nomes_equipes = [pe.equipe.nome for pe in self.equipes if pe.equipe]
+        
         return {
             'id': self.id,
             'nome': self.nome,
@@ -27,7 +86,7 @@ class Pessoa(db.Model):
             'email': self.email,
             'observacoes': self.observacoes,
             'ativo': self.ativo,
-            'equipes': [pe.equipe.nome for pe in self.equipes if pe.equipe],
+            'equipes': nomes_equipes,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -52,15 +111,46 @@ class Equipe(db.Model):
     # Relacionamento com pessoas
     pessoas = db.relationship('PessoaEquipe', back_populates='equipe', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Converte o objeto para dicionário"""
+    @staticmethod
+    def contar_pessoas_ativas(equipe_ids):
+        """Conta em uma única consulta (COUNT agrupado) as pessoas ativas de cada equipe"""
+        totais = {equipe_id: 0 for equipe_id in equipe_ids}
+        if not totais:
+            return totais
+        
+        linhas = db.session.query(
+            PessoaEquipe.equipe_id,
+            func.count(PessoaEquipe.id)
+        ).join(Pessoa, Pessoa.id == PessoaEquipe.pessoa_id).filter(
+            PessoaEquipe.equipe_id.in_(list(totais)),
+            Pessoa.ativo.is_(True)
+        ).group_by(PessoaEquipe.equipe_id).all()
+        
+        totais.update(linhas)
+        return totais
+    
+    @classmethod
+    def to_dict_lista(cls, equipes):
+        """Serializa várias equipes com um número fixo de consultas (sem N+1)"""
+        totais = cls.contar_pessoas_ativas([equipe.id for equipe in equipes])
+        return [equipe.to_dict(totais[equipe.id]) for equipe in equipes]
+    
+    def to_dict(self, total_pessoas=None):
+        """Converte o objeto para dicionário
+        
+        total_pessoas: quantidade de pessoas ativas já contada (ver
+        to_dict_lista); se omitida, é contada com uma consulta.
+        """
+        if total_pessoas is None:
+            total_pessoas = self.contar_pessoas_ativas([self.id])[self.id]
+        
         return {
             'id': self.id,
             'nome': self.nome,
             'descricao': self.descricao,
             'cor': self.cor,
             'ativo': self.ativo,
-            'total_pessoas': len([pe for pe in self.pessoas if pe.pessoa and pe.pessoa.ativo]),
+            'total_pessoas': total_pessoas,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -84,7 +174,12 @@ class PessoaEquipe(db.Model):
     equipe = db.relationship('Equipe', back_populates='pessoas')
     
     # Constraint para evitar duplicatas
-    __table_args__ = (db.UniqueConstraint('pessoa_id', 'equipe_id', name='unique_pessoa_equipe'),)
+    __table_args__ = (
+        db.UniqueConstraint('pessoa_id', 'equipe_id', name='unique_pessoa_equipe'),
+        # Membros de uma equipe: a busca por equipe_id já traz os pessoa_id
+        # (a constraint única começa por pessoa_id)
+        db.Index('ix_pessoa_equipe_equipe_pessoa', 'equipe_id', 'pessoa_id'),
+    )
     
     def to_dict(self):
         """Converte o objeto para dicionário"""
@@ -0,0 +1,154 @@
+from src.models.user import db
+from src.models.escala import Escala
+from datetime import datetime, date, time, timedelta
+import json
+
+# Nome do dia da semana gravado em Escala.dia_semana (índice = date.weekday())
+DIAS_SEMANA = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira',
+               'Sexta-feira', 'Sábado', 'Domingo']
+
+# Dias com funções definidas: terça (pregação, músicos, condução, acolhida) e
+# quarta (abastecimento). O rodízio, as exportações e a tela tratam toda
+# escala que não é de terça como de quarta, então regras só nesses dias
+DIAS_SEMANA_SUPORTADOS = (1, 2)
+
+# Linhas por INSERT em estender_escalas: 4 parâmetros por linha ficam abaixo do
+# limite de 999 parâmetros das versões antigas do SQLite
+TAMANHO_LOTE_INSERCAO = 200
+
+class RegraRecorrencia(db.Model):
+    __tablename__ = 'regras_recorrencia'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    dia_semana = db.Column(db.Integer, nullable=False)  # 0 = segunda ... 6 = domingo (ver DIAS_SEMANA_SUPORTADOS)
+    horario = db.Column(db.Time, nullable=False, default=time(19, 0))
+    data_inicio = db.Column(db.Date, nullable=False)
+    data_fim = db.Column(db.Date, nullable=True)  # Sem data final: repete indefinidamente
+    excecoes = db.Column(db.Text, nullable=True)  # Lista JSON de datas (AAAA-MM-DD) sem encontro, como feriados
+    ativo = db.Column(db.Boolean, default=True)
+    
+    # Metadados
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def get_excecoes(self):
+        """Retorna as datas de exceção como conjunto de date"""
+        if not self.excecoes:
+            return set()
+        return {datetime.strptime(valor, '%Y-%m-%d').date() for valor in json.loads(self.excecoes)}
+    
+    def set_excecoes(self, datas):
+        """Grava as datas de exceção (date ou AAAA-MM-DD) em ordem"""
+        valores = sorted({d if isinstance(d, str) else d.strftime('%Y-%m-%d') for d in datas})
+        self.excecoes = json.dumps(valores)
+    
+    def datas(self, inicio, fim, agora=None):
+        """Gera as datas de encontro da regra no intervalo [inicio, fim]
+        
+        A data de hoje só entra se o horário do encontro ainda não passou.
+        """
+        agora = agora or datetime.now()
+        inicio = max(inicio, self.data_inicio)
+        if self.data_fim:
+            fim = min(fim, self.data_fim)
+        
+        if inicio == agora.date() and agora.time() >= self.horario:
+            inicio += timedelta(days=1)
+        
+        excecoes = self.get_excecoes()
+        atual = inicio + timedelta(days=(self.dia_semana - inicio.weekday()) % 7)
+        while atual <= fim:
+            if atual not in excecoes:
+                yield atual
+            atual += timedelta(days=7)
+    
+    def to_dict(self):
+        """Converte o objeto para dicionário"""
+        return {
+            'id': self.id,
+            'dia_semana': self.dia_semana,
+            'dia_semana_nome': DIAS_SEMANA[self.dia_semana],
+            'horario': self.horario.strftime('%H:%M') if self.horario else None,
+            'data_inicio': self.data_inicio.strftime('%Y-%m-%d'),
+            'data_fim': self.data_fim.strftime('%Y-%m-%d') if self.data_fim else None,
+            'excecoes': sorted(d.strftime('%Y-%m-%d') for d in self.get_excecoes()),
+            'ativo': self.ativo,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<RegraRecorrencia {DIAS_SEMANA[self.dia_semana]} {self.horario}>'
+
+
+def criar_regras_padrao():
+    """Cria as regras de terça e quarta às 19h caso nenhuma regra exista. Não faz commit."""
+    if RegraRecorrencia.query.count() > 0:
+        return []
+    
+    hoje = date.today()
+    regras = [
+        RegraRecorrencia(dia_semana=1, horario=time(19, 0), data_inicio=hoje),
+        RegraRecorrencia(dia_semana=2, horario=time(19, 0), data_inicio=hoje)
+    ]
+    db.session.add_all(regras)
+    db.session.flush()
+    return regras
+
+
+def estender_escalas(ate, agora=None):
+    """Cria as escalas que faltam, de hoje até `ate`, segundo as regras ativas
+    
+    As datas são enviadas em lotes de INSERT ... ON CONFLICT DO NOTHING sobre a
+    restrição única de escalas.data, então pode ser executado quantas vezes for
+    preciso sem duplicar nem apagar escalas. Regras de dias fora de
+    DIAS_SEMANA_SUPORTADOS (gravadas antes dessa validação) são ignoradas.
+    Retorna quantas escalas foram criadas. Não faz commit.
+    """
+    agora = agora or datetime.now()
+    
+    datas = {}
+    regras = RegraRecorrencia.query.filter(
+        RegraRecorrencia.ativo.is_(True),
+        RegraRecorrencia.dia_semana.in_(DIAS_SEMANA_SUPORTADOS)
+    ).order_by(RegraRecorrencia.id)
+    for regra in regras:
+        for dia in regra.datas(agora.date(), ate, agora):
+            datas.setdefault(dia, DIAS_SEMANA[dia.weekday()])
+    
+    if not datas:
+        return 0
+    
+    momento = datetime.utcnow()
+    linhas = [
+        {'data': dia, 'dia_semana': nome, 'created_at': momento, 'updated_at': momento}
+        for dia, nome in sorted(datas.items())
+    ]
+    
+    dialeto = db.session.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+    
+    if insert is not None:
+        criadas = 0
+        for inicio in range(0, len(linhas), TAMANHO_LOTE_INSERCAO):
+            lote = linhas[inicio:inicio + TAMANHO_LOTE_INSERCAO]
+            comando = insert(Escala).values(lote).on_conflict_do_nothing(index_elements=['data'])
+            criadas += db.session.execute(comando).rowcount
+        return criadas
+    
+    # Outros bancos: descarta as datas existentes com uma consulta antes de inserir
+    existentes = {
+        dia for (dia,) in db.session.query(Escala.data).filter(
+            Escala.data >= linhas[0]['data'],
+            Escala.data <= linhas[-1]['data']
+        )
+    }
+    linhas = [linha for linha in linhas if linha['data'] not in existentes]
+    if linhas:
+        db.session.execute(db.insert(Escala), linhas)
+    return len(linhas)
@@ -0,0 +1,93 @@
+"""Configuração e monitoramento do pool de conexões com o banco
+
+As opções vêm de variáveis de ambiente e são entregues ao Flask-SQLAlchemy
+via SQLALCHEMY_ENGINE_OPTIONS:
+
+- DB_POOL_SIZE: conexões mantidas por worker (padrão: GUNICORN_THREADS, ou 4)
+- DB_MAX_OVERFLOW: conexões extras em picos (padrão: 2)
+- DB_POOL_TIMEOUT: segundos esperando uma conexão livre (padrão: 10)
+- DB_POOL_RECYCLE: segundos até reabrir uma conexão (padrão: 280, antes do
+  Postgres gerenciado derrubar conexões ociosas)
+"""
+import os
+import threading
+import time
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+class PoolMonitorado(QueuePool):
+    """QueuePool que mede quanto tempo as requisições esperam por uma conexão"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock_estatisticas = threading.Lock()
+        self.total_checkouts = 0
+        self.total_timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+    
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._lock_estatisticas:
+                self.total_timeouts += 1
+            raise
+        finally:
+            espera = time.perf_counter() - inicio
+            with self._lock_estatisticas:
+                self.total_checkouts += 1
+                self.espera_total += espera
+                self.espera_maxima = max(self.espera_maxima, espera)
+
+
+def opcoes_engine(database_uri):
+    """Monta SQLALCHEMY_ENGINE_OPTIONS para o banco informado"""
+    if database_uri.startswith('sqlite'):
+        # SQLite é local: não há conexões ociosas para validar nem pool a dimensionar
+        return {}
+    
+    # Cada thread do worker gthread pode segurar uma conexão ao mesmo tempo
+    tamanho_padrao = os.environ.get('GUNICORN_THREADS', 4)
+    
+    return {
+        'poolclass': PoolMonitorado,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', tamanho_padrao)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 2)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 280)),
+        # Testa a conexão antes de usá-la, descartando as derrubadas pelo servidor
+        'pool_pre_ping': True
+    }
+
+
+def estatisticas_pool(engine):
+    """Retorna o estado atual do pool de conexões do engine"""
+    pool = engine.pool
+    estatisticas = {
+        'classe': type(pool).__name__,
+        'status': pool.status()
+    }
+    
+    if isinstance(pool, QueuePool):
+        estatisticas.update({
+            'tamanho': pool.size(),
+            'em_uso': pool.checkedout(),
+            'disponiveis': pool.checkedin(),
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout()
+        })
+    
+    if isinstance(pool, PoolMonitorado):
+        with pool._lock_estatisticas:
+            estatisticas['espera'] = {
+                'total_checkouts': pool.total_checkouts,
+                'total_timeouts': pool.total_timeouts,
+                'media_ms': round(pool.espera_total * 1000 / pool.total_checkouts, 3) if pool.total_checkouts else 0,
+                'maxima_ms': round(pool.espera_maxima * 1000, 3)
+            }
+    
+    return estatisticas
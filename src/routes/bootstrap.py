@@ -0,0 +1,95 @@
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy.orm import load_only
+from src.models.user import db
+from src.models.escala import Escala, validar_periodo
+from src.models.pessoa import Pessoa, Equipe, PessoaEquipe
+from src.routes.escala import LIMITE_MAXIMO_PAGINA
+from src import cache
+from src.condicional import (
+    calcular_validadores, responder_se_nao_modificado, aplicar_validadores,
+    resumos_escalas, resumos_pessoas_equipes
+)
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+# Tamanho da primeira página de escalas (o mesmo da listagem do sistema)
+LIMITE_PADRAO_ESCALAS = 30
+
+def _pessoas_ativas():
+    """Pessoas ativas com os ids das suas equipes, em duas consultas"""
+    pessoas = Pessoa.query.options(load_only(Pessoa.id, Pessoa.nome)).filter(
+        Pessoa.ativo.is_(True)
+    ).order_by(Pessoa.nome).all()
+    
+    equipes_por_pessoa = {pessoa.id: [] for pessoa in pessoas}
+    vinculos = db.session.query(PessoaEquipe.pessoa_id, PessoaEquipe.equipe_id).join(
+        Pessoa, Pessoa.id == PessoaEquipe.pessoa_id
+    ).filter(Pessoa.ativo.is_(True)).order_by(PessoaEquipe.id)
+    for pessoa_id, equipe_id in vinculos:
+        equipes_por_pessoa[pessoa_id].append(equipe_id)
+    
+    return [
+        {'id': pessoa.id, 'nome': pessoa.nome, 'equipe_ids': equipes_por_pessoa[pessoa.id]}
+        for pessoa in pessoas
+    ]
+
+@bootstrap_bp.route('/bootstrap', methods=['GET'])
+def bootstrap():
+    """Dados iniciais do sistema em uma resposta: primeira página de escalas, pessoas e equipes
+    
+    Parâmetros opcionais (os mesmos da listagem de escalas):
+    - mes, ano: filtram o período das escalas
+    - limit: tamanho da primeira página (padrão 30)
+    
+    As escalas vêm no formato compacto, com next_cursor para continuar em
+    /api/escalas; as pessoas ativas trazem só id, nome e equipe_ids; as
+    equipes ativas, o mesmo formato de /api/equipes.
+    """
+    try:
+        mes = request.args.get('mes', type=int)
+        ano = request.args.get('ano', type=int)
+        
+        erro_periodo = validar_periodo(mes, ano)
+        if erro_periodo:
+            return jsonify({
+                'success': False,
+                'error': erro_periodo
+            }), 400
+        limite = request.args.get('limit', LIMITE_PADRAO_ESCALAS, type=int)
+        limite = max(1, min(limite, LIMITE_MAXIMO_PAGINA))
+        
+        etag, ultima_modificacao = calcular_validadores(*resumos_escalas(mes, ano), *resumos_pessoas_equipes())
+        nao_modificado = responder_se_nao_modificado(etag, ultima_modificacao)
+        if nao_modificado:
+            return nao_modificado
+        
+        # O ETag cobre pessoas e equipes, então uma entrada antiga nunca é reaproveitada
+        chave_cache = cache.respostas.chave('bootstrap', mes, ano, limit=limite)
+        corpo = cache.respostas.obter(chave_cache, etag)
+        if corpo is not None:
+            resposta = current_app.response_class(corpo, mimetype='application/json')
+            return aplicar_validadores(resposta, etag, ultima_modificacao)
+        
+        escalas = Escala.filtrar_periodo(Escala.query, mes, ano).options(
+            Escala.opcoes_compacto()
+        ).order_by(Escala.data).limit(limite + 1).all()
+        proximo_cursor = escalas[limite - 1].data.isoformat() if len(escalas) > limite else None
+        escalas = escalas[:limite]
+        
+        equipes = Equipe.query.filter_by(ativo=True).order_by(Equipe.nome).all()
+        
+        resposta = jsonify({
+            'success': True,
+            'escalas': Escala.to_dict_lista(escalas, compacto=True),
+            'next_cursor': proximo_cursor,
+            'pessoas': _pessoas_ativas(),
+            'equipes': Equipe.to_dict_lista(equipes)
+        })
+        cache.respostas.gravar(chave_cache, etag, resposta.get_data())
+        return aplicar_validadores(resposta, etag, ultima_modificacao)
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
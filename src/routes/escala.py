@@ -1,41 +1,111 @@
-from flask import Blueprint, request, jsonify
-from datetime import datetime, timedelta
-from src.models.escala import db, Escala
+from flask import Blueprint, request, jsonify, current_app
+from datetime import datetime, date
+import click
+from src.models.escala import db, Escala, FUNCOES, migrar_campos_legados, validar_periodo
+from src import cache
+from src.condicional import (
+    calcular_validadores, responder_se_nao_modificado, aplicar_validadores, resumos_escalas, ler_resumos
+)
 
 escala_bp = Blueprint('escala', __name__)
 
+# Tamanho máximo de página aceito pela listagem paginada
+LIMITE_MAXIMO_PAGINA = 200
+
 @escala_bp.route('/escalas', methods=['GET'])
 def listar_escalas():
-    """Lista todas as escalas ordenadas por data"""
+    """Lista as escalas ordenadas por data, com paginação opcional por cursor
+    
+    Parâmetros opcionais:
+    - mes, ano: filtram o período
+    - after / before: cursor (data AAAA-MM-DD) exclusivo para avançar ou voltar
+    - limit: tamanho da página; sem ele, todas as escalas do período são retornadas
+    - compacto=1: omite os campos legados (ver Escala.to_dict)
+    """
     try:
         # Parâmetros de filtro opcionais
         mes = request.args.get('mes', type=int)
         ano = request.args.get('ano', type=int)
         
-        query = Escala.query
+        erro_periodo = validar_periodo(mes, ano)
+        if erro_periodo:
+            return jsonify({
+                'success': False,
+                'error': erro_periodo
+            }), 400
         
-        if mes and ano:
-            # Filtrar por mês e ano
-            inicio_mes = datetime(ano, mes, 1).date()
-            if mes == 12:
-                fim_mes = datetime(ano + 1, 1, 1).date() - timedelta(days=1)
-            else:
-                fim_mes = datetime(ano, mes + 1, 1).date() - timedelta(days=1)
-            
-            query = query.filter(Escala.data >= inicio_mes, Escala.data <= fim_mes)
-        elif ano:
-            # Filtrar apenas por ano
-            inicio_ano = datetime(ano, 1, 1).date()
-            fim_ano = datetime(ano, 12, 31).date()
-            query = query.filter(Escala.data >= inicio_ano, Escala.data <= fim_ano)
+        # Parâmetros de paginação opcionais
+        limite = request.args.get('limit', type=int)
+        try:
+            depois = _parse_cursor(request.args.get('after'))
+            antes = _parse_cursor(request.args.get('before'))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Cursor inválido, use o formato AAAA-MM-DD'
+            }), 400
         
-        escalas = query.order_by(Escala.data).all()
+        compacto = request.args.get('compacto') in ('1', 'true')
         
-        return jsonify({
+        # Sem alterações no período desde a última visita: 304 sem consultar as escalas
+        etag, ultima_modificacao = calcular_validadores(*resumos_escalas(mes, ano))
+        nao_modificado = responder_se_nao_modificado(etag, ultima_modificacao)
+        if nao_modificado:
+            return nao_modificado
+        
+        # Mesma versão dos dados já serializada (por este ou outro cliente)
+        chave_cache = cache.respostas.chave(
+            'escalas', mes, ano,
+            limit=limite, after=depois, before=antes, compacto=int(compacto)
+        )
+        corpo = cache.respostas.obter(chave_cache, etag)
+        if corpo is not None:
+            resposta = current_app.response_class(corpo, mimetype='application/json')
+            return aplicar_validadores(resposta, etag, ultima_modificacao)
+        
+        query = Escala.filtrar_periodo(Escala.query, mes, ano)
+        if compacto:
+            query = query.options(Escala.opcoes_compacto())
+        
+        if depois:
+            query = query.filter(Escala.data > depois)
+        if antes:
+            query = query.filter(Escala.data < antes)
+        
+        # Ao voltar (before sem after) percorre o índice de data em ordem decrescente
+        voltando = antes is not None and depois is None
+        query = query.order_by(Escala.data.desc() if voltando else Escala.data)
+        
+        ha_mais = False
+        if limite is not None:
+            limite = max(1, min(limite, LIMITE_MAXIMO_PAGINA))
+            escalas = query.limit(limite + 1).all()
+            ha_mais = len(escalas) > limite
+            escalas = escalas[:limite]
+        else:
+            escalas = query.all()
+        
+        if voltando:
+            escalas.reverse()
+        
+        # Cursores para as páginas vizinhas
+        proximo_cursor = None
+        cursor_anterior = None
+        if escalas:
+            if (ha_mais and not voltando) or (voltando and limite is not None):
+                proximo_cursor = escalas[-1].data.isoformat()
+            if (ha_mais and voltando) or depois:
+                cursor_anterior = escalas[0].data.isoformat()
+        
+        resposta = jsonify({
             'success': True,
-            'escalas': [escala.to_dict() for escala in escalas],
-            'total': len(escalas)
+            'escalas': Escala.to_dict_lista(escalas, compacto=compacto),
+            'total': len(escalas),
+            'next_cursor': proximo_cursor,
+            'prev_cursor': cursor_anterior
         })
+        cache.respostas.gravar(chave_cache, etag, resposta.get_data())
+        return aplicar_validadores(resposta, etag, ultima_modificacao)
     
     except Exception as e:
         return jsonify({
@@ -43,6 +113,12 @@ def listar_escalas():
             'error': str(e)
         }), 500
 
+def _parse_cursor(valor):
+    """Converte o cursor de paginação (AAAA-MM-DD) em date"""
+    if not valor:
+        return None
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
 @escala_bp.route('/escalas/<int:escala_id>', methods=['GET'])
 def obter_escala(escala_id):
     """Obtém uma escala específica por ID"""
@@ -96,6 +172,7 @@ def criar_escala():
         
         db.session.add(nova_escala)
         db.session.commit()
+        cache.invalidar_periodos([nova_escala.data])
         
         return jsonify({
             'success': True,
@@ -132,6 +209,7 @@ def atualizar_escala(escala_id):
         escala.updated_at = datetime.utcnow()
         
         db.session.commit()
+        cache.invalidar_periodos([escala.data])
         
         return jsonify({
             'success': True,
@@ -152,8 +230,10 @@ def deletar_escala(escala_id):
     try:
         escala = Escala.query.get_or_404(escala_id)
         
+        data_escala = escala.data
         db.session.delete(escala)
         db.session.commit()
+        cache.invalidar_periodos([data_escala])
         
         return jsonify({
             'success': True,
@@ -169,64 +249,26 @@ def deletar_escala(escala_id):
 
 @escala_bp.route('/escalas/inicializar', methods=['POST'])
 def inicializar_escalas():
-    """Inicializa as escalas com todas as datas até o final de 2025"""
+    """Cria as escalas que faltam até o final do ano a partir das regras de recorrência
+    
+    Sem regras cadastradas, cria as regras padrão (terças e quartas às 19h).
+    Pode ser chamado novamente: datas já existentes são mantidas.
+    """
     try:
-        # Verificar se já existem escalas
-        escalas_existentes = Escala.query.count()
-        if escalas_existentes > 0:
-            return jsonify({
-                'success': False,
-                'error': 'Já existem escalas cadastradas. Use o endpoint de atualização individual.'
-            }), 400
-        
-        # Gerar datas como no script original
-        hoje = datetime.now()
-        
-        # Encontrar a próxima terça (weekday 1) ou quarta (weekday 2)
-        dias_ate_terca = (1 - hoje.weekday()) % 7
-        dias_ate_quarta = (2 - hoje.weekday()) % 7
+        from src.models.recorrencia import criar_regras_padrao, estender_escalas
         
-        if dias_ate_terca == 0 and hoje.hour >= 19:
-            dias_ate_terca = 7
-        if dias_ate_quarta == 0 and hoje.hour >= 19:
-            dias_ate_quarta = 7
-            
-        proxima_terca = hoje + timedelta(days=dias_ate_terca)
-        proxima_quarta = hoje + timedelta(days=dias_ate_quarta)
-        
-        # Data final - 31 de dezembro de 2025
-        data_final = datetime(2025, 12, 31)
+        criar_regras_padrao()
         
-        escalas_criadas = []
-        
-        # Gerar todas as terças
-        data_atual = proxima_terca
-        while data_atual.date() <= data_final.date():
-            escala = Escala(
-                data=data_atual.date(),
-                dia_semana='Terça-feira'
-            )
-            escalas_criadas.append(escala)
-            data_atual += timedelta(days=7)
-        
-        # Gerar todas as quartas
-        data_atual = proxima_quarta
-        while data_atual.date() <= data_final.date():
-            escala = Escala(
-                data=data_atual.date(),
-                dia_semana='Quarta-feira'
-            )
-            escalas_criadas.append(escala)
-            data_atual += timedelta(days=7)
-        
-        # Salvar todas as escalas
-        db.session.add_all(escalas_criadas)
+        data_final = date(date.today().year, 12, 31)
+        criadas = estender_escalas(data_final)
         db.session.commit()
+        # Novas escalas em vários meses: descarta todas as respostas
+        cache.invalidar()
         
         return jsonify({
             'success': True,
-            'message': f'{len(escalas_criadas)} escalas inicializadas com sucesso',
-            'total_escalas': len(escalas_criadas)
+            'message': f'{criadas} escalas inicializadas com sucesso',
+            'total_escalas': criadas
         })
     
     except Exception as e:
@@ -238,30 +280,13 @@ def inicializar_escalas():
 
 @escala_bp.route('/escalas/estatisticas', methods=['GET'])
 def obter_estatisticas():
-    """Obtém estatísticas das escalas"""
+    """Obtém estatísticas das escalas (calculadas uma vez e mantidas em cache até a próxima gravação)"""
     try:
-        total_escalas = Escala.query.count()
-        total_tercas = Escala.query.filter_by(dia_semana='Terça-feira').count()
-        total_quartas = Escala.query.filter_by(dia_semana='Quarta-feira').count()
-        
-        # Escalas preenchidas (pelo menos um campo não vazio)
-        escalas_preenchidas = Escala.query.filter(
-            (Escala.pregacao.isnot(None) & (Escala.pregacao != '')) |
-            (Escala.equipe_musicos.isnot(None) & (Escala.equipe_musicos != '')) |
-            (Escala.conducao_animacao.isnot(None) & (Escala.conducao_animacao != '')) |
-            (Escala.acolhida.isnot(None) & (Escala.acolhida != '')) |
-            (Escala.responsavel_abastecimento.isnot(None) & (Escala.responsavel_abastecimento != ''))
-        ).count()
-        
         return jsonify({
             'success': True,
-            'estatisticas': {
-                'total_escalas': total_escalas,
-                'total_tercas': total_tercas,
-                'total_quartas': total_quartas,
-                'escalas_preenchidas': escalas_preenchidas,
-                'escalas_vazias': total_escalas - escalas_preenchidas
-            }
+            'estatisticas': cache.obter_ou_calcular(
+                'estatisticas', _calcular_estatisticas, versao=_versao_estatisticas
+            )
         })
     
     except Exception as e:
@@ -270,6 +295,77 @@ def obter_estatisticas():
             'error': str(e)
         }), 500
 
+def _versao_estatisticas():
+    """Quantidade e maior updated_at de escalas e atribuições, lidos em uma consulta
+    
+    Gravações feitas em outros workers não limpam o cache deste; a versão
+    muda com qualquer inclusão, remoção ou alteração e força o recálculo.
+    """
+    return ler_resumos(*resumos_escalas()[:2])
+
+def _calcular_estatisticas():
+    """Calcula as estatísticas com uma única consulta agregada sobre escalas e escala_pessoa"""
+    from src.models.escala_pessoa import EscalaPessoa
+    
+    # Campos legados preenchidos também contam como escala preenchida
+    legado_preenchido = db.case(
+        (db.or_(*[
+            db.and_(coluna.isnot(None), coluna != '')
+            for coluna in (Escala.pregacao, Escala.equipe_musicos, Escala.conducao_animacao,
+                           Escala.acolhida, Escala.responsavel_abastecimento)
+        ]), 1),
+        else_=0
+    )
+    
+    # Uma linha por escala e função atribuída (funcao nula quando não há pessoas)
+    linhas = db.session.query(
+        Escala.id,
+        Escala.data,
+        Escala.dia_semana,
+        legado_preenchido,
+        EscalaPessoa.funcao,
+        db.func.count(EscalaPessoa.id)
+    ).outerjoin(EscalaPessoa, EscalaPessoa.escala_id == Escala.id).group_by(
+        Escala.id, EscalaPessoa.funcao
+    ).all()
+    
+    escalas = {}
+    por_funcao = {}
+    for escala_id, data, dia_semana, legado, funcao, total_pessoas in linhas:
+        escala = escalas.setdefault(escala_id, {
+            'mes': data.strftime('%Y-%m'),
+            'dia_semana': dia_semana,
+            'preenchida': bool(legado)
+        })
+        if funcao and total_pessoas:
+            escala['preenchida'] = True
+            contagem = por_funcao.setdefault(funcao, {'escalas_preenchidas': 0, 'total_pessoas': 0})
+            contagem['escalas_preenchidas'] += 1
+            contagem['total_pessoas'] += total_pessoas
+    
+    por_dia_semana = {}
+    por_mes = {}
+    for escala in escalas.values():
+        for grupo, chave in ((por_dia_semana, escala['dia_semana']), (por_mes, escala['mes'])):
+            contagem = grupo.setdefault(chave, {'total': 0, 'preenchidas': 0})
+            contagem['total'] += 1
+            contagem['preenchidas'] += 1 if escala['preenchida'] else 0
+    
+    total_escalas = len(escalas)
+    escalas_preenchidas = sum(1 for escala in escalas.values() if escala['preenchida'])
+    
+    return {
+        'total_escalas': total_escalas,
+        'total_tercas': por_dia_semana.get('Terça-feira', {}).get('total', 0),
+        'total_quartas': por_dia_semana.get('Quarta-feira', {}).get('total', 0),
+        'escalas_preenchidas': escalas_preenchidas,
+        'escalas_vazias': total_escalas - escalas_preenchidas,
+        'progresso': round(escalas_preenchidas * 100 / total_escalas) if total_escalas else 0,
+        'por_dia_semana': por_dia_semana,
+        'por_mes': dict(sorted(por_mes.items())),
+        'por_funcao': por_funcao
+    }
+
 
 
 # ===== ROTAS PARA GERENCIAR PESSOAS NAS ESCALAS =====
@@ -362,7 +458,10 @@ def adicionar_pessoa_escala(escala_id):
         )
         
         db.session.add(nova_escala_pessoa)
+        # Nova versão da escala: edições baseadas na anterior viram conflito
+        escala.updated_at = datetime.utcnow()
         db.session.commit()
+        cache.invalidar_periodos([escala.data])
         
         return jsonify({
             'success': True,
@@ -395,8 +494,12 @@ def remover_pessoa_escala(escala_id, pessoa_id, funcao):
                 'error': 'Pessoa não encontrada nesta função da escala'
             }), 404
         
+        escala = escala_pessoa.escala
+        data_escala = escala.data
         db.session.delete(escala_pessoa)
+        escala.updated_at = datetime.utcnow()
         db.session.commit()
+        cache.invalidar_periodos([data_escala])
         
         return jsonify({
             'success': True,
@@ -456,7 +559,9 @@ def atualizar_pessoas_funcao(escala_id):
                 )
                 db.session.add(nova_escala_pessoa)
         
+        escala.updated_at = datetime.utcnow()
         db.session.commit()
+        cache.invalidar_periodos([escala.data])
         
         # Retornar escala atualizada
         escala_atualizada = Escala.query.get(escala_id)
@@ -474,3 +579,340 @@ def atualizar_pessoas_funcao(escala_id):
             'error': str(e)
         }), 500
 
+
+@escala_bp.route('/escalas/<int:escala_id>/pessoas', methods=['PUT'])
+def atualizar_pessoas_escala(escala_id):
+    """Atualiza de uma só vez as pessoas de várias funções da escala
+    
+    Corpo: {"funcoes": {"pregacao": [1, 2], "musicos": [3]}}. Funções ausentes
+    no corpo não são alteradas; uma lista vazia remove todos da função.
+    Com "updated_at" (o valor recebido da API), a alteração só é gravada se a
+    escala não mudou desde então; caso contrário responde 409 com a escala atual.
+    """
+    try:
+        escala = Escala.query.get_or_404(escala_id)
+        data = request.get_json()
+        
+        # Validar dados obrigatórios
+        funcoes = data.get('funcoes') if data else None
+        if not isinstance(funcoes, dict):
+            return jsonify({
+                'success': False,
+                'error': 'funcoes é obrigatório'
+            }), 400
+        
+        for funcao, pessoas_ids in funcoes.items():
+            if funcao not in FUNCOES:
+                return jsonify({
+                    'success': False,
+                    'error': f'Função inválida: {funcao}'
+                }), 400
+            if not _eh_lista_ids(pessoas_ids):
+                return jsonify({
+                    'success': False,
+                    'error': f'pessoas_ids da função {funcao} deve ser uma lista de números inteiros'
+                }), 400
+            if len(set(pessoas_ids)) > 10:
+                return jsonify({
+                    'success': False,
+                    'error': 'Máximo de 10 pessoas por função'
+                }), 400
+        
+        if 'updated_at' in data and not _reservar_versao(escala_id, data['updated_at']):
+            # Desfaz a transação para ler a versão atual gravada pela outra alteração
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'conflito': True,
+                'error': 'A escala foi alterada por outra pessoa; confira os dados atuais',
+                'escala': Escala.to_dict_lista([escala], compacto=True)[0]
+            }), 409
+        
+        resultado = _sincronizar_funcoes({
+            (escala_id, funcao): pessoas_ids for funcao, pessoas_ids in funcoes.items()
+        })
+        
+        db.session.commit()
+        cache.invalidar_periodos([escala.data])
+        
+        return jsonify({
+            'success': True,
+            'escala': Escala.to_dict_lista([escala])[0],
+            'pessoas_ignoradas': resultado['ignorados'],
+            'message': 'Escala atualizada com sucesso'
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@escala_bp.route('/escalas/pessoas/lote', methods=['POST'])
+def atualizar_pessoas_lote():
+    """Aplica alterações de funções em várias escalas em uma única transação
+    
+    Corpo: {"alteracoes": [{"escala_id": 1, "funcao": "musicos", "pessoas_ids": [1, 2],
+    "modo": "substituir" | "adicionar", "updated_at": "..."}]}. Cada item recebe
+    seu próprio resultado; itens inválidos são rejeitados sem impedir a gravação
+    dos demais. Itens com updated_at diferente do atual da escala são rejeitados
+    como conflito ("conflito": true e o "updated_at_atual"); a verificação é
+    atômica (ver _reservar_versao).
+    """
+    try:
+        data = request.get_json()
+        
+        # Validar dados obrigatórios
+        itens = data.get('alteracoes') if data else None
+        if not isinstance(itens, list) or not itens:
+            return jsonify({
+                'success': False,
+                'error': 'alteracoes é obrigatório'
+            }), 400
+        
+        # Verificar de uma vez quais escalas existem (com suas datas, para o cache)
+        escala_ids = {item.get('escala_id') for item in itens if isinstance(item, dict) and _eh_id(item.get('escala_id'))}
+        escalas_existentes = dict(
+            db.session.query(Escala.id, Escala.data).filter(Escala.id.in_(escala_ids)).all()
+        )
+        
+        resultados = []
+        alteracoes = {}
+        adicionar = set()
+        # (resultado, chave, versão esperada) dos itens que informam updated_at
+        com_versao = []
+        for indice, item in enumerate(itens):
+            item = item if isinstance(item, dict) else {}
+            chave = (item.get('escala_id'), item.get('funcao'))
+            pessoas_ids = item.get('pessoas_ids')
+            modo = item.get('modo', 'substituir')
+            resultado = {'indice': indice, 'escala_id': chave[0], 'funcao': chave[1]}
+            resultados.append(resultado)
+            
+            # Tipos conferidos antes de usar os valores como chaves de dicionário
+            if not _eh_id(chave[0]):
+                resultado['erro'] = 'escala_id deve ser um número inteiro'
+            elif not isinstance(chave[1], str) or chave[1] not in FUNCOES:
+                resultado['erro'] = 'Função inválida'
+            elif not _eh_lista_ids(pessoas_ids):
+                resultado['erro'] = 'pessoas_ids deve ser uma lista de números inteiros'
+            elif not isinstance(modo, str) or modo not in ('substituir', 'adicionar'):
+                resultado['erro'] = 'Modo inválido'
+            elif not isinstance(item.get('updated_at'), (str, type(None))):
+                resultado['erro'] = 'updated_at inválido'
+            elif chave[0] not in escalas_existentes:
+                resultado['erro'] = 'Escala não encontrada'
+            elif chave in alteracoes:
+                resultado['erro'] = 'Alteração duplicada para esta escala e função'
+            else:
+                alteracoes[chave] = pessoas_ids
+                if modo == 'adicionar':
+                    adicionar.add(chave)
+                if 'updated_at' in item:
+                    com_versao.append((resultado, chave, item['updated_at']))
+        
+        # Cada par (escala, versão esperada) é reservado uma vez; os itens de um
+        # par recusado viram conflito e não são gravados
+        esperadas = {(chave[0], esperado) for _, chave, esperado in com_versao}
+        conflitos = {par for par in esperadas if not _reservar_versao(*par)}
+        if conflitos:
+            atuais = dict(db.session.query(Escala.id, Escala.updated_at).filter(
+                Escala.id.in_({escala_id for escala_id, _ in conflitos})
+            ).all())
+            for resultado, chave, esperado in com_versao:
+                if (chave[0], esperado) in conflitos:
+                    resultado['erro'] = 'A escala foi alterada por outra pessoa'
+                    resultado['conflito'] = True
+                    resultado['updated_at_atual'] = _versao_escala(atuais[chave[0]])
+                    del alteracoes[chave]
+                    adicionar.discard(chave)
+        
+        sincronizacao = _sincronizar_funcoes(alteracoes, adicionar)
+        db.session.commit()
+        cache.invalidar_periodos({escalas_existentes[escala_id] for escala_id, _ in alteracoes})
+        
+        for resultado in resultados:
+            if 'erro' in resultado:
+                resultado['success'] = False
+                continue
+            detalhes = sincronizacao['por_chave'][(resultado['escala_id'], resultado['funcao'])]
+            resultado.update(detalhes)
+            resultado['success'] = 'erro' not in detalhes
+        
+        return jsonify({
+            'success': True,
+            'resultados': resultados,
+            'total_aplicadas': sum(1 for resultado in resultados if resultado['success']),
+            'total_rejeitadas': sum(1 for resultado in resultados if not resultado['success']),
+            'pessoas_ignoradas': sincronizacao['ignorados'],
+            'message': 'Alterações aplicadas com sucesso'
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# Limite de pessoas em uma mesma função de uma escala
+LIMITE_PESSOAS_FUNCAO = 10
+
+def _eh_id(valor):
+    """Verdadeiro para um id inteiro (bool é int em Python, mas não é id)"""
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+def _eh_lista_ids(valor):
+    """Verdadeiro para uma lista de ids inteiros"""
+    return isinstance(valor, list) and all(_eh_id(item) for item in valor)
+
+def _versao_escala(updated_at):
+    """Versão da escala para detectar conflitos: o updated_at como a API o envia"""
+    return updated_at.isoformat() if updated_at else None
+
+def _reservar_versao(escala_id, esperado):
+    """Marca a escala como alterada só se ela ainda estiver na versão `esperado`
+    
+    Um único UPDATE ... WHERE updated_at = :esperado faz a comparação e a troca
+    de versão: de duas gravações baseadas na mesma versão, a segunda espera o
+    bloqueio da linha e não a encontra mais. Retorna False nesse caso (ou com
+    uma versão ilegível). Não faz commit.
+    """
+    try:
+        esperado = datetime.fromisoformat(esperado) if esperado is not None else None
+    except (TypeError, ValueError):
+        return False
+    
+    versao_igual = Escala.updated_at.is_(None) if esperado is None else Escala.updated_at == esperado
+    resultado = db.session.execute(
+        db.update(Escala).where(Escala.id == escala_id, versao_igual).values(updated_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False}
+    )
+    return resultado.rowcount == 1
+
+def _sincronizar_funcoes(alteracoes, adicionar=()):
+    """Aplica as listas de pessoas por (escala_id, funcao) gravando só a diferença
+    
+    Valida as pessoas com uma única consulta IN, conta as pessoas de cada
+    função com uma consulta agrupada (COUNT ... GROUP BY) e lê das atribuições
+    atuais só as das pessoas informadas; depois executa um DELETE e um INSERT
+    em massa. As chaves em `adicionar` somam as pessoas às já escaladas em vez
+    de substituí-las. Pessoas inexistentes ou inativas são ignoradas e chaves
+    que passariam do limite por função são rejeitadas. Não faz commit.
+    """
+    from src.models.escala_pessoa import EscalaPessoa
+    from src.models.pessoa import Pessoa
+    
+    # Remover duplicatas mantendo a ordem informada
+    alteracoes = {chave: list(dict.fromkeys(ids)) for chave, ids in alteracoes.items()}
+    
+    todos_ids = {pessoa_id for ids in alteracoes.values() for pessoa_id in ids}
+    ativos = set()
+    if todos_ids:
+        ativos = {
+            pessoa_id for (pessoa_id,) in db.session.query(Pessoa.id).filter(
+                Pessoa.id.in_(todos_ids),
+                Pessoa.ativo.is_(True)
+            )
+        }
+    
+    escala_ids = {escala_id for escala_id, _ in alteracoes}
+    contagens = {}
+    presentes = set()
+    if escala_ids:
+        contagens = {
+            (escala_id, funcao): total for escala_id, funcao, total in db.session.query(
+                EscalaPessoa.escala_id, EscalaPessoa.funcao, db.func.count(EscalaPessoa.id)
+            ).filter(EscalaPessoa.escala_id.in_(escala_ids)).group_by(EscalaPessoa.escala_id, EscalaPessoa.funcao)
+        }
+        if ativos:
+            presentes = {
+                tuple(linha) for linha in db.session.query(
+                    EscalaPessoa.escala_id, EscalaPessoa.funcao, EscalaPessoa.pessoa_id
+                ).filter(EscalaPessoa.escala_id.in_(escala_ids), EscalaPessoa.pessoa_id.in_(ativos))
+            }
+    
+    remover = []
+    inserir = []
+    por_chave = {}
+    escalas_alteradas = set()
+    total_removidos = 0
+    for (escala_id, funcao), pessoas_ids in alteracoes.items():
+        desejados = [pessoa_id for pessoa_id in pessoas_ids if pessoa_id in ativos]
+        mantidos = sum(1 for pessoa_id in desejados if (escala_id, funcao, pessoa_id) in presentes)
+        novos = [pessoa_id for pessoa_id in desejados if (escala_id, funcao, pessoa_id) not in presentes]
+        atual = contagens.get((escala_id, funcao), 0)
+        
+        if (escala_id, funcao) in adicionar:
+            total = atual + len(novos)
+            removidos = 0
+        else:
+            total = len(desejados)
+            removidos = atual - mantidos
+        
+        if total > LIMITE_PESSOAS_FUNCAO:
+            por_chave[(escala_id, funcao)] = {
+                'erro': f'Limite máximo de {LIMITE_PESSOAS_FUNCAO} pessoas por função atingido'
+            }
+            continue
+        
+        if removidos:
+            remover.append(db.and_(
+                EscalaPessoa.escala_id == escala_id,
+                EscalaPessoa.funcao == funcao,
+                EscalaPessoa.pessoa_id.not_in(desejados)
+            ))
+        inserir.extend(
+            {'escala_id': escala_id, 'pessoa_id': pessoa_id, 'funcao': funcao, 'confirmado': False}
+            for pessoa_id in novos
+        )
+        total_removidos += removidos
+        por_chave[(escala_id, funcao)] = {'inseridos': len(novos), 'removidos': removidos}
+        if removidos or novos:
+            escalas_alteradas.add(escala_id)
+    
+    if remover:
+        EscalaPessoa.query.filter(db.or_(*remover)).delete(synchronize_session=False)
+    if inserir:
+        db.session.execute(db.insert(EscalaPessoa), inserir)
+    if escalas_alteradas:
+        # Marca as escalas como alteradas para quem depende de updated_at
+        Escala.query.filter(Escala.id.in_(escalas_alteradas)).update(
+            {Escala.updated_at: datetime.utcnow()}, synchronize_session=False
+        )
+    
+    return {
+        'inseridos': len(inserir),
+        'removidos': total_removidos,
+        'ignorados': sorted(todos_ids - ativos),
+        'por_chave': por_chave
+    }
+
+# ===== COMANDO DE LINHA DE COMANDO =====
+
+@escala_bp.cli.command('migrar-legado')
+@click.option('--lote', default=200, show_default=True, help='Escalas por transação')
+@click.option('--manter-legado', is_flag=True, help='Não esvazia as colunas legadas já convertidas')
+@click.option('--simular', is_flag=True, help='Apenas mostra o relatório, sem gravar')
+def migrar_legado_comando(lote, manter_legado, simular):
+    """Converte os nomes das colunas legadas das escalas em pessoas escaladas (escala_pessoa)"""
+    relatorio = migrar_campos_legados(
+        tamanho_lote=lote,
+        limpar=not manter_legado,
+        simular=simular,
+        informar=click.echo
+    )
+    cache.invalidar()
+    
+    click.echo(f"{relatorio['escalas_processadas']} escalas com campos legados, "
+               f"{relatorio['escalas_alteradas']} alteradas, "
+               f"{relatorio['atribuicoes_criadas']} atribuições criadas, "
+               f"{relatorio['colunas_limpas']} campos legados esvaziados"
+               f"{' (simulação, nada foi gravado)' if simular else ''}")
+    
+    nao_encontrados = relatorio['nao_encontrados']
+    if nao_encontrados:
+        click.echo(f'Nomes sem pessoa cadastrada ({len(nao_encontrados)}); os campos com esses nomes foram mantidos:')
+        for nome, total in sorted(nao_encontrados.items(), key=lambda item: (-item[1], item[0])):
+            click.echo(f'  {nome}: {total} escala(s)')
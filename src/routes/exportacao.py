@@ -1,16 +1,10 @@
 from flask import Blueprint, request, jsonify, make_response
 from src.models.user import db
-from src.models.escala import Escala
+from src.models.escala import Escala, validar_periodo
 from src.models.escala_pessoa import EscalaPessoa
 from src.models.pessoa import Pessoa
 from datetime import datetime
 import io
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.pdfgen import canvas
 
 exportacao_bp = Blueprint('exportacao', __name__)
 
@@ -18,21 +12,25 @@ exportacao_bp = Blueprint('exportacao', __name__)
 def exportar_escalas_pdf():
     """Exporta as escalas em formato PDF"""
     try:
+        # O reportlab é pesado; só é carregado na primeira exportação
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        
         # Parâmetros de filtro
         mes = request.args.get('mes', type=int)
         ano = request.args.get('ano', type=int)
         
-        # Query base
-        query = Escala.query.order_by(Escala.data)
+        erro_periodo = validar_periodo(mes, ano)
+        if erro_periodo:
+            return jsonify({
+                'success': False,
+                'error': erro_periodo
+            }), 400
         
-        # Aplicar filtros se fornecidos
-        if mes and ano:
-            query = query.filter(
-                db.extract('month', Escala.data) == mes,
-                db.extract('year', Escala.data) == ano
-            )
-        elif ano:
-            query = query.filter(db.extract('year', Escala.data) == ano)
+        # Query base, com o período aplicado como faixa de datas
+        query = Escala.filtrar_periodo(Escala.query, mes, ano).order_by(Escala.data)
         
         escalas = query.all()
         
@@ -74,6 +72,10 @@ def exportar_escalas_pdf():
             meses = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
                     'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
             title += f" - {meses[mes]} {ano}"
+        elif mes:
+            meses = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+                    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+            title += f" - {meses[mes]} (todos os anos)"
         elif ano:
             title += f" - {ano}"
         
@@ -188,6 +190,8 @@ def exportar_escalas_pdf():
         nome_arquivo = "escala_grupo_oracao"
         if mes and ano:
             nome_arquivo += f"_{ano}_{mes:02d}"
+        elif mes:
+            nome_arquivo += f"_mes_{mes:02d}"
         elif ano:
             nome_arquivo += f"_{ano}"
         nome_arquivo += ".pdf"
@@ -198,6 +202,11 @@ def exportar_escalas_pdf():
         
         return response
         
+    except ImportError:
+        return jsonify({
+            'success': False,
+            'error': 'Biblioteca reportlab não está disponível'
+        }), 500
     except Exception as e:
         return jsonify({
             'success': False,
@@ -215,17 +224,15 @@ def exportar_escalas_excel():
         mes = request.args.get('mes', type=int)
         ano = request.args.get('ano', type=int)
         
-        # Query base
-        query = Escala.query.order_by(Escala.data)
+        erro_periodo = validar_periodo(mes, ano)
+        if erro_periodo:
+            return jsonify({
+                'success': False,
+                'error': erro_periodo
+            }), 400
         
-        # Aplicar filtros se fornecidos
-        if mes and ano:
-            query = query.filter(
-                db.extract('month', Escala.data) == mes,
-                db.extract('year', Escala.data) == ano
-            )
-        elif ano:
-            query = query.filter(db.extract('year', Escala.data) == ano)
+        # Query base, com o período aplicado como faixa de datas
+        query = Escala.filtrar_periodo(Escala.query, mes, ano).order_by(Escala.data)
         
         escalas = query.all()
         
@@ -302,6 +309,8 @@ def exportar_escalas_excel():
         nome_arquivo = "escala_grupo_oracao"
         if mes and ano:
             nome_arquivo += f"_{ano}_{mes:02d}"
+        elif mes:
+            nome_arquivo += f"_mes_{mes:02d}"
         elif ano:
             nome_arquivo += f"_{ano}"
         nome_arquivo += ".xlsx"
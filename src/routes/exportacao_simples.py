@@ -1,12 +1,32 @@
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from src.models.user import db
-from src.models.escala import Escala
+from src.models.escala import Escala, validar_periodo
+from src import cache
+from src.condicional import calcular_validadores, responder_se_nao_modificado, aplicar_validadores, resumos_escalas
 from datetime import datetime
 import csv
 import io
 
 exportacao_bp = Blueprint('exportacao', __name__)
 
+# Quantidade de escalas lidas do banco por vez durante a exportação
+TAMANHO_LOTE_EXPORTACAO = 200
+
+def _escalas_em_lotes(query):
+    """Percorre a consulta em lotes, devolvendo as escalas já serializadas
+    
+    Cada lote é lido com yield_per e tem os nomes das pessoas carregados em
+    uma única consulta, então a memória usada não depende do total exportado.
+    """
+    lote = []
+    for escala in query.yield_per(TAMANHO_LOTE_EXPORTACAO):
+        lote.append(escala)
+        if len(lote) == TAMANHO_LOTE_EXPORTACAO:
+            yield Escala.to_dict_lista(lote)
+            lote = []
+    if lote:
+        yield Escala.to_dict_lista(lote)
+
 @exportacao_bp.route('/escalas/exportar-csv', methods=['GET'])
 def exportar_escalas_csv():
     """Exporta as escalas em formato CSV simplificado"""
@@ -15,85 +35,85 @@ def exportar_escalas_csv():
         mes = request.args.get('mes', type=int)
         ano = request.args.get('ano', type=int)
         
-        # Query base
-        query = Escala.query.order_by(Escala.data)
-        
-        # Aplicar filtros se fornecidos
-        if mes and ano:
-            query = query.filter(
-                db.extract('month', Escala.data) == mes,
-                db.extract('year', Escala.data) == ano
-            )
-        elif ano:
-            query = query.filter(db.extract('year', Escala.data) == ano)
+        erro_periodo = validar_periodo(mes, ano)
+        if erro_periodo:
+            return jsonify({
+                'success': False,
+                'error': erro_periodo
+            }), 400
         
-        escalas = query.all()
+        # Query base, com o período aplicado como faixa de datas
+        query = Escala.filtrar_periodo(Escala.query, mes, ano).order_by(Escala.data)
         
-        if not escalas:
+        if not db.session.query(query.exists()).scalar():
             return jsonify({
                 'success': False,
                 'error': 'Nenhuma escala encontrada para exportar'
             }), 404
         
-        # Criar CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Cabeçalho
-        writer.writerow([
-            'Data',
-            'Dia da Semana',
-            'Pregação',
-            'Equipe Músicos',
-            'Condução de Animação/Oração',
-            'Acolhida',
-            'Responsável Condução Abastecimento'
-        ])
-        
-        # Dados
-        for escala in escalas:
-            if escala.dia_semana.lower().find('terça') != -1:
-                # Terça-feira
-                writer.writerow([
-                    escala.data.strftime('%d/%m/%Y'),
-                    escala.dia_semana,
-                    escala.pregacao_display or '',
-                    escala.musicos_display or '',
-                    escala.conducao_animacao_display or '',
-                    escala.acolhida_display or '',
-                    ''  # Abastecimento vazio para terças
-                ])
-            else:
-                # Quarta-feira
-                writer.writerow([
-                    escala.data.strftime('%d/%m/%Y'),
-                    escala.dia_semana,
-                    '',  # Campos vazios para quartas
-                    '',
-                    '',
-                    '',
-                    escala.abastecimento_display or ''
-                ])
-        
-        # Preparar resposta
-        output.seek(0)
-        csv_data = output.getvalue()
-        output.close()
+        def gerar_csv():
+            output = io.StringIO()
+            writer = csv.writer(output)
+            
+            # Cabeçalho
+            writer.writerow([
+                'Data',
+                'Dia da Semana',
+                'Pregação',
+                'Equipe Músicos',
+                'Condução de Animação/Oração',
+                'Acolhida',
+                'Responsável Condução Abastecimento'
+            ])
+            
+            # Dados, enviados a cada lote lido do banco
+            for lote in _escalas_em_lotes(query):
+                for escala in lote:
+                    if escala['dia_semana'].lower().find('terça') != -1:
+                        # Terça-feira
+                        writer.writerow([
+                            escala['data_formatada'],
+                            escala['dia_semana'],
+                            escala['pregacao_display'],
+                            escala['musicos_display'],
+                            escala['conducao_animacao_display'],
+                            escala['acolhida_display'],
+                            ''  # Abastecimento vazio para terças
+                        ])
+                    else:
+                        # Quarta-feira
+                        writer.writerow([
+                            escala['data_formatada'],
+                            escala['dia_semana'],
+                            '',  # Campos vazios para quartas
+                            '',
+                            '',
+                            '',
+                            escala['abastecimento_display']
+                        ])
+                
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+            
+            output.close()
         
         # Nome do arquivo
         nome_arquivo = "escala_grupo_oracao"
         if mes and ano:
             nome_arquivo += f"_{ano}_{mes:02d}"
+        elif mes:
+            nome_arquivo += f"_mes_{mes:02d}"
         elif ano:
             nome_arquivo += f"_{ano}"
         nome_arquivo += ".csv"
         
-        response = make_response(csv_data)
-        response.headers['Content-Type'] = 'text/csv; charset=utf-8'
+        # Resposta em streaming (chunked), gerada enquanto as escalas são lidas
+        response = Response(stream_with_context(gerar_csv()), content_type='text/csv; charset=utf-8')
         response.headers['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
         
         return response
-        
+    
     except Exception as e:
         return jsonify({
             'success': False,
@@ -108,115 +128,118 @@ def exportar_escalas_texto():
         mes = request.args.get('mes', type=int)
         ano = request.args.get('ano', type=int)
         
-        # Query base
-        query = Escala.query.order_by(Escala.data)
-        
-        # Aplicar filtros se fornecidos
-        if mes and ano:
-            query = query.filter(
-                db.extract('month', Escala.data) == mes,
-                db.extract('year', Escala.data) == ano
-            )
-        elif ano:
-            query = query.filter(db.extract('year', Escala.data) == ano)
+        erro_periodo = validar_periodo(mes, ano)
+        if erro_periodo:
+            return jsonify({
+                'success': False,
+                'error': erro_periodo
+            }), 400
         
-        escalas = query.all()
+        # Query base, com o período aplicado como faixa de datas
+        query = Escala.filtrar_periodo(Escala.query, mes, ano).order_by(Escala.data)
         
-        if not escalas:
+        if not db.session.query(query.exists()).scalar():
             return jsonify({
                 'success': False,
                 'error': 'Nenhuma escala encontrada para exportar'
             }), 404
         
-        # Criar conteúdo de texto
-        linhas = []
-        linhas.append("=" * 60)
-        linhas.append("ESCALA DO GRUPO DE ORAÇÃO")
-        
-        # Título com período
-        if mes and ano:
-            meses = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-                    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
-            linhas.append(f"{meses[mes]} de {ano}")
-        elif ano:
-            linhas.append(f"Ano {ano}")
-        else:
-            linhas.append("Todas as escalas")
-        
-        linhas.append("=" * 60)
-        linhas.append("")
-        
-        # Agrupar escalas por mês
-        escalas_por_mes = {}
-        for escala in escalas:
-            mes_ano = escala.data.strftime('%Y-%m')
-            if mes_ano not in escalas_por_mes:
-                escalas_por_mes[mes_ano] = []
-            escalas_por_mes[mes_ano].append(escala)
-        
-        # Gerar conteúdo para cada mês
-        for mes_ano, escalas_mes in escalas_por_mes.items():
-            # Título do mês
-            data_mes = datetime.strptime(mes_ano, '%Y-%m')
-            titulo_mes = data_mes.strftime('%B %Y').upper()
-            linhas.append(titulo_mes)
-            linhas.append("-" * len(titulo_mes))
+        def gerar_texto():
+            # Cabeçalho
+            linhas = []
+            linhas.append("=" * 60)
+            linhas.append("ESCALA DO GRUPO DE ORAÇÃO")
+            
+            # Título com período
+            if mes and ano:
+                meses = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+                        'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+                linhas.append(f"{meses[mes]} de {ano}")
+            elif mes:
+                meses = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+                        'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+                linhas.append(f"{meses[mes]} de todos os anos")
+            elif ano:
+                linhas.append(f"Ano {ano}")
+            else:
+                linhas.append("Todas as escalas")
+            
+            linhas.append("=" * 60)
             linhas.append("")
             
-            # Escalas do mês
-            for escala in escalas_mes:
-                data_formatada = escala.data.strftime('%d/%m/%Y')
-                linhas.append(f"{data_formatada} - {escala.dia_semana}")
-                
-                if escala.dia_semana.lower().find('terça') != -1:
-                    # Terça-feira
-                    if escala.pregacao_display:
-                        linhas.append(f"  Pregação: {escala.pregacao_display}")
-                    if escala.musicos_display:
-                        linhas.append(f"  Equipe Músicos: {escala.musicos_display}")
-                    if escala.conducao_animacao_display:
-                        linhas.append(f"  Condução/Oração: {escala.conducao_animacao_display}")
-                    if escala.acolhida_display:
-                        linhas.append(f"  Acolhida: {escala.acolhida_display}")
+            # As escalas chegam ordenadas por data, então os meses são
+            # agrupados à medida que são lidos
+            mes_ano_atual = None
+            for lote in _escalas_em_lotes(query):
+                for escala in lote:
+                    mes_ano = escala['data'][:7]
+                    if mes_ano != mes_ano_atual:
+                        if mes_ano_atual is not None:
+                            linhas.append("")  # Linha em branco entre meses
+                        mes_ano_atual = mes_ano
+                        
+                        # Título do mês
+                        data_mes = datetime.strptime(mes_ano, '%Y-%m')
+                        titulo_mes = data_mes.strftime('%B %Y').upper()
+                        linhas.append(titulo_mes)
+                        linhas.append("-" * len(titulo_mes))
+                        linhas.append("")
+                    
+                    linhas.append(f"{escala['data_formatada']} - {escala['dia_semana']}")
                     
-                    # Verificar se está vazia
-                    if not any([escala.pregacao_display, escala.musicos_display, 
-                              escala.conducao_animacao_display, escala.acolhida_display]):
-                        linhas.append("  (Escala não preenchida)")
-                else:
-                    # Quarta-feira
-                    if escala.abastecimento_display:
-                        linhas.append(f"  Responsável Abastecimento: {escala.abastecimento_display}")
+                    if escala['dia_semana'].lower().find('terça') != -1:
+                        # Terça-feira
+                        if escala['pregacao_display']:
+                            linhas.append(f"  Pregação: {escala['pregacao_display']}")
+                        if escala['musicos_display']:
+                            linhas.append(f"  Equipe Músicos: {escala['musicos_display']}")
+                        if escala['conducao_animacao_display']:
+                            linhas.append(f"  Condução/Oração: {escala['conducao_animacao_display']}")
+                        if escala['acolhida_display']:
+                            linhas.append(f"  Acolhida: {escala['acolhida_display']}")
+                        
+                        # Verificar se está vazia
+                        if not any([escala['pregacao_display'], escala['musicos_display'],
+                                  escala['conducao_animacao_display'], escala['acolhida_display']]):
+                            linhas.append("  (Escala não preenchida)")
                     else:
-                        linhas.append("  (Escala não preenchida)")
+                        # Quarta-feira
+                        if escala['abastecimento_display']:
+                            linhas.append(f"  Responsável Abastecimento: {escala['abastecimento_display']}")
+                        else:
+                            linhas.append("  (Escala não preenchida)")
+                    
+                    linhas.append("")  # Linha em branco entre escalas
                 
-                linhas.append("")  # Linha em branco entre escalas
+                # Envia o que já foi gerado deste lote
+                yield "\n".join(linhas) + "\n"
+                linhas = []
             
-            linhas.append("")  # Linha em branco entre meses
-        
-        # Rodapé
-        linhas.append("=" * 60)
-        data_geracao = datetime.now().strftime('%d/%m/%Y às %H:%M')
-        linhas.append(f"Relatório gerado em {data_geracao}")
-        linhas.append("=" * 60)
-        
-        # Juntar todas as linhas
-        conteudo = "\n".join(linhas)
+            # Rodapé
+            linhas.append("")  # Linha em branco após o último mês
+            linhas.append("=" * 60)
+            data_geracao = datetime.now().strftime('%d/%m/%Y às %H:%M')
+            linhas.append(f"Relatório gerado em {data_geracao}")
+            linhas.append("=" * 60)
+            
+            yield "\n".join(linhas)
         
         # Nome do arquivo
         nome_arquivo = "escala_grupo_oracao"
         if mes and ano:
             nome_arquivo += f"_{ano}_{mes:02d}"
+        elif mes:
+            nome_arquivo += f"_mes_{mes:02d}"
         elif ano:
             nome_arquivo += f"_{ano}"
         nome_arquivo += ".txt"
         
-        response = make_response(conteudo.encode('utf-8'))
-        response.headers['Content-Type'] = 'text/plain; charset=utf-8'
+        # Resposta em streaming (chunked), gerada enquanto as escalas são lidas
+        response = Response(stream_with_context(gerar_texto()), content_type='text/plain; charset=utf-8')
         response.headers['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
         
         return response
-        
+    
     except Exception as e:
         return jsonify({
             'success': False,
@@ -231,46 +254,57 @@ def visualizar_escalas():
         mes = request.args.get('mes', type=int)
         ano = request.args.get('ano', type=int)
         
-        # Query base
-        query = Escala.query.order_by(Escala.data)
+        erro_periodo = validar_periodo(mes, ano)
+        if erro_periodo:
+            return jsonify({
+                'success': False,
+                'error': erro_periodo
+            }), 400
+        
+        etag, ultima_modificacao = calcular_validadores(*resumos_escalas(mes, ano))
+        nao_modificado = responder_se_nao_modificado(etag, ultima_modificacao)
+        if nao_modificado:
+            return nao_modificado
         
-        # Aplicar filtros se fornecidos
-        if mes and ano:
-            query = query.filter(
-                db.extract('month', Escala.data) == mes,
-                db.extract('year', Escala.data) == ano
-            )
-        elif ano:
-            query = query.filter(db.extract('year', Escala.data) == ano)
+        chave_cache = cache.respostas.chave('visualizar', mes, ano)
+        corpo = cache.respostas.obter(chave_cache, etag)
+        if corpo is not None:
+            resposta = current_app.response_class(corpo, mimetype='application/json')
+            return aplicar_validadores(resposta, etag, ultima_modificacao)
         
-        escalas = query.all()
+        # Query base, com o período aplicado como faixa de datas
+        query = Escala.filtrar_periodo(Escala.query, mes, ano).order_by(Escala.data)
+        
+        escalas = Escala.to_dict_lista(query.all())
         
         # Preparar dados simplificados
         escalas_simplificadas = []
         for escala in escalas:
             escala_data = {
-                'data': escala.data.strftime('%d/%m/%Y'),
-                'dia_semana': escala.dia_semana,
-                'preenchida': escala.tem_pessoas_definidas
+                'data': escala['data_formatada'],
+                'dia_semana': escala['dia_semana']
             }
             
-            if escala.dia_semana.lower().find('terça') != -1:
+            if escala['dia_semana'].lower().find('terça') != -1:
                 escala_data.update({
                     'tipo': 'terca',
-                    'pregacao': escala.pregacao_display or '',
-                    'musicos': escala.musicos_display or '',
-                    'conducao_oracao': escala.conducao_animacao_display or '',
-                    'acolhida': escala.acolhida_display or ''
+                    'pregacao': escala['pregacao_display'],
+                    'musicos': escala['musicos_display'],
+                    'conducao_oracao': escala['conducao_animacao_display'],
+                    'acolhida': escala['acolhida_display']
                 })
+                escala_data['preenchida'] = any([escala_data['pregacao'], escala_data['musicos'],
+                                                 escala_data['conducao_oracao'], escala_data['acolhida']])
             else:
                 escala_data.update({
                     'tipo': 'quarta',
-                    'abastecimento': escala.abastecimento_display or ''
+                    'abastecimento': escala['abastecimento_display']
                 })
+                escala_data['preenchida'] = bool(escala_data['abastecimento'])
             
             escalas_simplificadas.append(escala_data)
         
-        return jsonify({
+        resposta = jsonify({
             'success': True,
             'escalas': escalas_simplificadas,
             'total': len(escalas_simplificadas),
@@ -279,7 +313,9 @@ def visualizar_escalas():
                 'ano': ano
             }
         })
-        
+        cache.respostas.gravar(chave_cache, etag, resposta.get_data())
+        return aplicar_validadores(resposta, etag, ultima_modificacao)
+    
     except Exception as e:
         return jsonify({
             'success': False,
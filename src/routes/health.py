@@ -0,0 +1,107 @@
+from flask import Blueprint, jsonify
+from sqlalchemy import text
+import os
+import threading
+import time
+from src.models.user import db
+from src.pool import estatisticas_pool
+from src import cache
+
+health_bp = Blueprint('health', __name__)
+
+# Por quantos segundos o resultado da prontidão é reaproveitado entre sondagens
+CACHE_PRONTIDAO_SEGUNDOS = float(os.environ.get('HEALTH_CACHE_SEGUNDOS', 5))
+
+_lock_prontidao = threading.Lock()
+_ultima_prontidao = {'momento': 0.0, 'resultado': None}
+
+@health_bp.route('/health')
+def health_check():
+    """Health check simples para plataformas de cloud"""
+    return {'status': 'healthy', 'message': 'LouvaMais está funcionando!'}, 200
+
+@health_bp.route('/health/live')
+def health_live():
+    """Vivacidade: o processo responde, sem consultar dependências"""
+    return {'status': 'alive'}, 200
+
+@health_bp.route('/health/ready')
+def health_ready():
+    """Prontidão: verifica o pool e o banco, com a latência de cada etapa
+    
+    O resultado fica em cache por CACHE_PRONTIDAO_SEGUNDOS para que sondagens
+    frequentes da plataforma não gerem carga no banco.
+    """
+    agora = time.monotonic()
+    with _lock_prontidao:
+        resultado = _ultima_prontidao['resultado']
+        if resultado is None or agora - _ultima_prontidao['momento'] >= CACHE_PRONTIDAO_SEGUNDOS:
+            resultado = _verificar_prontidao()
+            _ultima_prontidao.update(momento=agora, resultado=resultado)
+            em_cache = False
+        else:
+            em_cache = True
+    
+    codigo = 200 if resultado['status'] == 'ready' else 503
+    return jsonify(dict(resultado, em_cache=em_cache)), codigo
+
+@health_bp.route('/health/pool')
+def health_pool():
+    """Estado do pool de conexões do banco (em uso, overflow, tempo de espera)"""
+    return {'status': 'healthy', 'pool': estatisticas_pool(db.engine)}, 200
+
+@health_bp.route('/health/cache')
+def health_cache():
+    """Contadores do cache de respostas (acertos, falhas, invalidações)"""
+    return {'status': 'healthy', 'cache': cache.respostas.estatisticas()}, 200
+
+def _verificar_prontidao():
+    """Executa as verificações de dependências e monta o relatório"""
+    dependencias = {}
+    
+    # Pool saturado: novas requisições ficariam esperando uma conexão
+    inicio = time.perf_counter()
+    pool = estatisticas_pool(db.engine)
+    saturado = 'tamanho' in pool and pool['em_uso'] >= pool['tamanho'] + pool['max_overflow']
+    dependencias['pool'] = {
+        'ok': not saturado,
+        'latencia_ms': _milissegundos(inicio),
+        'em_uso': pool.get('em_uso'),
+        'capacidade': pool['tamanho'] + pool['max_overflow'] if 'tamanho' in pool else None
+    }
+    if saturado:
+        dependencias['pool']['erro'] = 'Pool de conexões saturado'
+    
+    # Banco: obter uma conexão e executar SELECT 1, medindo cada etapa.
+    # Com o pool saturado a consulta esperaria até o timeout, então é pulada.
+    if saturado:
+        dependencias['banco'] = {'ok': False, 'erro': 'Não verificado: pool saturado'}
+    else:
+        inicio = time.perf_counter()
+        try:
+            with db.engine.connect() as conexao:
+                conexao_ms = _milissegundos(inicio)
+                inicio_consulta = time.perf_counter()
+                conexao.execute(text('SELECT 1'))
+                consulta_ms = _milissegundos(inicio_consulta)
+            dependencias['banco'] = {
+                'ok': True,
+                'latencia_ms': _milissegundos(inicio),
+                'conexao_ms': conexao_ms,
+                'consulta_ms': consulta_ms
+            }
+        except Exception as e:
+            dependencias['banco'] = {
+                'ok': False,
+                'latencia_ms': _milissegundos(inicio),
+                'erro': str(e)
+            }
+    
+    pronto = all(dependencia['ok'] for dependencia in dependencias.values())
+    return {
+        'status': 'ready' if pronto else 'unavailable',
+        'dependencias': dependencias
+    }
+
+def _milissegundos(inicio):
+    return round((time.perf_counter() - inicio) * 1000, 3)
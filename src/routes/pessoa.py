@@ -2,7 +2,11 @@ from flask import Blueprint, request, jsonify
 from src.models.user import db
 from src.models.pessoa import Pessoa, Equipe, PessoaEquipe
 from src.models.escala_pessoa import EscalaPessoa
+from src.models.escala import Escala
+from src import cache
+from src.busca import filtro_nome, buscar_pessoas as buscar_pessoas_por_nome, resultados_dict, LIMITE_PADRAO
 from sqlalchemy import or_
+from src.condicional import calcular_validadores, responder_se_nao_modificado, aplicar_validadores, resumos_pessoas_equipes
 
 pessoa_bp = Blueprint('pessoa', __name__)
 
@@ -17,25 +21,55 @@ def listar_pessoas():
         equipe_id = request.args.get('equipe_id', type=int)
         ativo = request.args.get('ativo', 'true').lower() == 'true'
         
+        etag, ultima_modificacao = calcular_validadores(*resumos_pessoas_equipes())
+        nao_modificado = responder_se_nao_modificado(etag, ultima_modificacao)
+        if nao_modificado:
+            return nao_modificado
+        
         query = Pessoa.query.filter_by(ativo=ativo)
         
         if busca:
-            query = query.filter(
-                or_(
-                    Pessoa.nome.ilike(f'%{busca}%'),
-                    Pessoa.email.ilike(f'%{busca}%'),
-                    Pessoa.telefone.ilike(f'%{busca}%')
-                )
-            )
+            # Nome pela coluna normalizada (sem acentos); e-mail e telefone por trecho
+            criterios = [
+                Pessoa.email.ilike(f'%{busca}%'),
+                Pessoa.telefone.ilike(f'%{busca}%')
+            ]
+            criterio_nome = filtro_nome(busca)
+            if criterio_nome is not None:
+                criterios.append(criterio_nome)
+            query = query.filter(or_(*criterios))
         
         if equipe_id:
             query = query.join(PessoaEquipe).filter(PessoaEquipe.equipe_id == equipe_id)
         
         pessoas = query.order_by(Pessoa.nome).all()
         
+        return aplicar_validadores(jsonify({
+            'success': True,
+            'pessoas': Pessoa.to_dict_lista(pessoas),
+            'total': len(pessoas)
+        }), etag, ultima_modificacao)
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@pessoa_bp.route('/pessoas/buscar', methods=['GET'])
+def buscar_pessoas():
+    """Busca rápida por nome (digitação): prefixos das palavras, sem diferença de acentos"""
+    try:
+        texto = request.args.get('q', '')
+        limite = request.args.get('limite', LIMITE_PADRAO, type=int)
+        equipe_id = request.args.get('equipe_id', type=int)
+        ativo = request.args.get('ativo', 'true').lower() == 'true'
+        
+        pessoas = buscar_pessoas_por_nome(texto, limite=limite, ativo=ativo, equipe_id=equipe_id)
+        
         return jsonify({
             'success': True,
-            'pessoas': [pessoa.to_dict() for pessoa in pessoas],
+            'pessoas': resultados_dict(pessoas),
             'total': len(pessoas)
         })
     
@@ -75,7 +109,7 @@ def criar_pessoa():
             }), 400
         
         # Verificar se já existe pessoa com o mesmo nome
-        pessoa_existente = Pessoa.query.filter_by(nome=data['nome']).first()
+        pessoa_existente = Pessoa.query.filter(Pessoa.com_nome(data['nome'])).first()
         if pessoa_existente:
             return jsonify({
                 'success': False,
@@ -124,11 +158,14 @@ def atualizar_pessoa(pessoa_id):
         pessoa = Pessoa.query.get_or_404(pessoa_id)
         data = request.get_json()
         
+        # O nome aparece nas escalas em que a pessoa está: o cache desses meses muda
+        nome_alterado = 'nome' in data and data['nome'] != pessoa.nome
+        
         # Atualizar campos se fornecidos
         if 'nome' in data:
             # Verificar se já existe outra pessoa com o mesmo nome
             pessoa_existente = Pessoa.query.filter(
-                Pessoa.nome == data['nome'],
+                Pessoa.com_nome(data['nome']),
                 Pessoa.id != pessoa_id
             ).first()
             if pessoa_existente:
@@ -162,6 +199,13 @@ def atualizar_pessoa(pessoa_id):
         
         db.session.commit()
         
+        if nome_alterado:
+            cache.invalidar_periodos([
+                dia for (dia,) in db.session.query(Escala.data).join(
+                    EscalaPessoa, EscalaPessoa.escala_id == Escala.id
+                ).filter(EscalaPessoa.pessoa_id == pessoa_id).distinct()
+            ])
+        
         return jsonify({
             'success': True,
             'pessoa': pessoa.to_dict(),
@@ -208,13 +252,18 @@ def listar_equipes():
     try:
         ativo = request.args.get('ativo', 'true').lower() == 'true'
         
+        etag, ultima_modificacao = calcular_validadores(*resumos_pessoas_equipes())
+        nao_modificado = responder_se_nao_modificado(etag, ultima_modificacao)
+        if nao_modificado:
+            return nao_modificado
+        
         equipes = Equipe.query.filter_by(ativo=ativo).order_by(Equipe.nome).all()
         
-        return jsonify({
+        return aplicar_validadores(jsonify({
             'success': True,
-            'equipes': [equipe.to_dict() for equipe in equipes],
+            'equipes': Equipe.to_dict_lista(equipes),
             'total': len(equipes)
-        })
+        }), etag, ultima_modificacao)
     
     except Exception as e:
         return jsonify({
@@ -228,11 +277,14 @@ def obter_equipe(equipe_id):
     try:
         equipe = Equipe.query.get_or_404(equipe_id)
         
-        # Incluir pessoas da equipe
-        pessoas = [pe.pessoa.to_dict() for pe in equipe.pessoas if pe.pessoa and pe.pessoa.ativo]
+        # Incluir pessoas ativas da equipe, na ordem em que entraram
+        pessoas = Pessoa.query.join(PessoaEquipe).filter(
+            PessoaEquipe.equipe_id == equipe_id,
+            Pessoa.ativo.is_(True)
+        ).order_by(PessoaEquipe.id).all()
         
-        equipe_dict = equipe.to_dict()
-        equipe_dict['pessoas'] = pessoas
+        equipe_dict = equipe.to_dict(total_pessoas=len(pessoas))
+        equipe_dict['pessoas'] = Pessoa.to_dict_lista(pessoas)
         
         return jsonify({
             'success': True,
@@ -388,7 +440,7 @@ def inicializar_equipes():
         return jsonify({
             'success': True,
             'message': f'{len(equipes_criadas)} equipes inicializadas com sucesso',
-            'equipes': [equipe.to_dict() for equipe in equipes_criadas]
+            'equipes': Equipe.to_dict_lista(equipes_criadas)
         })
     
     except Exception as e:
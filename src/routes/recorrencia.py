@@ -0,0 +1,194 @@
+from flask import Blueprint, request, jsonify
+from datetime import datetime, date
+import click
+from src.models.user import db
+from src.models.recorrencia import RegraRecorrencia, DIAS_SEMANA_SUPORTADOS, criar_regras_padrao, estender_escalas
+from src import cache
+
+recorrencia_bp = Blueprint('recorrencia', __name__)
+
+@recorrencia_bp.route('/recorrencias', methods=['GET'])
+def listar_regras():
+    """Lista as regras de recorrência dos encontros"""
+    try:
+        regras = RegraRecorrencia.query.order_by(RegraRecorrencia.dia_semana, RegraRecorrencia.horario).all()
+        
+        return jsonify({
+            'success': True,
+            'regras': [regra.to_dict() for regra in regras],
+            'total': len(regras)
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@recorrencia_bp.route('/recorrencias', methods=['POST'])
+def criar_regra():
+    """Cria uma nova regra de recorrência"""
+    try:
+        data = request.get_json() or {}
+        
+        # Validar dados obrigatórios
+        if data.get('dia_semana') is None or not data.get('data_inicio'):
+            return jsonify({
+                'success': False,
+                'error': 'dia_semana e data_inicio são obrigatórios'
+            }), 400
+        
+        regra = RegraRecorrencia()
+        erro = _aplicar_dados_regra(regra, data)
+        if erro:
+            return jsonify({
+                'success': False,
+                'error': erro
+            }), 400
+        
+        db.session.add(regra)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'regra': regra.to_dict(),
+            'message': 'Regra criada com sucesso'
+        }), 201
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@recorrencia_bp.route('/recorrencias/<int:regra_id>', methods=['PUT'])
+def atualizar_regra(regra_id):
+    """Atualiza uma regra de recorrência existente"""
+    try:
+        regra = RegraRecorrencia.query.get_or_404(regra_id)
+        data = request.get_json() or {}
+        
+        erro = _aplicar_dados_regra(regra, data)
+        if erro:
+            return jsonify({
+                'success': False,
+                'error': erro
+            }), 400
+        
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'regra': regra.to_dict(),
+            'message': 'Regra atualizada com sucesso'
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@recorrencia_bp.route('/recorrencias/<int:regra_id>', methods=['DELETE'])
+def deletar_regra(regra_id):
+    """Desativa uma regra de recorrência (soft delete); as escalas já criadas são mantidas"""
+    try:
+        regra = RegraRecorrencia.query.get_or_404(regra_id)
+        
+        regra.ativo = False
+        
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Regra removida com sucesso'
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@recorrencia_bp.route('/escalas/estender', methods=['POST'])
+def estender():
+    """Cria as escalas que faltam até a data informada (padrão: fim do ano corrente)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        try:
+            ate = _data_limite(data.get('ate'))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'ate deve estar no formato AAAA-MM-DD'
+            }), 400
+        
+        criadas = estender_escalas(ate)
+        db.session.commit()
+        if criadas:
+            cache.invalidar()
+        
+        return jsonify({
+            'success': True,
+            'total_escalas': criadas,
+            'ate': ate.strftime('%Y-%m-%d'),
+            'message': f'{criadas} escalas criadas até {ate.strftime("%d/%m/%Y")}'
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _data_limite(valor):
+    """Converte a data limite (AAAA-MM-DD); sem valor, usa 31/12 do ano corrente"""
+    if not valor:
+        return date(date.today().year, 12, 31)
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+def _aplicar_dados_regra(regra, data):
+    """Copia os campos informados para a regra; retorna a mensagem de erro, se houver"""
+    try:
+        if 'dia_semana' in data:
+            if isinstance(data['dia_semana'], bool):
+                raise ValueError
+            dia_semana = int(data['dia_semana'])
+            if dia_semana not in DIAS_SEMANA_SUPORTADOS:
+                return 'dia_semana deve ser 1 (terça) ou 2 (quarta), os dias com funções definidas'
+            regra.dia_semana = dia_semana
+        if 'horario' in data:
+            regra.horario = datetime.strptime(data['horario'], '%H:%M').time()
+        if 'data_inicio' in data:
+            regra.data_inicio = datetime.strptime(data['data_inicio'], '%Y-%m-%d').date()
+        if 'data_fim' in data:
+            regra.data_fim = datetime.strptime(data['data_fim'], '%Y-%m-%d').date() if data['data_fim'] else None
+        if 'excecoes' in data:
+            regra.set_excecoes(datetime.strptime(valor, '%Y-%m-%d').date() for valor in data['excecoes'])
+        if 'ativo' in data:
+            regra.ativo = bool(data['ativo'])
+    except (TypeError, ValueError):
+        return 'Dados inválidos: use datas AAAA-MM-DD e horário HH:MM'
+    return None
+
+# ===== COMANDO DE LINHA DE COMANDO =====
+
+@recorrencia_bp.cli.command('estender')
+@click.option('--ate', default=None, help='Data limite (AAAA-MM-DD); padrão: fim do ano corrente')
+@click.option('--criar-regras-padrao', 'regras_padrao', is_flag=True,
+              help='Cria as regras de terça e quarta às 19h se não houver nenhuma')
+def estender_comando(ate, regras_padrao):
+    """Estende o calendário de escalas; seguro para rodar repetidamente (cron)"""
+    ate = _data_limite(ate)
+    if regras_padrao:
+        criar_regras_padrao()
+    criadas = estender_escalas(ate)
+    db.session.commit()
+    if criadas:
+        cache.invalidar()
+    click.echo(f'{criadas} escalas criadas até {ate.strftime("%d/%m/%Y")}')
@@ -0,0 +1,304 @@
+from flask import Blueprint, request, jsonify
+from datetime import datetime, date, timedelta
+import heapq
+from src.models.user import db
+from src.models.escala import Escala, FUNCOES
+from src.models.escala_pessoa import EscalaPessoa
+from src.models.pessoa import Pessoa, Equipe, PessoaEquipe
+from src import cache
+
+rodizio_bp = Blueprint('rodizio', __name__)
+
+# Funções escaladas em cada dia da semana
+FUNCOES_TERCA = ('pregacao', 'musicos', 'conducao_animacao', 'acolhida')
+FUNCOES_QUARTA = ('abastecimento',)
+
+# Equipe padrão (criada em /equipes/inicializar) de onde sai cada função
+EQUIPES_PADRAO = {
+    'pregacao': 'Pregação',
+    'musicos': 'Músicos',
+    'conducao_animacao': 'Condução de Animação/Oração',
+    'acolhida': 'Acolhida',
+    'abastecimento': 'Abastecimento'
+}
+
+# Quantidade padrão de pessoas por função
+QUANTIDADES_PADRAO = {
+    'pregacao': 1,
+    'musicos': 3,
+    'conducao_animacao': 1,
+    'acolhida': 2,
+    'abastecimento': 1
+}
+
+# Em quantos dias o peso de uma atribuição antiga cai pela metade
+MEIA_VIDA_DIAS = 28
+
+# Quantos dias antes do início entram no histórico de carga
+DIAS_HISTORICO = 180
+
+@rodizio_bp.route('/escalas/gerar', methods=['POST'])
+def gerar_escalas():
+    """Preenche automaticamente as escalas de um período com rodízio entre os membros das equipes
+    
+    Corpo: {"data_inicio": "AAAA-MM-DD", "data_fim": "AAAA-MM-DD",
+    "quantidades": {funcao: n}, "equipes": {funcao: equipe_id}, "confirmar": false}.
+    Sem "confirmar" apenas retorna a prévia; vagas já preenchidas são mantidas.
+    """
+    try:
+        data = request.get_json() or {}
+        
+        # Validar período
+        try:
+            data_inicio = datetime.strptime(data['data_inicio'], '%Y-%m-%d').date()
+            data_fim = datetime.strptime(data['data_fim'], '%Y-%m-%d').date()
+        except (KeyError, TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'data_inicio e data_fim são obrigatórios no formato AAAA-MM-DD'
+            }), 400
+        
+        if data_fim < data_inicio:
+            return jsonify({
+                'success': False,
+                'error': 'data_fim deve ser posterior a data_inicio'
+            }), 400
+        
+        # Validar quantidades por função
+        informadas = data.get('quantidades') or {}
+        if not isinstance(informadas, dict):
+            return jsonify({
+                'success': False,
+                'error': 'quantidades deve ser um objeto {funcao: quantidade}'
+            }), 400
+        quantidades = dict(QUANTIDADES_PADRAO)
+        quantidades.update(informadas)
+        for funcao, quantidade in quantidades.items():
+            if funcao not in FUNCOES:
+                return jsonify({
+                    'success': False,
+                    'error': f'Função inválida: {funcao}'
+                }), 400
+            # bool é int em Python, mas true/false não são quantidades
+            if not isinstance(quantidade, int) or isinstance(quantidade, bool) or not 0 <= quantidade <= 10:
+                return jsonify({
+                    'success': False,
+                    'error': 'A quantidade por função deve ser um número inteiro entre 0 e 10'
+                }), 400
+        
+        equipes_por_funcao, erro = _equipes_por_funcao(data.get('equipes') or {})
+        if erro:
+            return jsonify({
+                'success': False,
+                'error': erro
+            }), 400
+        
+        plano = gerar_rodizio(data_inicio, data_fim, quantidades, equipes_por_funcao)
+        
+        confirmar = bool(data.get('confirmar'))
+        if confirmar:
+            _gravar_plano(plano['atribuicoes'])
+            db.session.commit()
+            cache.invalidar_periodos({
+                datetime.strptime(item['data'], '%Y-%m-%d').date() for item in plano['atribuicoes']
+            })
+        
+        return jsonify({
+            'success': True,
+            'confirmado': confirmar,
+            'atribuicoes': plano['atribuicoes'],
+            'total_atribuicoes': sum(len(item['pessoas']) for item in plano['atribuicoes']),
+            'vagas_nao_preenchidas': plano['vagas_nao_preenchidas'],
+            'message': 'Escalas preenchidas com sucesso' if confirmar else 'Prévia do rodízio gerada'
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _equipes_por_funcao(equipes_informadas):
+    """Resolve a equipe de cada função: a informada no corpo ou a equipe padrão pelo nome
+    
+    Retorna (equipes_por_funcao, mensagem de erro); as equipes informadas
+    precisam ser ids de equipes existentes e ativas.
+    """
+    if not isinstance(equipes_informadas, dict):
+        return {}, 'equipes deve ser um objeto {funcao: equipe_id}'
+    
+    equipes = {
+        equipe.nome: equipe.id
+        for equipe in Equipe.query.filter_by(ativo=True).with_entities(Equipe.nome, Equipe.id)
+    }
+    ativas = set(equipes.values())
+    
+    for funcao, equipe_id in equipes_informadas.items():
+        if funcao not in FUNCOES:
+            return {}, f'Função inválida: {funcao}'
+        if not isinstance(equipe_id, int) or isinstance(equipe_id, bool) or equipe_id not in ativas:
+            return {}, f'Equipe da função {funcao} não encontrada ou inativa'
+    
+    equipes_por_funcao = {}
+    for funcao in FUNCOES:
+        if funcao in equipes_informadas:
+            equipes_por_funcao[funcao] = equipes_informadas[funcao]
+        elif EQUIPES_PADRAO[funcao] in equipes:
+            equipes_por_funcao[funcao] = equipes[EQUIPES_PADRAO[funcao]]
+    return equipes_por_funcao, None
+
+def gerar_rodizio(data_inicio, data_fim, quantidades, equipes_por_funcao):
+    """Monta o rodízio do período sem gravar nada
+    
+    Carrega escalas, atribuições existentes, membros das equipes e histórico
+    recente em quatro consultas e distribui as vagas em memória: para cada
+    vaga escolhe o membro ativo da equipe com a menor carga recente (cada
+    atribuição pesa 1 e perde metade do peso a cada MEIA_VIDA_DIAS), sem
+    colocar a mesma pessoa em duas funções na mesma noite.
+    """
+    escalas = db.session.query(Escala.id, Escala.data, Escala.dia_semana).filter(
+        Escala.data >= data_inicio,
+        Escala.data <= data_fim
+    ).order_by(Escala.data).all()
+    
+    # Atribuições já existentes nas escalas do período
+    existentes = {}
+    if escalas:
+        for escala_id, funcao, pessoa_id in db.session.query(
+            EscalaPessoa.escala_id, EscalaPessoa.funcao, EscalaPessoa.pessoa_id
+        ).filter(EscalaPessoa.escala_id.in_([escala.id for escala in escalas])):
+            existentes.setdefault(escala_id, {}).setdefault(funcao, []).append(pessoa_id)
+    
+    # Membros ativos de cada equipe envolvida
+    membros_por_equipe = {}
+    nomes = {}
+    if equipes_por_funcao:
+        for equipe_id, pessoa_id, nome in db.session.query(
+            PessoaEquipe.equipe_id, Pessoa.id, Pessoa.nome
+        ).join(Pessoa, Pessoa.id == PessoaEquipe.pessoa_id).filter(
+            PessoaEquipe.equipe_id.in_(set(equipes_por_funcao.values())),
+            Pessoa.ativo.is_(True)
+        ):
+            membros_por_equipe.setdefault(equipe_id, []).append(pessoa_id)
+            nomes[pessoa_id] = nome
+    
+    # Carga de cada pessoa: (peso acumulado, data de referência do peso)
+    cargas = {}
+    
+    def carga_em(pessoa_id, dia):
+        peso, referencia = cargas.get(pessoa_id, (0.0, dia))
+        return peso * 0.5 ** ((dia - referencia).days / MEIA_VIDA_DIAS)
+    
+    def registrar(pessoa_id, dia):
+        cargas[pessoa_id] = (carga_em(pessoa_id, dia) + 1, dia)
+    
+    # Histórico recente antes do período
+    for pessoa_id, dia in db.session.query(EscalaPessoa.pessoa_id, Escala.data).join(
+        Escala, Escala.id == EscalaPessoa.escala_id
+    ).filter(
+        Escala.data >= data_inicio - timedelta(days=DIAS_HISTORICO),
+        Escala.data < data_inicio
+    ).order_by(Escala.data):
+        registrar(pessoa_id, dia)
+    
+    atribuicoes = []
+    vagas_nao_preenchidas = []
+    for escala in escalas:
+        funcoes_do_dia = FUNCOES_TERCA if 'terça' in escala.dia_semana.lower() else FUNCOES_QUARTA
+        atuais = existentes.get(escala.id, {})
+        
+        # Quem já está escalado na noite conta carga e não pode ser escalado de novo
+        ocupados = set()
+        for pessoas_ids in atuais.values():
+            for pessoa_id in pessoas_ids:
+                registrar(pessoa_id, escala.data)
+                ocupados.add(pessoa_id)
+        
+        for funcao in funcoes_do_dia:
+            vagas = quantidades.get(funcao, 0) - len(atuais.get(funcao, []))
+            if vagas <= 0:
+                continue
+            
+            candidatos = [
+                pessoa_id for pessoa_id in membros_por_equipe.get(equipes_por_funcao.get(funcao), [])
+                if pessoa_id not in ocupados
+            ]
+            # Menor carga primeiro; no empate, quem foi escalado há mais tempo
+            escolhidos = heapq.nsmallest(
+                vagas,
+                candidatos,
+                key=lambda pessoa_id: (
+                    carga_em(pessoa_id, escala.data),
+                    cargas[pessoa_id][1] if pessoa_id in cargas else date.min,
+                    pessoa_id
+                )
+            )
+            
+            for pessoa_id in escolhidos:
+                registrar(pessoa_id, escala.data)
+                ocupados.add(pessoa_id)
+            
+            if escolhidos:
+                atribuicoes.append({
+                    'escala_id': escala.id,
+                    'data': escala.data.strftime('%Y-%m-%d'),
+                    'funcao': funcao,
+                    'pessoas': [{'id': pessoa_id, 'nome': nomes[pessoa_id]} for pessoa_id in escolhidos]
+                })
+            if len(escolhidos) < vagas:
+                vagas_nao_preenchidas.append({
+                    'escala_id': escala.id,
+                    'data': escala.data.strftime('%Y-%m-%d'),
+                    'funcao': funcao,
+                    'vagas': vagas - len(escolhidos)
+                })
+    
+    return {
+        'atribuicoes': atribuicoes,
+        'vagas_nao_preenchidas': vagas_nao_preenchidas
+    }
+
+def _gravar_plano(atribuicoes):
+    """Grava as atribuições do rodízio com um INSERT em massa. Não faz commit.
+    
+    Usa INSERT ... ON CONFLICT DO NOTHING sobre a restrição única de
+    escala_pessoa (como estender_escalas): uma atribuição gravada ao mesmo
+    tempo por outra alteração é mantida em vez de derrubar o rodízio.
+    """
+    linhas = [
+        {'escala_id': item['escala_id'], 'pessoa_id': pessoa['id'], 'funcao': item['funcao'], 'confirmado': False}
+        for item in atribuicoes
+        for pessoa in item['pessoas']
+    ]
+    if not linhas:
+        return
+    
+    dialeto = db.session.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+    
+    if insert is not None:
+        db.session.execute(
+            insert(EscalaPessoa).on_conflict_do_nothing(index_elements=['escala_id', 'pessoa_id', 'funcao']),
+            linhas
+        )
+    else:
+        # Outros bancos: descarta as atribuições existentes com uma consulta antes de inserir
+        existentes = set(db.session.query(
+            EscalaPessoa.escala_id, EscalaPessoa.pessoa_id, EscalaPessoa.funcao
+        ).filter(EscalaPessoa.escala_id.in_({linha['escala_id'] for linha in linhas})).all())
+        linhas = [
+            linha for linha in linhas
+            if (linha['escala_id'], linha['pessoa_id'], linha['funcao']) not in existentes
+        ]
+        if linhas:
+            db.session.execute(db.insert(EscalaPessoa), linhas)
+    
+    Escala.query.filter(Escala.id.in_({item['escala_id'] for item in atribuicoes})).update(
+        {Escala.updated_at: datetime.utcnow()}, synchronize_session=False
+    )
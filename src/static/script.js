@@ -1,18 +1,111 @@
 // ===== VARIÁVEIS GLOBAIS =====
-let escalas = [];
+// Todas as escalas já recebidas, por id; trocar o filtro não apaga este conjunto
+const escalasPorId = new Map();
+// Visão atual: ids das escalas do filtro em exibição, na ordem da lista
+let idsEscalasVisiveis = [];
 let pessoas = [];
 let equipes = [];
 let escalaAtual = null;
 let funcaoAtual = null;
 
+// Busca de pessoas no servidor enquanto o usuário digita
+const ATRASO_BUSCA_PESSOAS_MS = 200;
+const LIMITE_BUSCA_PESSOAS = 50;
+let temporizadorBuscaSelecao = null;
+let sequenciaBuscaSelecao = 0;
+let resultadosSelecao = [];
+
+// Paginação por cursor das escalas
+const TAMANHO_PAGINA_ESCALAS = 30;
+let proximoCursorEscalas = null;
+let carregandoMaisEscalas = false;
+// Muda a cada recarga da lista (filtros); respostas de uma geração anterior são descartadas
+let geracaoEscalas = 0;
+
 // ===== INICIALIZAÇÃO =====
 document.addEventListener('DOMContentLoaded', function() {
     inicializarEventListeners();
-    carregarEscalas();
-    carregarPessoas();
-    carregarEquipes();
+    inicializarCarregamentoIncremental();
+    carregarDadosIniciais();
+    registrarServiceWorker();
 });
 
+// Escalas, pessoas e equipes em uma única requisição (/api/bootstrap)
+async function carregarDadosIniciais() {
+    const url = `/api/bootstrap?${parametrosEscalas()}`;
+    const antecipado = lerBootstrapAntecipado(url);
+    const geracao = geracaoEscalas;
+    
+    try {
+        if (antecipado) {
+            // Mostra na hora o que a página de entrada já buscou e só revalida
+            // (o servidor responde 304 se nada mudou desde então)
+            respostasEmCache.set(url, {
+                etag: antecipado.etag,
+                ultimaModificacao: antecipado.ultimaModificacao,
+                texto: antecipado.texto
+            });
+            hidratarDadosIniciais(JSON.parse(antecipado.texto));
+        } else {
+            mostrarLoading(true);
+        }
+        
+        const data = await apiRequest(url);
+        const emCache = respostasEmCache.get(url);
+        if (geracao !== geracaoEscalas) {
+            // Os filtros mudaram durante a requisição: as escalas daqui são de outro período
+            hidratarPessoasEquipes(data);
+        } else if (!antecipado || !emCache || emCache.texto !== antecipado.texto) {
+            hidratarDadosIniciais(data);
+        }
+    } catch (error) {
+        console.error('Erro ao carregar dados iniciais:', error);
+        // Sem o bootstrap, carrega cada parte separadamente
+        carregarEscalas();
+        carregarPessoas();
+        carregarEquipes();
+    } finally {
+        mostrarLoading(false);
+    }
+}
+
+// Dados guardados por entrada.html, usados uma única vez e só se recentes
+const CHAVE_BOOTSTRAP_ANTECIPADO = 'louvamais:bootstrap';
+const VALIDADE_BOOTSTRAP_ANTECIPADO_MS = 60000;
+
+function lerBootstrapAntecipado(url) {
+    try {
+        const salvo = JSON.parse(sessionStorage.getItem(CHAVE_BOOTSTRAP_ANTECIPADO));
+        sessionStorage.removeItem(CHAVE_BOOTSTRAP_ANTECIPADO);
+        if (salvo && salvo.url === url && Date.now() - salvo.salvoEm < VALIDADE_BOOTSTRAP_ANTECIPADO_MS) {
+            return salvo;
+        }
+    } catch (error) {
+        console.error('Dados iniciais antecipados inválidos:', error);
+    }
+    return null;
+}
+
+function hidratarDadosIniciais(data) {
+    definirEscalasVisiveis(data.escalas || []);
+    proximoCursorEscalas = data.next_cursor || null;
+    hidratarPessoasEquipes(data);
+}
+
+function hidratarPessoasEquipes(data) {
+    equipes = data.equipes || [];
+    
+    // As pessoas vêm com os ids das equipes; o restante do sistema usa os nomes
+    const nomesEquipes = new Map(equipes.map(equipe => [equipe.id, equipe.nome]));
+    pessoas = (data.pessoas || []).map(pessoa => ({
+        ...pessoa,
+        equipes: pessoa.equipe_ids.map(id => nomesEquipes.get(id)).filter(Boolean)
+    }));
+    
+    renderizarPessoas();
+    renderizarEquipes();
+}
+
 // ===== EVENT LISTENERS =====
 function inicializarEventListeners() {
     // Botões principais
@@ -73,20 +166,51 @@ function inicializarEventListeners() {
 }
 
 // ===== FUNÇÕES DE API =====
+// Respostas GET guardadas por URL com seus validadores (ETag/Last-Modified):
+// na próxima requisição o servidor responde 304 sem corpo se nada mudou
+const respostasEmCache = new Map();
+
 async function apiRequest(url, options = {}) {
+    const metodo = (options.method || 'GET').toUpperCase();
+    const emCache = metodo === 'GET' ? respostasEmCache.get(url) : null;
+    
+    const headersCondicionais = {};
+    if (emCache) {
+        if (emCache.etag) headersCondicionais['If-None-Match'] = emCache.etag;
+        if (emCache.ultimaModificacao) headersCondicionais['If-Modified-Since'] = emCache.ultimaModificacao;
+    }
+    
     try {
         const response = await fetch(url, {
             headers: {
                 'Content-Type': 'application/json',
+                ...headersCondicionais,
                 ...options.headers
             },
             ...options
         });
         
-        const data = await response.json();
+        if (response.status === 304 && emCache) {
+            // Cada chamada recebe sua própria cópia dos dados
+            return JSON.parse(emCache.texto);
+        }
+        
+        const texto = await response.text();
+        const data = JSON.parse(texto);
         
         if (!response.ok) {
-            throw new Error(data.error || 'Erro na requisição');
+            const erro = new Error(data.error || 'Erro na requisição');
+            erro.status = response.status;
+            erro.dados = data;
+            throw erro;
+        }
+        
+        if (metodo === 'GET') {
+            const etag = response.headers.get('ETag');
+            const ultimaModificacao = response.headers.get('Last-Modified');
+            if (etag || ultimaModificacao) {
+                respostasEmCache.set(url, { etag, ultimaModificacao, texto });
+            }
         }
         
         return data;
@@ -98,21 +222,72 @@ async function apiRequest(url, options = {}) {
 }
 
 // ===== FUNÇÕES DE ESCALAS =====
+function parametrosEscalas(cursor = null) {
+    // compacto: sem os campos legados, que a listagem não usa
+    const params = new URLSearchParams({ limit: TAMANHO_PAGINA_ESCALAS, compacto: 1 });
+    const mes = document.getElementById('filtro-mes').value;
+    const ano = document.getElementById('filtro-ano').value;
+    
+    if (mes) params.set('mes', mes);
+    if (ano) params.set('ano', ano);
+    if (cursor) params.set('after', cursor);
+    
+    return params.toString();
+}
+
 async function carregarEscalas() {
+    // Nova geração: páginas ainda a caminho pertencem aos filtros anteriores
+    const geracao = ++geracaoEscalas;
+    proximoCursorEscalas = null;
+    carregandoMaisEscalas = false;
+    
     try {
         mostrarLoading(true);
-        const data = await apiRequest('/api/escalas');
-        escalas = data.escalas || [];
-        renderizarEscalas();
+        const data = await apiRequest(`/api/escalas?${parametrosEscalas()}`);
+        if (geracao !== geracaoEscalas) return;
+        proximoCursorEscalas = data.next_cursor || null;
+        definirEscalasVisiveis(data.escalas || []);
     } catch (error) {
         console.error('Erro ao carregar escalas:', error);
     } finally {
-        mostrarLoading(false);
+        if (geracao === geracaoEscalas) mostrarLoading(false);
     }
 }
 
+async function carregarMaisEscalas() {
+    if (!proximoCursorEscalas || carregandoMaisEscalas) return;
+    
+    const geracao = geracaoEscalas;
+    carregandoMaisEscalas = true;
+    try {
+        const data = await apiRequest(`/api/escalas?${parametrosEscalas(proximoCursorEscalas)}`);
+        // Página dos filtros anteriores: não entra na lista nem troca o cursor
+        if (geracao !== geracaoEscalas) return;
+        proximoCursorEscalas = data.next_cursor || null;
+        acrescentarEscalasVisiveis(data.escalas || []);
+    } catch (error) {
+        console.error('Erro ao carregar mais escalas:', error);
+    } finally {
+        if (geracao === geracaoEscalas) carregandoMaisEscalas = false;
+    }
+}
+
+function inicializarCarregamentoIncremental() {
+    // Busca a próxima página quando o fim da lista se aproxima da tela
+    const sentinela = document.getElementById('escalas-sentinela');
+    if (!sentinela || !('IntersectionObserver' in window)) return;
+    
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            carregarMaisEscalas();
+        }
+    }, { rootMargin: '400px 0px' });
+    
+    observer.observe(sentinela);
+}
+
 async function inicializarEscalas() {
-    if (confirm('Deseja inicializar as escalas? Isso criará todas as datas até dezembro de 2025.')) {
+    if (confirm('Deseja inicializar as escalas? Isso criará as datas que ainda faltam até dezembro deste ano.')) {
         try {
             const data = await apiRequest('/api/escalas/inicializar', { method: 'POST' });
             mostrarToast(data.message, 'success');
@@ -125,12 +300,14 @@ async function inicializarEscalas() {
 
 async function salvarEscala() {
     if (!escalaAtual) return;
+    const escalaId = escalaAtual.id;
     
     try {
-        // Coletar dados das pessoas selecionadas
+        // Coletar dados das pessoas selecionadas nas funções do dia da escala
         const pessoasPorFuncao = {};
+        const camposDia = escalaAtual.dia_semana.includes('Terça') ? '#campos-terca' : '#campos-quarta';
         
-        document.querySelectorAll('.pessoas-selector').forEach(selector => {
+        document.querySelectorAll(`${camposDia} .pessoas-selector`).forEach(selector => {
             const funcao = selector.dataset.funcao;
             const pessoasIds = [];
             
@@ -144,24 +321,104 @@ async function salvarEscala() {
             pessoasPorFuncao[funcao] = pessoasIds;
         });
         
-        // Salvar cada função separadamente
-        for (const [funcao, pessoasIds] of Object.entries(pessoasPorFuncao)) {
-            if (pessoasIds.length > 0) {
-                await apiRequest(`/api/escalas/${escalaAtual.id}/pessoas/funcao`, {
-                    method: 'PUT',
-                    body: JSON.stringify({
-                        funcao: funcao,
-                        pessoas_ids: pessoasIds
-                    })
-                });
-            }
+        // Salvar todas as funções em uma única requisição; o updated_at
+        // recebido permite ao servidor recusar a gravação se houve outra alteração
+        const data = await apiRequest(`/api/escalas/${escalaId}/pessoas`, {
+            method: 'PUT',
+            body: JSON.stringify({ funcoes: pessoasPorFuncao, updated_at: escalaAtual.updated_at })
+        });
+        
+        fecharModalEscala();
+        if (data.pendente) {
+            // Sem conexão: o service worker guardou a alteração e a envia depois
+            mostrarToast(data.message, 'info');
+            atualizarEscala({ id: escalaId, ...nomesPorFuncao(pessoasPorFuncao) });
+            return;
         }
         
         mostrarToast('Escala atualizada com sucesso!', 'success');
-        fecharModalEscala();
-        carregarEscalas();
+        // Só o cartão desta escala é refeito, com os dados devolvidos pela API
+        atualizarEscala(data.escala);
     } catch (error) {
         console.error('Erro ao salvar escala:', error);
+        if (error.status === 409) {
+            // Conflito: mostra a versão atual da escala para a pessoa conferir
+            fecharModalEscala();
+            atualizarEscala(error.dados.escala);
+        }
+    }
+}
+
+// Campos *_display de uma escala a partir dos ids escolhidos em cada função
+function nomesPorFuncao(pessoasPorFuncao) {
+    const nomes = new Map(pessoas.map(pessoa => [pessoa.id, pessoa.nome]));
+    const campos = {};
+    Object.entries(pessoasPorFuncao).forEach(([funcao, ids]) => {
+        campos[`${funcao}_display`] = ids.map(id => nomes.get(id)).filter(Boolean).join(', ');
+    });
+    return campos;
+}
+
+// ===== SERVICE WORKER (USO SEM CONEXÃO) =====
+function registrarServiceWorker() {
+    if (!('serviceWorker' in navigator)) return;
+    
+    navigator.serviceWorker.register('/sw.js').catch(error => {
+        console.error('Erro ao registrar o service worker:', error);
+    });
+    navigator.serviceWorker.addEventListener('message', tratarMensagemServiceWorker);
+    
+    // Alterações feitas sem conexão são enviadas quando ela volta (e ao abrir o sistema)
+    window.addEventListener('online', pedirSincronizacao);
+    navigator.serviceWorker.ready.then(pedirSincronizacao);
+}
+
+function pedirSincronizacao() {
+    const controlador = navigator.serviceWorker.controller;
+    if (controlador) controlador.postMessage({ tipo: 'sincronizar' });
+}
+
+function tratarMensagemServiceWorker(event) {
+    const mensagem = event.data || {};
+    if (mensagem.tipo === 'fila-sincronizada') {
+        informarSincronizacao(mensagem);
+    } else if (mensagem.tipo === 'api-atualizada') {
+        atualizarDadosRevalidados(mensagem.url);
+    }
+}
+
+function informarSincronizacao({ aplicadas, conflitos, rejeitadas }) {
+    if (aplicadas) {
+        mostrarToast(`${aplicadas} escala(s) alterada(s) sem conexão foram salvas`, 'success');
+    }
+    if (conflitos.length) {
+        mostrarToast(`${conflitos.length} escala(s) foram alteradas por outra pessoa enquanto você estava sem conexão; suas alterações nelas não foram aplicadas`, 'error');
+    }
+    if (rejeitadas.length) {
+        mostrarToast(`${rejeitadas.length} escala(s) alterada(s) sem conexão não puderam ser salvas`, 'error');
+    }
+}
+
+// O service worker respondeu com uma cópia antiga e a revalidação trouxe
+// outra versão: busca de novo (agora a cópia nova) só o que esta página usa
+async function atualizarDadosRevalidados(url) {
+    if (!respostasEmCache.has(url)) return;
+    const caminho = url.split('?')[0];
+    
+    try {
+        if (caminho === '/api/pessoas') {
+            await carregarPessoas();
+        } else if (caminho === '/api/equipes') {
+            await carregarEquipes();
+        } else {
+            const data = await apiRequest(url);
+            // Atualiza os cartões sem trocar a lista visível nem a rolagem
+            guardarEscalas(data.escalas || []);
+            renderizarEscalas();
+            if (caminho === '/api/bootstrap') hidratarPessoasEquipes(data);
+        }
+    } catch (error) {
+        console.error('Erro ao atualizar dados revalidados:', error);
     }
 }
 
@@ -199,46 +456,253 @@ async function inicializarEquipes() {
 }
 
 // ===== FUNÇÕES DE RENDERIZAÇÃO =====
+function guardarEscalas(lista) {
+    lista.forEach(escala => escalasPorId.set(escala.id, escala));
+    return lista.map(escala => escala.id);
+}
+
+function definirEscalasVisiveis(lista) {
+    idsEscalasVisiveis = guardarEscalas(lista);
+    // Outra visão: as linhas têm outros cartões e as alturas medidas não valem mais
+    alturasLinhasEscalas = [];
+    renderizarEscalas();
+}
+
+function acrescentarEscalasVisiveis(lista) {
+    idsEscalasVisiveis = idsEscalasVisiveis.concat(guardarEscalas(lista));
+    renderizarEscalas();
+}
+
+function atualizarEscala(escala) {
+    if (!escala) return;
+    escalasPorId.set(escala.id, { ...escalasPorId.get(escala.id), ...escala });
+    renderizarEscalas();
+}
+
+// Lista virtualizada: só os cartões das linhas próximas da tela ficam no DOM e
+// dois espaçadores ocupam a altura das demais. Os cartões são guardados por id
+// com a versão do conteúdo e só são recriados quando ela muda.
+const LINHAS_EXTRAS_ESCALAS = 3;
+const ALTURA_ESTIMADA_LINHA_ESCALA = 320;
+const cartoesEscalas = new Map();
+let alturasLinhasEscalas = [];
+let colunasEscalas = 1;
+let faixaEscalasRenderizada = null;
+let quadroEscalasAgendado = false;
+let espacadorTopoEscalas = null;
+let espacadorFimEscalas = null;
+
+window.addEventListener('scroll', agendarJanelaEscalas, { passive: true });
+window.addEventListener('resize', () => {
+    alturasLinhasEscalas = [];
+    agendarJanelaEscalas();
+});
+
 function renderizarEscalas() {
     const container = document.getElementById('escalas-container');
     const emptyState = document.getElementById('empty-state');
     
-    if (escalas.length === 0) {
+    if (idsEscalasVisiveis.length === 0) {
         container.style.display = 'none';
         emptyState.style.display = 'block';
+        container.replaceChildren();
+        faixaEscalasRenderizada = null;
         return;
     }
     
     container.style.display = 'block';
     emptyState.style.display = 'none';
     
-    container.innerHTML = escalas.map(escala => {
-        const isPreenchida = verificarEscalaPreenchida(escala);
-        const statusClass = isPreenchida ? 'preenchida' : 'vazia';
-        const statusText = isPreenchida ? 'Preenchida' : 'Vazia';
-        
-        return `
-            <div class="escala-card ${escala.dia_semana.toLowerCase().includes('terça') ? 'terca' : 'quarta'}">
-                <div class="escala-header">
-                    <div class="escala-data">
-                        <h3>${escala.data_formatada}</h3>
-                        <span class="dia-semana">${escala.dia_semana}</span>
-                    </div>
-                    <div class="escala-status ${statusClass}">
-                        ${statusText}
-                    </div>
-                </div>
-                <div class="escala-content">
-                    ${renderizarCamposEscala(escala)}
+    desenharJanelaEscalas(true);
+}
+
+function agendarJanelaEscalas() {
+    if (quadroEscalasAgendado || idsEscalasVisiveis.length === 0) return;
+    quadroEscalasAgendado = true;
+    requestAnimationFrame(() => {
+        quadroEscalasAgendado = false;
+        desenharJanelaEscalas(false);
+    });
+}
+
+function layoutEscalas(container) {
+    const estilo = getComputedStyle(container);
+    const emGrade = estilo.display === 'grid';
+    const trilhas = estilo.gridTemplateColumns;
+    return {
+        colunas: emGrade && trilhas && trilhas !== 'none' ? trilhas.split(' ').length : 1,
+        espaco: emGrade ? parseFloat(estilo.rowGap) || 0 : 0
+    };
+}
+
+function desenharJanelaEscalas(dadosMudaram) {
+    const container = document.getElementById('escalas-container');
+    const { colunas, espaco } = layoutEscalas(container);
+    if (colunas !== colunasEscalas) {
+        colunasEscalas = colunas;
+        alturasLinhasEscalas = [];
+    }
+    
+    const totalLinhas = Math.ceil(idsEscalasVisiveis.length / colunas);
+    const medidas = alturasLinhasEscalas.filter(Boolean);
+    const estimativa = medidas.length
+        ? medidas.reduce((soma, altura) => soma + altura, 0) / medidas.length
+        : ALTURA_ESTIMADA_LINHA_ESCALA;
+    const alturaLinha = linha => alturasLinhasEscalas[linha] || estimativa;
+    
+    // Linhas que cruzam a área visível da janela
+    const inicioVisivel = -container.getBoundingClientRect().top;
+    const fimVisivel = inicioVisivel + window.innerHeight;
+    let primeira = totalLinhas - 1;
+    let ultima = totalLinhas - 1;
+    let y = 0;
+    let encontrouPrimeira = false;
+    for (let linha = 0; linha < totalLinhas; linha++) {
+        const altura = alturaLinha(linha);
+        if (!encontrouPrimeira && y + altura > inicioVisivel) {
+            primeira = linha;
+            encontrouPrimeira = true;
+        }
+        if (y > fimVisivel) {
+            ultima = linha - 1;
+            break;
+        }
+        y += altura;
+    }
+    primeira = Math.max(0, primeira - LINHAS_EXTRAS_ESCALAS);
+    ultima = Math.min(totalLinhas - 1, Math.max(ultima, primeira) + LINHAS_EXTRAS_ESCALAS);
+    
+    const mesmaFaixa = faixaEscalasRenderizada &&
+        faixaEscalasRenderizada[0] === primeira && faixaEscalasRenderizada[1] === ultima;
+    if (mesmaFaixa && !dadosMudaram) return;
+    faixaEscalasRenderizada = [primeira, ultima];
+    
+    let alturaAcima = 0;
+    for (let linha = 0; linha < primeira; linha++) alturaAcima += alturaLinha(linha);
+    let alturaAbaixo = 0;
+    for (let linha = ultima + 1; linha < totalLinhas; linha++) alturaAbaixo += alturaLinha(linha);
+    
+    espacadorTopoEscalas = espacadorTopoEscalas || criarEspacadorEscalas();
+    espacadorFimEscalas = espacadorFimEscalas || criarEspacadorEscalas();
+    ajustarEspacadorEscalas(espacadorTopoEscalas, alturaAcima, espaco);
+    ajustarEspacadorEscalas(espacadorFimEscalas, alturaAbaixo, espaco);
+    
+    // Cartões que entram pela rolagem aparecem sem a animação de entrada
+    const cartoes = idsEscalasVisiveis
+        .slice(primeira * colunas, (ultima + 1) * colunas)
+        .map(id => obterCartaoEscala(escalasPorId.get(id), !dadosMudaram));
+    
+    sincronizarFilhos(container, [espacadorTopoEscalas, ...cartoes, espacadorFimEscalas]);
+    medirLinhasEscalas(primeira, cartoes, colunas, espaco);
+    
+    // Descarta cartões guardados que saíram da visão atual
+    if (dadosMudaram && cartoesEscalas.size > idsEscalasVisiveis.length) {
+        const visiveis = new Set(idsEscalasVisiveis);
+        for (const id of cartoesEscalas.keys()) {
+            if (!visiveis.has(id)) cartoesEscalas.delete(id);
+        }
+    }
+}
+
+function criarEspacadorEscalas() {
+    const espacador = document.createElement('div');
+    espacador.className = 'escalas-espacador';
+    espacador.setAttribute('aria-hidden', 'true');
+    return espacador;
+}
+
+function ajustarEspacadorEscalas(espacador, altura, espaco) {
+    // Na grade o espaçador também ganha um espaçamento entre linhas
+    espacador.style.display = altura > 0 ? '' : 'none';
+    espacador.style.height = `${Math.max(0, altura - espaco)}px`;
+}
+
+function sincronizarFilhos(container, elementos) {
+    // Remove primeiro os que saíram: assim os que ficam nunca são movidos
+    // (mover um elemento reinicia a animação e o trabalho de layout)
+    const manter = new Set(elementos);
+    Array.from(container.children).forEach(filho => {
+        if (!manter.has(filho)) filho.remove();
+    });
+    
+    let referencia = container.firstElementChild;
+    elementos.forEach(elemento => {
+        if (elemento === referencia) {
+            referencia = referencia.nextElementSibling;
+        } else {
+            container.insertBefore(elemento, referencia);
+        }
+    });
+}
+
+function medirLinhasEscalas(primeira, cartoes, colunas, espaco) {
+    for (let indice = 0; indice < cartoes.length; indice += colunas) {
+        const linha = primeira + indice / colunas;
+        const proximo = cartoes[indice + colunas];
+        if (proximo) {
+            alturasLinhasEscalas[linha] = proximo.offsetTop - cartoes[indice].offsetTop;
+        } else {
+            const daLinha = cartoes.slice(indice, indice + colunas);
+            alturasLinhasEscalas[linha] = Math.max(...daLinha.map(cartao => cartao.offsetHeight)) + espaco;
+        }
+    }
+}
+
+function versaoCartaoEscala(escala) {
+    return [
+        escala.data_formatada, escala.dia_semana, escala.updated_at,
+        escala.pregacao_display, escala.musicos_display, escala.conducao_animacao_display,
+        escala.acolhida_display, escala.abastecimento_display
+    ].join('|');
+}
+
+function obterCartaoEscala(escala, semAnimacao) {
+    const versao = versaoCartaoEscala(escala);
+    const guardado = cartoesEscalas.get(escala.id);
+    if (guardado && guardado.versao === versao) {
+        if (semAnimacao) guardado.elemento.classList.add('sem-animacao');
+        return guardado.elemento;
+    }
+    
+    const modelo = document.createElement('template');
+    modelo.innerHTML = htmlCartaoEscala(escala).trim();
+    const elemento = modelo.content.firstElementChild;
+    if (semAnimacao) elemento.classList.add('sem-animacao');
+    
+    // Um cartão refeito no lugar do antigo não muda de posição na lista
+    if (guardado && guardado.elemento.parentNode) {
+        guardado.elemento.replaceWith(elemento);
+    }
+    cartoesEscalas.set(escala.id, { elemento, versao });
+    return elemento;
+}
+
+function htmlCartaoEscala(escala) {
+    const isPreenchida = verificarEscalaPreenchida(escala);
+    const statusClass = isPreenchida ? 'preenchida' : 'vazia';
+    const statusText = isPreenchida ? 'Preenchida' : 'Vazia';
+    
+    return `
+        <div class="escala-card ${escala.dia_semana.toLowerCase().includes('terça') ? 'terca' : 'quarta'}" data-escala-id="${escala.id}">
+            <div class="escala-header">
+                <div class="escala-data">
+                    <h3>${escala.data_formatada}</h3>
+                    <span class="dia-semana">${escala.dia_semana}</span>
                 </div>
-                <div class="escala-actions">
-                    <button class="btn btn-primary" onclick="editarEscala(${escala.id})">
-                        <i class="fas fa-edit"></i> Editar
-                    </button>
+                <div class="escala-status ${statusClass}">
+                    ${statusText}
                 </div>
             </div>
-        `;
-    }).join('');
+            <div class="escala-content">
+                ${renderizarCamposEscala(escala)}
+            </div>
+            <div class="escala-actions">
+                <button class="btn btn-primary" onclick="editarEscala(${escala.id})">
+                    <i class="fas fa-edit"></i> Editar
+                </button>
+            </div>
+        </div>
+    `;
 }
 
 function renderizarCamposEscala(escala) {
@@ -353,7 +817,7 @@ function mostrarModalPessoas() {
 }
 
 function editarEscala(escalaId) {
-    escalaAtual = escalas.find(e => e.id === escalaId);
+    escalaAtual = escalasPorId.get(escalaId);
     if (!escalaAtual) return;
     
     // Preencher dados básicos
@@ -409,11 +873,9 @@ function mostrarSelecaoPessoas(funcao) {
     document.getElementById('modal-selecionar-pessoas').style.display = 'flex';
 }
 
-function renderizarSelecaoPessoas(filtro = '') {
+function renderizarSelecaoPessoas(lista = pessoas) {
     const container = document.getElementById('lista-selecao-pessoas');
-    const pessoasFiltradas = pessoas.filter(pessoa => 
-        pessoa.nome.toLowerCase().includes(filtro.toLowerCase())
-    );
+    resultadosSelecao = lista;
     
     // Obter pessoas já selecionadas
     const pessoasSelecionadas = [];
@@ -424,7 +886,7 @@ function renderizarSelecaoPessoas(filtro = '') {
         });
     }
     
-    container.innerHTML = pessoasFiltradas.map(pessoa => `
+    container.innerHTML = lista.map(pessoa => `
         <div class="pessoa-selecao-item">
             <input type="checkbox" 
                    id="pessoa-${pessoa.id}" 
@@ -451,7 +913,7 @@ function confirmarSelecaoPessoas() {
     
     checkboxes.forEach(checkbox => {
         const pessoaId = parseInt(checkbox.value);
-        const pessoa = pessoas.find(p => p.id === pessoaId);
+        const pessoa = pessoas.find(p => p.id === pessoaId) || resultadosSelecao.find(p => p.id === pessoaId);
         if (pessoa) {
             adicionarPessoaTag(container, pessoa);
         }
@@ -510,7 +972,27 @@ function filtrarPessoas(filtro) {
 }
 
 function filtrarSelecaoPessoas(filtro) {
-    renderizarSelecaoPessoas(filtro);
+    // Espera uma pausa na digitação e descarta respostas de buscas anteriores
+    clearTimeout(temporizadorBuscaSelecao);
+    const sequencia = ++sequenciaBuscaSelecao;
+    const texto = filtro.trim();
+    
+    if (!texto) {
+        renderizarSelecaoPessoas();
+        return;
+    }
+    
+    temporizadorBuscaSelecao = setTimeout(async () => {
+        try {
+            const params = new URLSearchParams({ q: texto, limite: LIMITE_BUSCA_PESSOAS });
+            const data = await apiRequest(`/api/pessoas/buscar?${params}`);
+            if (sequencia === sequenciaBuscaSelecao) {
+                renderizarSelecaoPessoas(data.pessoas || []);
+            }
+        } catch (error) {
+            console.error('Erro ao buscar pessoas:', error);
+        }
+    }, ATRASO_BUSCA_PESSOAS_MS);
 }
 
 function mostrarLoading(show) {
@@ -558,13 +1040,14 @@ function mostrarToast(message, type = 'info') {
 async function mostrarEstatisticas() {
     try {
         const data = await apiRequest('/api/escalas/estatisticas');
+        const estatisticas = data.estatisticas;
         
-        document.getElementById('stat-total').textContent = data.total_escalas;
-        document.getElementById('stat-tercas').textContent = data.tercas;
-        document.getElementById('stat-quartas').textContent = data.quartas;
-        document.getElementById('stat-preenchidas').textContent = data.escalas_preenchidas;
-        document.getElementById('stat-vazias').textContent = data.escalas_vazias;
-        document.getElementById('stat-progresso').textContent = data.progresso + '%';
+        document.getElementById('stat-total').textContent = estatisticas.total_escalas;
+        document.getElementById('stat-tercas').textContent = estatisticas.total_tercas;
+        document.getElementById('stat-quartas').textContent = estatisticas.total_quartas;
+        document.getElementById('stat-preenchidas').textContent = estatisticas.escalas_preenchidas;
+        document.getElementById('stat-vazias').textContent = estatisticas.escalas_vazias;
+        document.getElementById('stat-progresso').textContent = estatisticas.progresso + '%';
         
         document.getElementById('modal-estatisticas').style.display = 'flex';
     } catch (error) {
@@ -574,27 +1057,8 @@ async function mostrarEstatisticas() {
 
 // ===== FUNÇÕES DE FILTRO =====
 function aplicarFiltros() {
-    const mes = document.getElementById('filtro-mes').value;
-    const ano = document.getElementById('filtro-ano').value;
-    
-    let escalasFiltradas = [...escalas];
-    
-    if (mes) {
-        escalasFiltradas = escalasFiltradas.filter(escala => {
-            const dataEscala = new Date(escala.data);
-            return dataEscala.getMonth() + 1 === parseInt(mes);
-        });
-    }
-    
-    if (ano) {
-        escalasFiltradas = escalasFiltradas.filter(escala => {
-            const dataEscala = new Date(escala.data);
-            return dataEscala.getFullYear() === parseInt(ano);
-        });
-    }
-    
-    escalas = escalasFiltradas;
-    renderizarEscalas();
+    // Os filtros de mês e ano são aplicados pelo servidor
+    carregarEscalas();
 }
 
 function limparFiltros() {
@@ -621,11 +1085,13 @@ function mostrarModalExportacao() {
     if (mes) filtros += `&mes=${mes}`;
     if (ano) filtros += `&ano=${ano}`;
     
+    const meses = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+                  'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'];
     let periodoTexto = 'todas as escalas';
     if (mes && ano) {
-        const meses = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-                      'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'];
         periodoTexto = `${meses[parseInt(mes)]} de ${ano}`;
+    } else if (mes) {
+        periodoTexto = `${meses[parseInt(mes)]} de todos os anos`;
     } else if (ano) {
         periodoTexto = `ano ${ano}`;
     }
@@ -0,0 +1,326 @@
+// Service worker do LouvaMais: o sistema continua usável com conexão ruim ou sem conexão
+//
+// - Páginas (/ e /sistema): vêm da rede quando possível e da cópia guardada
+//   quando não; os arquivos que elas referenciam (styles, script, logo, com
+//   hash no nome) são imutáveis e vêm direto do cache
+// - GET de /api/escalas, /api/pessoas, /api/equipes e /api/bootstrap:
+//   stale-while-revalidate. A última resposta guardada é entregue na hora e
+//   revalidada em seguida (If-None-Match); se mudou, as páginas são avisadas
+//   com a mensagem 'api-atualizada'
+// - PUT /api/escalas/<id>/pessoas sem conexão: a alteração vai para uma fila
+//   no IndexedDB (uma entrada por escala) e é reenviada a
+//   /api/escalas/pessoas/lote quando a conexão volta (Background Sync, ou a
+//   mensagem 'sincronizar' das páginas). Cada item leva o updated_at em que a
+//   edição se baseou; se a escala mudou no servidor, ele recusa como conflito
+//
+// Este arquivo não recebe hash no nome (o endereço do service worker precisa
+// ser fixo) e é servido com Cache-Control: no-cache.
+
+const CACHE_SHELL = 'louvamais-shell-v1';
+const CACHE_API = 'louvamais-api-v1';
+const PAGINAS_SHELL = ['/', '/sistema'];
+const APIS_EM_CACHE = ['/api/escalas', '/api/pessoas', '/api/equipes', '/api/bootstrap'];
+const ROTA_PESSOAS_ESCALA = /^\/api\/escalas\/(\d+)\/pessoas$/;
+const ARQUIVO_VERSIONADO = /\.[0-9a-f]{10}\.\w+$/;
+// Arquivos locais referenciados pelas páginas (src="/..." e href="/...")
+const REFERENCIAS = /(?:src|href)="(\/[^\/"][^"]*)"/g;
+
+const BANCO_FILA = 'louvamais';
+const TABELA_FILA = 'escalas_pendentes';
+const TAG_SINCRONIZACAO = 'escalas-pendentes';
+
+// ===== CICLO DE VIDA =====
+self.addEventListener('install', event => {
+    event.waitUntil(
+        prepararShell()
+            .catch(error => console.error('Erro ao guardar o shell do sistema:', error))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        // Caches de versões anteriores deste service worker
+        const nomes = await caches.keys();
+        await Promise.all(
+            nomes.filter(nome => nome.startsWith('louvamais-') && nome !== CACHE_SHELL && nome !== CACHE_API)
+                .map(nome => caches.delete(nome))
+        );
+        await self.clients.claim();
+    })());
+});
+
+self.addEventListener('fetch', event => {
+    const requisicao = event.request;
+    const url = new URL(requisicao.url);
+    if (url.origin !== self.location.origin) return;
+    
+    if (requisicao.method === 'GET') {
+        if (requisicao.mode === 'navigate') {
+            event.respondWith(navegar(event, url));
+        } else if (APIS_EM_CACHE.includes(url.pathname)) {
+            event.respondWith(staleWhileRevalidate(event, url));
+        } else if (ARQUIVO_VERSIONADO.test(url.pathname)) {
+            event.respondWith(arquivoVersionado(requisicao));
+        }
+        return;
+    }
+    
+    if (url.pathname.startsWith('/api/')) {
+        event.respondWith(escrever(event, url));
+    }
+});
+
+self.addEventListener('sync', event => {
+    if (event.tag === TAG_SINCRONIZACAO) {
+        event.waitUntil(sincronizarFila());
+    }
+});
+
+self.addEventListener('message', event => {
+    if (event.data && event.data.tipo === 'sincronizar') {
+        event.waitUntil(sincronizarFila().catch(error => console.error('Erro ao enviar a fila:', error)));
+    }
+});
+
+// ===== SHELL =====
+async function guardarPagina(cache, caminho, resposta) {
+    // Guarda a página e os arquivos que ela referencia; devolve esses arquivos
+    const html = await resposta.clone().text();
+    await cache.put(caminho, resposta);
+    
+    const arquivos = [...html.matchAll(REFERENCIAS)].map(referencia => referencia[1]);
+    await Promise.all(arquivos.map(async arquivo => {
+        if (!(await cache.match(arquivo))) await cache.add(arquivo);
+    }));
+    return arquivos;
+}
+
+async function prepararShell() {
+    const cache = await caches.open(CACHE_SHELL);
+    const usados = new Set(PAGINAS_SHELL);
+    
+    for (const pagina of PAGINAS_SHELL) {
+        const resposta = await fetch(pagina, { cache: 'no-cache' });
+        if (resposta.ok) {
+            (await guardarPagina(cache, pagina, resposta)).forEach(arquivo => usados.add(arquivo));
+        }
+    }
+    
+    // Arquivos com hash antigo não são mais referenciados
+    for (const requisicao of await cache.keys()) {
+        if (!usados.has(new URL(requisicao.url).pathname)) await cache.delete(requisicao);
+    }
+}
+
+async function navegar(event, url) {
+    try {
+        const resposta = await fetch(event.request);
+        if (resposta.ok && PAGINAS_SHELL.includes(url.pathname)) {
+            // Mantém a cópia da página em dia (e guarda arquivos de um novo deploy)
+            event.waitUntil(
+                caches.open(CACHE_SHELL).then(cache => guardarPagina(cache, url.pathname, resposta.clone()))
+                    .catch(error => console.error('Erro ao guardar a página:', error))
+            );
+        }
+        return resposta;
+    } catch (error) {
+        const cache = await caches.open(CACHE_SHELL);
+        return (await cache.match(url.pathname)) || (await cache.match('/sistema')) || Response.error();
+    }
+}
+
+async function arquivoVersionado(requisicao) {
+    const cache = await caches.open(CACHE_SHELL);
+    const guardado = await cache.match(requisicao);
+    if (guardado) return guardado;
+    
+    const resposta = await fetch(requisicao);
+    if (resposta.ok) await cache.put(requisicao, resposta.clone());
+    return resposta;
+}
+
+// ===== LEITURAS DA API =====
+async function staleWhileRevalidate(event, url) {
+    const cache = await caches.open(CACHE_API);
+    const chave = url.pathname + url.search;
+    const guardada = await cache.match(chave, { ignoreVary: true });
+    const revalidacao = revalidar(cache, chave, guardada);
+    
+    if (guardada) {
+        event.waitUntil(revalidacao.catch(() => {}));
+        return guardada.clone();
+    }
+    return revalidacao;
+}
+
+async function revalidar(cache, chave, guardada) {
+    const headers = {};
+    const etag = guardada && guardada.headers.get('ETag');
+    if (etag) headers['If-None-Match'] = etag;
+    
+    const resposta = await fetch(chave, { headers, cache: 'no-store' });
+    if (resposta.status === 304 && guardada) return guardada;
+    
+    if (resposta.ok) {
+        await cache.put(chave, resposta.clone());
+        if (guardada) avisarPaginas({ tipo: 'api-atualizada', url: chave });
+    }
+    return resposta;
+}
+
+async function revalidarCacheApi() {
+    // Depois de uma gravação as cópias guardadas podem estar desatualizadas
+    const cache = await caches.open(CACHE_API);
+    const requisicoes = await cache.keys();
+    await Promise.all(requisicoes.map(async requisicao => {
+        const url = new URL(requisicao.url);
+        const chave = url.pathname + url.search;
+        try {
+            await revalidar(cache, chave, await cache.match(requisicao));
+        } catch (error) {
+            // Sem conexão: fica a cópia atual até a próxima revalidação
+        }
+    }));
+}
+
+async function avisarPaginas(mensagem) {
+    const paginas = await self.clients.matchAll({ type: 'window' });
+    paginas.forEach(pagina => pagina.postMessage(mensagem));
+}
+
+// ===== GRAVAÇÕES =====
+async function escrever(event, url) {
+    const requisicao = event.request;
+    const alteracaoEscala = requisicao.method === 'PUT' && ROTA_PESSOAS_ESCALA.test(url.pathname);
+    const corpo = alteracaoEscala ? await requisicao.clone().json().catch(() => null) : null;
+    
+    try {
+        const resposta = await fetch(requisicao);
+        if (resposta.ok) event.waitUntil(revalidarCacheApi());
+        return resposta;
+    } catch (error) {
+        // Só as alterações de pessoas das escalas vão para a fila
+        if (!corpo || !corpo.funcoes) throw error;
+        
+        const escalaId = Number(url.pathname.match(ROTA_PESSOAS_ESCALA)[1]);
+        await enfileirar(escalaId, corpo);
+        if (self.registration.sync) {
+            await self.registration.sync.register(TAG_SINCRONIZACAO).catch(() => {});
+        }
+        
+        return new Response(JSON.stringify({
+            success: true,
+            pendente: true,
+            message: 'Sem conexão: a alteração foi guardada e será enviada quando a conexão voltar'
+        }), { status: 202, headers: { 'Content-Type': 'application/json' } });
+    }
+}
+
+// ===== FILA (INDEXEDDB) =====
+function abrirFila() {
+    return new Promise((resolve, reject) => {
+        const pedido = indexedDB.open(BANCO_FILA, 1);
+        pedido.onupgradeneeded = () => pedido.result.createObjectStore(TABELA_FILA, { keyPath: 'escala_id' });
+        pedido.onsuccess = () => resolve(pedido.result);
+        pedido.onerror = () => reject(pedido.error);
+    });
+}
+
+async function transacaoFila(modo, operar) {
+    // Executa `operar` com a tabela da fila; devolve o resultado do pedido que ela retornar
+    const banco = await abrirFila();
+    return new Promise((resolve, reject) => {
+        const transacao = banco.transaction(TABELA_FILA, modo);
+        const pedido = operar(transacao.objectStore(TABELA_FILA));
+        transacao.oncomplete = () => {
+            banco.close();
+            resolve(pedido ? pedido.result : undefined);
+        };
+        transacao.onerror = () => {
+            banco.close();
+            reject(transacao.error);
+        };
+    });
+}
+
+function enfileirar(escalaId, corpo) {
+    return transacaoFila('readwrite', fila => {
+        const pedido = fila.get(escalaId);
+        pedido.onsuccess = () => {
+            const anterior = pedido.result;
+            fila.put({
+                escala_id: escalaId,
+                // Vale a versão em que a primeira alteração sem conexão se baseou
+                updated_at: anterior ? anterior.updated_at : corpo.updated_at,
+                funcoes: { ...(anterior ? anterior.funcoes : {}), ...corpo.funcoes },
+                alterado_em: Date.now()
+            });
+        };
+    });
+}
+
+let sincronizacaoEmAndamento = null;
+
+function sincronizarFila() {
+    // Uma sincronização por vez ('sync' e mensagens das páginas podem chegar juntos)
+    if (!sincronizacaoEmAndamento) {
+        sincronizacaoEmAndamento = enviarFila().finally(() => {
+            sincronizacaoEmAndamento = null;
+        });
+    }
+    return sincronizacaoEmAndamento;
+}
+
+async function enviarFila() {
+    const pendentes = await transacaoFila('readonly', fila => fila.getAll());
+    if (!pendentes.length) return;
+    
+    const alteracoes = [];
+    pendentes.forEach(pendente => {
+        Object.entries(pendente.funcoes).forEach(([funcao, pessoasIds]) => {
+            const alteracao = { escala_id: pendente.escala_id, funcao, pessoas_ids: pessoasIds, modo: 'substituir' };
+            if (pendente.updated_at !== undefined) alteracao.updated_at = pendente.updated_at;
+            alteracoes.push(alteracao);
+        });
+    });
+    
+    // Falha de rede ou erro do servidor: a fila fica como está para a próxima tentativa
+    const resposta = await fetch('/api/escalas/pessoas/lote', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ alteracoes })
+    });
+    const data = await resposta.json();
+    if (!resposta.ok) throw new Error(data.error || 'Erro ao enviar a fila');
+    
+    const conflitos = new Set();
+    const rejeitadas = new Set();
+    data.resultados.forEach(resultado => {
+        if (resultado.conflito) conflitos.add(resultado.escala_id);
+        else if (!resultado.success) rejeitadas.add(resultado.escala_id);
+    });
+    // Uma escala com conflito conta só como conflito
+    conflitos.forEach(escalaId => rejeitadas.delete(escalaId));
+    
+    // Tudo o que foi enviado sai da fila, inclusive os conflitos (vale a versão do
+    // servidor); entradas alteradas durante o envio ficam para a próxima vez
+    await transacaoFila('readwrite', fila => {
+        pendentes.forEach(pendente => {
+            const pedido = fila.get(pendente.escala_id);
+            pedido.onsuccess = () => {
+                if (pedido.result && pedido.result.alterado_em === pendente.alterado_em) {
+                    fila.delete(pendente.escala_id);
+                }
+            };
+        });
+    });
+    
+    await avisarPaginas({
+        tipo: 'fila-sincronizada',
+        aplicadas: pendentes.length - conflitos.size - rejeitadas.size,
+        conflitos: [...conflitos],
+        rejeitadas: [...rejeitadas]
+    });
+    await revalidarCacheApi();
+}
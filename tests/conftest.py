@@ -0,0 +1,114 @@
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app(tmp_path_factory, monkeypatch):
+    """Aplicação com um banco SQLite em memória, com todas as revisões do esquema aplicadas"""
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://')
+    monkeypatch.setenv('ESTATICOS_DIR', str(tmp_path_factory.getbasetemp() / 'static_build'))
+    
+    from src.main import create_app
+    from src.models.user import db
+    from src.esquema import atualizar
+    from src import cache
+    
+    app = create_app()
+    with app.app_context():
+        atualizar(db.engine, informar=lambda mensagem: None)
+        cache.invalidar()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def app_postgres(tmp_path_factory, monkeypatch):
+    """Aplicação sobre o PostgreSQL de POSTGRES_URL_TESTES (banco descartável: as tabelas são recriadas)"""
+    url = os.environ.get('POSTGRES_URL_TESTES')
+    if not url:
+        pytest.skip('POSTGRES_URL_TESTES não configurada')
+    monkeypatch.setenv('DATABASE_URL', url)
+    monkeypatch.setenv('ESTATICOS_DIR', str(tmp_path_factory.getbasetemp() / 'static_build'))
+    
+    from src.main import create_app
+    from src.models.user import db
+    from src.esquema import atualizar
+    from src import cache
+    
+    def limpar():
+        db.drop_all()
+        with db.engine.begin() as conexao:
+            conexao.exec_driver_sql('DROP TABLE IF EXISTS schema_revisoes')
+    
+    app = create_app()
+    with app.app_context():
+        limpar()
+        atualizar(db.engine, informar=lambda mensagem: None)
+        cache.invalidar()
+        yield app
+        db.session.remove()
+        limpar()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def contar_consultas(app):
+    """Retorna uma função que executa `acao` e devolve quantos comandos SQL ela enviou ao banco"""
+    from src.models.user import db
+    from src import cache
+    
+    def contar(acao):
+        # Sem o cache de respostas, cada chamada percorre as consultas da rota
+        cache.invalidar()
+        comandos = []
+        
+        def registrar(conexao, cursor, sql, parametros, contexto, executemany):
+            comandos.append(sql)
+        
+        event.listen(db.engine, 'before_cursor_execute', registrar)
+        try:
+            acao()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', registrar)
+        return len(comandos)
+    
+    return contar
+
+
+@pytest.fixture
+def popular(app):
+    """Cria `total` escalas com pessoas em todas as funções, pessoas e equipes com vínculos"""
+    from src.models.user import db
+    from src.models.escala import Escala, FUNCOES
+    from src.models.escala_pessoa import EscalaPessoa
+    from src.models.pessoa import Pessoa, Equipe, PessoaEquipe
+    
+    def criar(total):
+        existentes = Escala.query.count()
+        equipes = [Equipe(nome=f'Equipe {existentes + indice}') for indice in range(3)]
+        pessoas = [Pessoa(nome=f'Pessoa {existentes + indice}') for indice in range(total)]
+        db.session.add_all(equipes + pessoas)
+        db.session.flush()
+        
+        inicio = date(2026, 3, 3) + timedelta(days=7 * existentes)
+        for indice in range(total):
+            escala = Escala(data=inicio + timedelta(days=7 * indice), dia_semana='Terça-feira')
+            db.session.add(escala)
+            db.session.flush()
+            for posicao, funcao in enumerate(FUNCOES):
+                pessoa = pessoas[(indice + posicao) % total]
+                db.session.add(EscalaPessoa(escala_id=escala.id, pessoa_id=pessoa.id, funcao=funcao))
+            db.session.add(PessoaEquipe(pessoa_id=pessoas[indice].id, equipe_id=equipes[indice % 3].id))
+        db.session.commit()
+    
+    return criar
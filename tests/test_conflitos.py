@@ -0,0 +1,43 @@
+"""Versão das escalas (updated_at) e conflitos nas alterações de pessoas"""
+
+
+def versao(client, escala_id):
+    escalas = client.get('/api/escalas?compacto=1').get_json()['escalas']
+    return next(escala['updated_at'] for escala in escalas if escala['id'] == escala_id)
+
+
+def test_alteracoes_de_pessoas_mudam_a_versao(client, popular):
+    popular(3)
+    pessoa_id = client.post('/api/pessoas', json={'nome': 'Nova Pessoa'}).get_json()['pessoa']['id']
+    
+    alteracoes = [
+        lambda: client.post('/api/escalas/1/pessoas', json={'pessoa_id': pessoa_id, 'funcao': 'acolhida'}),
+        lambda: client.delete(f'/api/escalas/1/pessoas/{pessoa_id}/acolhida'),
+        lambda: client.put('/api/escalas/1/pessoas/funcao', json={'funcao': 'acolhida', 'pessoas_ids': [pessoa_id]}),
+        lambda: client.put('/api/escalas/1/pessoas', json={'funcoes': {'acolhida': []}}),
+        lambda: client.post('/api/escalas/pessoas/lote', json={
+            'alteracoes': [{'escala_id': 1, 'funcao': 'acolhida', 'pessoas_ids': [pessoa_id]}]
+        }),
+    ]
+    for alterar in alteracoes:
+        anterior = versao(client, 1)
+        assert alterar().status_code in (200, 201)
+        assert versao(client, 1) != anterior
+
+
+def test_alteracao_com_versao_antiga_e_recusada(client, popular):
+    popular(3)
+    antiga = versao(client, 1)
+    client.delete('/api/escalas/1/pessoas/1/pregacao')
+    
+    resposta = client.put('/api/escalas/1/pessoas', json={'funcoes': {'pregacao': [2]}, 'updated_at': antiga})
+    assert resposta.status_code == 409
+    assert resposta.get_json()['conflito'] is True
+    
+    resposta = client.post('/api/escalas/pessoas/lote', json={'alteracoes': [
+        {'escala_id': 1, 'funcao': 'pregacao', 'pessoas_ids': [2], 'updated_at': antiga},
+        {'escala_id': 2, 'funcao': 'pregacao', 'pessoas_ids': [1], 'updated_at': versao(client, 2)},
+    ]})
+    resultados = resposta.get_json()['resultados']
+    assert resultados[0]['conflito'] is True and resultados[0]['success'] is False
+    assert resultados[1]['success'] is True
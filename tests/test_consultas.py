@@ -0,0 +1,55 @@
+"""Quantidade de comandos SQL das listagens: fixa, qualquer que seja o número de linhas (sem N+1)"""
+import pytest
+
+
+def consultas_da_rota(client, contar_consultas, popular, url, totais=(3, 30)):
+    """Comandos SQL de uma requisição à rota, com `totais[0]` e depois `totais[1]` linhas de cada tipo"""
+    contagens = []
+    anterior = 0
+    for total in totais:
+        popular(total - anterior)
+        anterior = total
+        
+        def requisitar():
+            resposta = client.get(url)
+            assert resposta.status_code == 200
+        
+        contagens.append(contar_consultas(requisitar))
+    return contagens
+
+
+@pytest.mark.parametrize('url, esperado', [
+    # validadores (ETag), escalas, nomes por função
+    ('/api/escalas', 3),
+    ('/api/escalas?compacto=1', 3),
+    # com paginação por cursor
+    ('/api/escalas?limit=10&compacto=1', 3),
+    # validadores, primeira página de escalas, nomes, pessoas, vínculos, equipes, pessoas ativas por equipe
+    ('/api/bootstrap', 7),
+    # pessoas, nomes das equipes, contagem
+    ('/api/pessoas', 3),
+    # equipes, pessoas ativas por equipe, contagem
+    ('/api/equipes', 3),
+])
+def test_listagens_com_consultas_fixas(client, contar_consultas, popular, url, esperado):
+    assert consultas_da_rota(client, contar_consultas, popular, url) == [esperado, esperado]
+
+
+def test_pagina_seguinte_com_consultas_fixas(client, contar_consultas, popular):
+    popular(30)
+    primeira = client.get('/api/escalas?limit=10&compacto=1').get_json()
+    assert primeira['next_cursor']
+    
+    url = f"/api/escalas?limit=10&compacto=1&after={primeira['next_cursor']}"
+    assert contar_consultas(lambda: client.get(url)) == 3
+
+
+def test_304_com_uma_consulta(client, contar_consultas, popular):
+    popular(5)
+    etag = client.get('/api/escalas?compacto=1').headers['ETag']
+    
+    def revalidar():
+        resposta = client.get('/api/escalas?compacto=1', headers={'If-None-Match': etag})
+        assert resposta.status_code == 304
+    
+    assert contar_consultas(revalidar) == 1
@@ -0,0 +1,72 @@
+"""Exportação em texto: o streaming em lotes gera o mesmo arquivo que a montagem em memória"""
+import re
+from datetime import date, datetime, timedelta
+
+import pytest
+
+
+def texto_esperado(escalas, titulo):
+    """Layout da exportação anterior ao streaming: todas as linhas montadas e unidas no fim"""
+    linhas = ["=" * 60, "ESCALA DO GRUPO DE ORAÇÃO", titulo, "=" * 60, ""]
+    
+    escalas_por_mes = {}
+    for escala in escalas:
+        escalas_por_mes.setdefault(escala['data'][:7], []).append(escala)
+    
+    for mes_ano, escalas_mes in escalas_por_mes.items():
+        titulo_mes = datetime.strptime(mes_ano, '%Y-%m').strftime('%B %Y').upper()
+        linhas += [titulo_mes, "-" * len(titulo_mes), ""]
+        for escala in escalas_mes:
+            linhas.append(f"{escala['data_formatada']} - {escala['dia_semana']}")
+            if 'terça' in escala['dia_semana'].lower():
+                campos = (('Pregação', 'pregacao_display'), ('Equipe Músicos', 'musicos_display'),
+                          ('Condução/Oração', 'conducao_animacao_display'), ('Acolhida', 'acolhida_display'))
+                preenchidos = [(rotulo, escala[campo]) for rotulo, campo in campos if escala[campo]]
+                linhas += [f"  {rotulo}: {valor}" for rotulo, valor in preenchidos]
+                if not preenchidos:
+                    linhas.append("  (Escala não preenchida)")
+            elif escala['abastecimento_display']:
+                linhas.append(f"  Responsável Abastecimento: {escala['abastecimento_display']}")
+            else:
+                linhas.append("  (Escala não preenchida)")
+            linhas.append("")
+        linhas.append("")
+    
+    linhas += ["=" * 60, "Relatório gerado em X", "=" * 60]
+    return "\n".join(linhas)
+
+
+@pytest.mark.parametrize('tamanho_lote', [1, 3, 200])
+@pytest.mark.parametrize('parametros, titulo', [
+    ('', 'Todas as escalas'),
+    ('ano=2026', 'Ano 2026'),
+    ('mes=3&ano=2026', 'Março de 2026'),
+])
+def test_texto_igual_ao_da_montagem_em_memoria(client, monkeypatch, tamanho_lote, parametros, titulo):
+    from src.models.user import db
+    from src.models.escala import Escala
+    from src.models.escala_pessoa import EscalaPessoa
+    from src.models.pessoa import Pessoa
+    from src.routes import exportacao_simples
+    
+    ana = Pessoa(nome='Ana')
+    db.session.add(ana)
+    db.session.flush()
+    inicio = date(2025, 12, 2)
+    for semana in range(20):
+        for dia, nome in ((0, 'Terça-feira'), (1, 'Quarta-feira')):
+            escala = Escala(data=inicio + timedelta(days=7 * semana + dia), dia_semana=nome,
+                            acolhida='Zé' if semana % 4 == 0 else None)
+            db.session.add(escala)
+            db.session.flush()
+            if semana % 3 == 0:
+                funcao = 'pregacao' if dia == 0 else 'abastecimento'
+                db.session.add(EscalaPessoa(escala_id=escala.id, pessoa_id=ana.id, funcao=funcao))
+    db.session.commit()
+    
+    # Lotes pequenos terminam no meio e no fim dos meses
+    monkeypatch.setattr(exportacao_simples, 'TAMANHO_LOTE_EXPORTACAO', tamanho_lote)
+    texto = client.get(f'/api/escalas/exportar-texto?{parametros}').get_data(as_text=True)
+    escalas = client.get(f'/api/escalas?{parametros}').get_json()['escalas']
+    
+    assert re.sub(r'gerado em .*', 'gerado em X', texto) == texto_esperado(escalas, titulo)
@@ -0,0 +1,32 @@
+"""Conversão das colunas legadas de texto em pessoas escaladas"""
+from datetime import date
+
+
+def test_coluna_em_parte_encontrada_fica_no_texto_legado(client):
+    from src.models.user import db
+    from src.models.escala import Escala, migrar_campos_legados
+    from src.models.pessoa import Pessoa
+    
+    db.session.add_all([Pessoa(nome='Ana'), Pessoa(nome='Bruno')])
+    db.session.add(Escala(
+        data=date(2026, 3, 3), dia_semana='Terça-feira',
+        pregacao='Ana e bruno', acolhida='Ana, Zé Desconhecido'
+    ))
+    db.session.commit()
+    
+    relatorio = migrar_campos_legados()
+    assert relatorio['atribuicoes_criadas'] == 2
+    assert relatorio['colunas_limpas'] == 1
+    assert relatorio['nao_encontrados'] == {'Zé Desconhecido': 1}
+    
+    compacta = client.get('/api/escalas?compacto=1').get_json()['escalas'][0]
+    assert compacta['pregacao_display'] == 'Ana, Bruno'
+    assert compacta['acolhida_display'] == 'Ana, Zé Desconhecido'
+    
+    completa = client.get('/api/escalas').get_json()['escalas'][0]
+    assert completa['pregacao'] is None
+    assert completa['acolhida'] == 'Ana, Zé Desconhecido'
+    assert completa['acolhida_pessoas'] == []
+    
+    # Repetir não converte a coluna incompleta nem duplica as demais
+    assert migrar_campos_legados()['atribuicoes_criadas'] == 0
@@ -0,0 +1,75 @@
+"""Edição em lote das pessoas de várias escalas (/api/escalas/pessoas/lote)"""
+import pytest
+
+
+def pessoas_da_funcao(escala_id, funcao):
+    from src.models.escala_pessoa import EscalaPessoa
+    
+    return sorted(
+        pessoa_id for (pessoa_id,) in EscalaPessoa.query.with_entities(EscalaPessoa.pessoa_id).filter_by(
+            escala_id=escala_id, funcao=funcao
+        )
+    )
+
+
+def test_itens_malformados_sao_rejeitados_um_a_um(client, popular):
+    popular(12)
+    itens = [
+        {'escala_id': [1], 'funcao': 'acolhida', 'pessoas_ids': [1]},
+        {'escala_id': {'id': 1}, 'funcao': 'acolhida', 'pessoas_ids': [1]},
+        {'escala_id': True, 'funcao': 'acolhida', 'pessoas_ids': [1]},
+        {'escala_id': 1, 'funcao': ['acolhida'], 'pessoas_ids': [1]},
+        {'escala_id': 1, 'funcao': 'acolhida', 'pessoas_ids': [{'id': 1}]},
+        {'escala_id': 1, 'funcao': 'acolhida', 'pessoas_ids': [[1]]},
+        {'escala_id': 1, 'funcao': 'acolhida', 'pessoas_ids': [1], 'modo': ['adicionar']},
+        {'escala_id': 1, 'funcao': 'acolhida', 'pessoas_ids': [1], 'updated_at': {'v': 1}},
+        'não é um objeto',
+        {'escala_id': 2, 'funcao': 'acolhida', 'pessoas_ids': [5, 6]},
+    ]
+    resposta = client.post('/api/escalas/pessoas/lote', json={'alteracoes': itens})
+    assert resposta.status_code == 200
+    resultados = resposta.get_json()['resultados']
+    assert [resultado['success'] for resultado in resultados] == [False] * 9 + [True]
+    assert all(resultado['erro'] for resultado in resultados[:9])
+    assert pessoas_da_funcao(2, 'acolhida') == [5, 6]
+    
+    resposta = client.put('/api/escalas/1/pessoas', json={'funcoes': {'acolhida': [{'id': 1}]}})
+    assert resposta.status_code == 400
+
+
+def test_limite_por_funcao(client, popular):
+    popular(12)
+    atuais = pessoas_da_funcao(1, 'musicos')
+    outras = [pessoa_id for pessoa_id in range(1, 13) if pessoa_id not in atuais]
+    
+    resposta = client.post('/api/escalas/pessoas/lote', json={'alteracoes': [
+        # 1 atual + 10 novas passa do limite
+        {'escala_id': 1, 'funcao': 'musicos', 'pessoas_ids': outras[:10], 'modo': 'adicionar'},
+        {'escala_id': 2, 'funcao': 'musicos', 'pessoas_ids': list(range(1, 12))},
+        {'escala_id': 3, 'funcao': 'musicos', 'pessoas_ids': list(range(1, 11))},
+        {'escala_id': 4, 'funcao': 'musicos', 'pessoas_ids': []},
+        {'escala_id': 5, 'funcao': 'musicos', 'pessoas_ids': outras[:2], 'modo': 'adicionar'},
+    ]})
+    resultados = resposta.get_json()['resultados']
+    assert [resultado['success'] for resultado in resultados] == [False, False, True, True, True]
+    assert pessoas_da_funcao(1, 'musicos') == atuais
+    assert pessoas_da_funcao(3, 'musicos') == list(range(1, 11))
+    assert resultados[2]['inseridos'] == 9 and resultados[2]['removidos'] == 0
+    assert pessoas_da_funcao(4, 'musicos') == []
+    assert resultados[3]['removidos'] == 1
+    assert len(pessoas_da_funcao(5, 'musicos')) == 3
+
+
+@pytest.mark.parametrize('total', [3, 30])
+def test_lote_com_numero_fixo_de_consultas(client, popular, contar_consultas, total):
+    popular(30)
+    alteracoes = [
+        {'escala_id': escala_id, 'funcao': funcao, 'pessoas_ids': [escala_id % 30 + 1, (escala_id + 7) % 30 + 1]}
+        for escala_id in range(1, total + 1) for funcao in ('musicos', 'acolhida')
+    ]
+    comandos = contar_consultas(
+        lambda: client.post('/api/escalas/pessoas/lote', json={'alteracoes': alteracoes})
+    )
+    # escalas, pessoas ativas, contagem agrupada, atribuições das pessoas
+    # informadas, DELETE, INSERT e updated_at das escalas
+    assert comandos == 7
@@ -0,0 +1,118 @@
+"""Filtro de mês/ano: validação dos parâmetros e uso do índice de escalas.data
+
+Os testes de plano no PostgreSQL rodam só com POSTGRES_URL_TESTES apontando
+para um banco descartável (ver o fixture app_postgres).
+"""
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.mark.parametrize('url', [
+    '/api/escalas',
+    '/api/bootstrap',
+    '/api/escalas/exportar-csv',
+    '/api/escalas/exportar-texto',
+    '/api/escalas/visualizar',
+])
+@pytest.mark.parametrize('parametros', ['mes=13&ano=2026', 'mes=0&ano=2026', 'mes=3&ano=0', 'mes=12&ano=9999'])
+def test_periodo_invalido_responde_400(client, url, parametros):
+    resposta = client.get(f'{url}?{parametros}')
+    assert resposta.status_code == 400
+    assert resposta.get_json()['success'] is False
+
+
+def test_periodo_valido(client, popular):
+    popular(3)
+    resposta = client.get('/api/escalas?mes=3&ano=2026')
+    assert resposta.status_code == 200
+    assert [escala['data'] for escala in resposta.get_json()['escalas']] == ['2026-03-03', '2026-03-10', '2026-03-17']
+
+
+def test_filtro_de_periodo_usa_o_indice(app):
+    from src.models.user import db
+    from src.models.escala import Escala
+    
+    consulta = Escala.filtrar_periodo(Escala.query, 3, 2026).order_by(Escala.data).statement
+    sql = str(consulta.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    plano = ' | '.join(linha[-1] for linha in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')))
+    
+    # Busca por faixa no índice de escalas.data, sem varrer a tabela
+    assert 'SEARCH escalas USING' in plano and 'INDEX' in plano
+    assert 'data>? AND data<?' in plano
+    assert 'SCAN escalas' not in plano
+
+
+def test_filtro_de_periodo_usa_o_indice_no_postgres(app_postgres):
+    from src.models.user import db
+    from src.models.escala import Escala
+    
+    # Alguns anos de escalas e estatísticas atualizadas, para o planejador
+    # escolher entre o índice e a leitura da tabela como em produção
+    inicio = date(2020, 1, 7)
+    db.session.execute(db.insert(Escala), [
+        {'data': inicio + timedelta(days=7 * semana + dia), 'dia_semana': nome}
+        for semana in range(52 * 8)
+        for dia, nome in ((0, 'Terça-feira'), (1, 'Quarta-feira'))
+    ])
+    db.session.commit()
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexao:
+        conexao.exec_driver_sql('ANALYZE escalas')
+    
+    # Índice de escalas.data: o da restrição única (escalas_data_key)
+    indice = db.session.execute(db.text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'escalas' AND indexdef LIKE '%(data)'"
+    )).scalar_one()
+    
+    for mes, ano in ((3, 2026), (3, None)):
+        consulta = Escala.filtrar_periodo(Escala.query, mes, ano).order_by(Escala.data).statement
+        sql = str(consulta.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        plano = '\n'.join(linha[0] for linha in db.session.execute(db.text(f'EXPLAIN {sql}')))
+        
+        assert (
+            f'Index Scan using {indice} on escalas' in plano
+            or f'Index Only Scan using {indice} on escalas' in plano
+            or f'Bitmap Index Scan on {indice}' in plano
+        ), plano
+        assert 'Seq Scan on escalas' not in plano, plano
+
+
+def test_mes_sem_ano_filtra_todos_os_anos(client):
+    from src.models.user import db
+    from src.models.escala import Escala
+    
+    for dia in ('2025-03-04', '2025-04-01', '2026-03-03', '2026-12-29', '2027-03-02'):
+        data = date.fromisoformat(dia)
+        db.session.add(Escala(data=data, dia_semana='Terça-feira'))
+    db.session.commit()
+    
+    marco = ['2025-03-04', '2026-03-03', '2027-03-02']
+    for url, esperadas in (
+        ('/api/escalas?mes=3', marco),
+        ('/api/escalas?mes=3&limit=2&compacto=1', marco[:2]),
+        ('/api/bootstrap?mes=3', marco),
+    ):
+        resposta = client.get(url)
+        assert resposta.status_code == 200
+        assert [escala['data'] for escala in resposta.get_json()['escalas']] == esperadas
+    
+    assert client.get('/api/escalas?mes=5').get_json()['escalas'] == []
+    
+    # Uma nova escala de março aparece na listagem já guardada em cache
+    db.session.add(Escala(data=date(2028, 3, 7), dia_semana='Terça-feira'))
+    db.session.commit()
+    datas = [escala['data'] for escala in client.get('/api/escalas?mes=3').get_json()['escalas']]
+    assert datas[-1] == '2028-03-07'
+
+
+def test_mes_sem_ano_usa_o_indice(app, popular):
+    from src.models.user import db
+    from src.models.escala import Escala
+    
+    popular(3)
+    consulta = Escala.filtrar_periodo(Escala.query, 3).order_by(Escala.data).statement
+    sql = str(consulta.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    plano = ' | '.join(linha[-1] for linha in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')))
+    
+    assert 'SEARCH escalas USING' in plano
+    assert 'SCAN escalas' not in plano
@@ -0,0 +1,58 @@
+"""Extensão do calendário: horizontes longos em lotes de INSERT e repetição sem duplicar"""
+from datetime import date, datetime, time
+
+
+def test_estender_horizonte_longo_em_lotes(app, contar_consultas):
+    from src.models.user import db
+    from src.models.escala import Escala
+    from src.models.recorrencia import RegraRecorrencia, estender_escalas, TAMANHO_LOTE_INSERCAO
+    
+    db.session.add_all([
+        RegraRecorrencia(dia_semana=1, horario=time(19, 0), data_inicio=date(2026, 1, 1)),
+        RegraRecorrencia(dia_semana=2, horario=time(19, 0), data_inicio=date(2026, 1, 1)),
+    ])
+    db.session.commit()
+    agora = datetime(2026, 1, 1, 8, 0)
+    ate = date(2055, 12, 31)
+    
+    criadas = []
+    comandos = contar_consultas(lambda: criadas.append(estender_escalas(ate, agora)))
+    db.session.commit()
+    
+    total = Escala.query.count()
+    assert criadas == [total]
+    assert total > 3 * TAMANHO_LOTE_INSERCAO
+    # Uma consulta das regras e um INSERT por lote
+    assert comandos == 1 + -(-total // TAMANHO_LOTE_INSERCAO)
+    
+    # Repetir não cria nem duplica escalas
+    assert estender_escalas(ate, agora) == 0
+    db.session.commit()
+    assert Escala.query.count() == total
+
+
+def test_regra_so_em_dias_com_funcoes(client):
+    for dia_semana in (0, 3, 6, True, 'x'):
+        resposta = client.post('/api/recorrencias', json={'dia_semana': dia_semana, 'data_inicio': '2026-01-01'})
+        assert resposta.status_code == 400
+    
+    resposta = client.post('/api/recorrencias', json={'dia_semana': 2, 'data_inicio': '2026-01-01'})
+    assert resposta.status_code == 201
+    regra_id = resposta.get_json()['regra']['id']
+    assert client.put(f'/api/recorrencias/{regra_id}', json={'dia_semana': 6}).status_code == 400
+
+
+def test_regra_antiga_de_outro_dia_e_ignorada(app):
+    from src.models.user import db
+    from src.models.escala import Escala
+    from src.models.recorrencia import RegraRecorrencia, estender_escalas
+    
+    db.session.add_all([
+        RegraRecorrencia(dia_semana=6, horario=time(19, 0), data_inicio=date(2026, 1, 1)),
+        RegraRecorrencia(dia_semana=1, horario=time(19, 0), data_inicio=date(2026, 1, 1)),
+    ])
+    db.session.commit()
+    
+    estender_escalas(date(2026, 1, 31), datetime(2026, 1, 1, 8, 0))
+    db.session.commit()
+    assert {escala.dia_semana for escala in Escala.query} == {'Terça-feira'}
@@ -0,0 +1,170 @@
+"""Gerador de rodízio (/api/escalas/gerar): distribuição, validação e gravação"""
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def equipes(app):
+    """Cria as equipes padrão do rodízio com `membros[funcao]` pessoas ativas cada; retorna {funcao: [ids]}"""
+    from src.models.user import db
+    from src.models.pessoa import Pessoa, Equipe, PessoaEquipe
+    from src.routes.rodizio import EQUIPES_PADRAO
+    
+    def criar(membros):
+        ids = {}
+        for funcao, total in membros.items():
+            equipe = Equipe(nome=EQUIPES_PADRAO[funcao])
+            pessoas = [Pessoa(nome=f'{funcao} {indice}') for indice in range(total)]
+            db.session.add_all([equipe] + pessoas)
+            db.session.flush()
+            db.session.add_all(PessoaEquipe(pessoa_id=pessoa.id, equipe_id=equipe.id) for pessoa in pessoas)
+            ids[funcao] = [pessoa.id for pessoa in pessoas]
+        db.session.commit()
+        return ids
+    
+    return criar
+
+
+def criar_tercas(inicio, total):
+    from src.models.user import db
+    from src.models.escala import Escala
+    
+    escalas = [Escala(data=inicio + timedelta(days=7 * indice), dia_semana='Terça-feira') for indice in range(total)]
+    db.session.add_all(escalas)
+    db.session.commit()
+    return [escala.id for escala in escalas]
+
+
+def gerar(client, **corpo):
+    corpo.setdefault('data_inicio', '2026-03-01')
+    corpo.setdefault('data_fim', '2026-12-31')
+    return client.post('/api/escalas/gerar', json=corpo)
+
+
+def test_distribui_igualmente_e_ignora_inativos(client, equipes):
+    from src.models.user import db
+    from src.models.pessoa import Pessoa
+    
+    ids = equipes({'pregacao': 3, 'musicos': 6, 'conducao_animacao': 2, 'acolhida': 5})
+    inativo = ids['acolhida'].pop()
+    db.session.get(Pessoa, inativo).ativo = False
+    db.session.commit()
+    criar_tercas(date(2026, 3, 3), 12)
+    
+    resposta = gerar(client)
+    assert resposta.status_code == 200
+    corpo = resposta.get_json()
+    assert corpo['vagas_nao_preenchidas'] == []
+    
+    por_funcao = {funcao: Counter() for funcao in ids}
+    for item in corpo['atribuicoes']:
+        por_funcao[item['funcao']].update(pessoa['id'] for pessoa in item['pessoas'])
+    
+    # 12 noites: pregação 12/3, músicos 36/6, condução 12/2, acolhida 24/4
+    for funcao, membros in ids.items():
+        assert set(por_funcao[funcao]) == set(membros)
+        assert len(set(por_funcao[funcao].values())) == 1
+    assert inativo not in por_funcao['acolhida']
+
+
+def test_historico_recente_pesa_na_escolha(client, equipes):
+    from src.models.user import db
+    from src.models.escala_pessoa import EscalaPessoa
+    
+    ids = equipes({'pregacao': 2})
+    anterior, = criar_tercas(date(2026, 2, 24), 1)
+    db.session.add(EscalaPessoa(escala_id=anterior, pessoa_id=ids['pregacao'][0], funcao='pregacao'))
+    db.session.commit()
+    criar_tercas(date(2026, 3, 3), 2)
+    
+    atribuicoes = gerar(client).get_json()['atribuicoes']
+    escolhidos = [item['pessoas'][0]['id'] for item in atribuicoes if item['funcao'] == 'pregacao']
+    assert escolhidos == [ids['pregacao'][1], ids['pregacao'][0]]
+
+
+def test_mesma_pessoa_nao_fica_em_duas_funcoes_na_noite(client, equipes):
+    from src.models.user import db
+    from src.models.pessoa import Equipe, PessoaEquipe
+    from src.routes.rodizio import EQUIPES_PADRAO
+    
+    ids = equipes({'pregacao': 1})
+    conducao = Equipe(nome=EQUIPES_PADRAO['conducao_animacao'])
+    db.session.add(conducao)
+    db.session.flush()
+    db.session.add(PessoaEquipe(pessoa_id=ids['pregacao'][0], equipe_id=conducao.id))
+    db.session.commit()
+    criar_tercas(date(2026, 3, 3), 1)
+    
+    corpo = gerar(client, quantidades={'musicos': 0, 'acolhida': 0}).get_json()
+    assert [item['funcao'] for item in corpo['atribuicoes']] == ['pregacao']
+    assert [vaga['funcao'] for vaga in corpo['vagas_nao_preenchidas']] == ['conducao_animacao']
+
+
+def test_previa_nao_grava_e_confirmacao_grava_uma_vez(client, equipes):
+    from src.models.escala_pessoa import EscalaPessoa
+    
+    equipes({'pregacao': 2, 'acolhida': 3})
+    criar_tercas(date(2026, 3, 3), 4)
+    
+    previa = gerar(client).get_json()
+    assert previa['confirmado'] is False and previa['total_atribuicoes'] == 12
+    assert EscalaPessoa.query.count() == 0
+    
+    confirmado = gerar(client, confirmar=True).get_json()
+    assert confirmado['confirmado'] is True
+    assert confirmado['atribuicoes'] == previa['atribuicoes']
+    assert EscalaPessoa.query.count() == 12
+    
+    # Vagas já preenchidas são mantidas: nada a gerar
+    assert gerar(client, confirmar=True).get_json()['total_atribuicoes'] == 0
+    assert EscalaPessoa.query.count() == 12
+
+
+def test_gravacao_ignora_atribuicao_ja_existente(app, equipes):
+    from src.models.user import db
+    from src.models.escala_pessoa import EscalaPessoa
+    from src.routes.rodizio import _gravar_plano
+    
+    ids = equipes({'acolhida': 2})
+    escala_id, = criar_tercas(date(2026, 3, 3), 1)
+    # Gravada por outra alteração entre a prévia e a confirmação
+    db.session.add(EscalaPessoa(escala_id=escala_id, pessoa_id=ids['acolhida'][0], funcao='acolhida'))
+    db.session.commit()
+    
+    _gravar_plano([{
+        'escala_id': escala_id,
+        'funcao': 'acolhida',
+        'pessoas': [{'id': pessoa_id} for pessoa_id in ids['acolhida']]
+    }])
+    db.session.commit()
+    assert sorted(linha.pessoa_id for linha in EscalaPessoa.query) == ids['acolhida']
+
+
+@pytest.mark.parametrize('corpo', [
+    {'equipes': {'acolhida': 999}},
+    {'equipes': {'acolhida': True}},
+    {'equipes': {'acolhida': '1'}},
+    {'equipes': {'inexistente': 1}},
+    {'equipes': [1]},
+    {'equipes': {'acolhida': 'inativa'}},
+    {'quantidades': {'musicos': True}},
+    {'quantidades': {'musicos': 2.5}},
+    {'quantidades': {'musicos': 11}},
+    {'quantidades': [1]},
+])
+def test_parametros_invalidos_respondem_400(client, equipes, corpo):
+    from src.models.user import db
+    from src.models.pessoa import Equipe
+    
+    equipes({'acolhida': 1})
+    inativa = Equipe(nome='Antiga', ativo=False)
+    db.session.add(inativa)
+    db.session.commit()
+    if corpo.get('equipes') == {'acolhida': 'inativa'}:
+        corpo = {'equipes': {'acolhida': inativa.id}}
+    
+    resposta = gerar(client, **corpo)
+    assert resposta.status_code == 400
+    assert resposta.get_json()['success'] is False